@@ -1,3 +1,4 @@
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
@@ -6,10 +7,11 @@ from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jwt import PyJWTError
 from passlib.context import CryptContext
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from . import settings, models
-from .database import get_db
+from .database import get_async_db, get_db
 
 SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = "HS256"
@@ -39,6 +41,15 @@ def get_password_hash(password):
     return pwd_context.hash(password)
 
 
+@dataclass(frozen=True)
+class Principal:
+    """The caller as described by their access token, without a ``users`` read."""
+
+    id: int
+    username: str
+    is_admin: bool
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=15))
@@ -47,21 +58,43 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
+def token_claims(user: models.User) -> dict:
+    return {"sub": user.username, "uid": user.id, "adm": bool(user.is_admin)}
+
+
+def _decode_token(token: str) -> dict:
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except PyJWTError:
+        raise credentials_exception
+    if payload.get("sub") is None:
+        raise credentials_exception
+    return payload
+
+
+def _principal_from_claims(payload: dict) -> Optional[Principal]:
+    # Tokens issued before "uid"/"adm" existed only carry the username.
+    if "uid" not in payload:
+        return None
+    return Principal(
+        id=int(payload["uid"]),
+        username=payload["sub"],
+        is_admin=bool(payload.get("adm", False)),
+    )
+
+
+def _get_user_for_claims(db: Session, payload: dict) -> Optional[models.User]:
+    if "uid" in payload:
+        return db.get(models.User, int(payload["uid"]))
+    return db.query(models.User).filter(models.User.username == payload["sub"]).first()
+
+
 async def get_current_user(
     request: Request,
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db),
 ):
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: Optional[str] = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-    except PyJWTError:
-        raise credentials_exception
-    user = (
-        db.query(models.User).filter(models.User.username == username).first()
-    )  # maybe wrong check after adding api
+    user = _get_user_for_claims(db, _decode_token(token))
     if user is None:
         raise credentials_exception
     request.state.user_id = user.id
@@ -75,20 +108,53 @@ async def get_current_user_optional(
 ) -> Optional[models.User]:
     if token is None:
         return None
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
-        username: Optional[str] = payload.get("sub")
-        if username is None:
+    return await get_current_user(request, token, db)
+
+
+async def get_principal(
+    request: Request,
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db),
+) -> Principal:
+    """Identify the caller from token claims alone.
+
+    Legacy tokens without a ``uid`` claim fall back to one username lookup
+    until they expire. Handlers that need the full ``User`` row should depend
+    on :func:`get_current_user` instead.
+    """
+    payload = _decode_token(token)
+    principal = _principal_from_claims(payload)
+    if principal is None:
+        user = await db.run_sync(_get_user_for_claims, payload)
+        if user is None:
             raise credentials_exception
-    except PyJWTError:
-        raise credentials_exception
+        principal = Principal(
+            id=user.id, username=user.username, is_admin=bool(user.is_admin)
+        )
+    request.state.user_id = principal.id
+    return principal
 
-    user = db.query(models.User).filter(models.User.username == username).first()
-    if user is None:
-        raise credentials_exception
-    request.state.user_id = user.id
 
-    return user
+async def get_principal_optional(
+    request: Request,
+    token: Optional[str] = Depends(oauth2_scheme_optional),
+    db: AsyncSession = Depends(get_async_db),
+) -> Optional[Principal]:
+    if token is None:
+        return None
+    return await get_principal(request, token, db)
+
+
+def has_admin_rights(db: Session, principal: Principal) -> bool:
+    """Check ``users.is_admin`` for moderation of other users' content.
+
+    The ``adm`` claim is only as fresh as the token, so a revoked admin would
+    keep it until expiry; admin-only paths ask the users row instead.
+    """
+    is_admin = (
+        db.query(models.User.is_admin).filter(models.User.id == principal.id).scalar()
+    )
+    return bool(is_admin)
 
 
 def require_admin(current_user: models.User = Depends(get_current_user)) -> models.User:
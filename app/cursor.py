@@ -0,0 +1,212 @@
+"""Compact, versioned, optionally signed keyset cursors.
+
+A cursor is URL-safe base64 (unpadded) of::
+
+    version (1 byte) | kind (1 byte) | fields... | tag (8 bytes, if signed)
+
+Each paginated endpoint declares a :class:`CursorSchema` with its own ``kind``
+and field codecs, so a cursor from one endpoint is rejected by another.
+Integers are LEB128 varints (zigzag for signed values) and timestamps are
+8-byte microseconds since the Unix epoch, so a comment cursor is 20
+characters (31 signed) instead of ~52. With ``CURSOR_SIGNING_ENABLED`` the tag is a
+truncated HMAC-SHA256 keyed from ``SECRET_KEY``, so clients can't forge
+cursors pointing at arbitrary index positions.
+
+Any decoding problem raises the same ``400 Invalid cursor``.
+"""
+
+import binascii
+import hashlib
+import hmac
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Generic, TypeVar
+
+from fastapi import HTTPException, status
+
+from . import settings
+
+CURSOR_VERSION = 1
+TAG_BYTES = 8
+
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_ORDINAL = _EPOCH.toordinal()
+_TO_URLSAFE = bytes.maketrans(b"+/", b"-_")
+_FROM_URLSAFE = bytes.maketrans(b"-_", b"+/")
+_SIGNING_KEY = hashlib.sha256(b"cursor:" + settings.SECRET_KEY.encode()).digest()
+
+
+class _InvalidCursor(ValueError):
+    pass
+
+
+def _write_uvarint(out: bytearray, value: int) -> None:
+    if value < 0:
+        raise ValueError("unsigned varint cannot be negative")
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_uvarint(data: bytes, pos: int) -> tuple[int, int]:
+    byte = data[pos]
+    if byte < 0x80:
+        return byte, pos + 1
+    value = byte & 0x7F
+    shift = 7
+    while True:
+        pos += 1
+        byte = data[pos]  # IndexError on truncated input
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos + 1
+        shift += 7
+        if shift > 63:
+            raise _InvalidCursor("varint too long")
+
+
+def _zigzag(value: int) -> int:
+    return value << 1 if value >= 0 else (-value << 1) - 1
+
+
+def _unzigzag(raw: int) -> int:
+    return (raw >> 1) ^ -(raw & 1)
+
+
+class UInt:
+    """Non-negative integer (ids)."""
+
+    def write(self, out: bytearray, value: int) -> None:
+        _write_uvarint(out, value)
+
+    def read(self, data: bytes, pos: int) -> tuple[int, int]:
+        return _read_uvarint(data, pos)
+
+
+class Int:
+    """Signed integer, zigzag-encoded so small negatives stay short."""
+
+    def write(self, out: bytearray, value: int) -> None:
+        _write_uvarint(out, _zigzag(value))
+
+    def read(self, data: bytes, pos: int) -> tuple[int, int]:
+        raw, pos = _read_uvarint(data, pos)
+        return _unzigzag(raw), pos
+
+
+class Timestamp:
+    """Naive UTC ``datetime`` as signed 64-bit epoch microseconds.
+
+    Fixed width rather than a varint: current timestamps need 51 bits, which
+    is 8 bytes either way, and ``int.from_bytes`` is much cheaper than a
+    byte-by-byte varint loop. Aware values are converted to UTC.
+    """
+
+    def write(self, out: bytearray, value: datetime) -> None:
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        # Integer arithmetic; subtracting datetimes and dividing timedeltas is
+        # several times slower.
+        seconds = (
+            (value.toordinal() - _EPOCH_ORDINAL) * 86400
+            + value.hour * 3600
+            + value.minute * 60
+            + value.second
+        )
+        out += (seconds * 1_000_000 + value.microsecond).to_bytes(8, "big", signed=True)
+
+    def read(self, data: bytes, pos: int) -> tuple[datetime, int]:
+        end = pos + 8
+        if end > len(data):
+            raise _InvalidCursor("truncated timestamp")
+        micros = int.from_bytes(data[pos:end], "big", signed=True)
+        try:
+            return _EPOCH + timedelta(microseconds=micros), end
+        except OverflowError as exc:
+            raise _InvalidCursor("timestamp out of range") from exc
+
+
+class Choice:
+    """One of a fixed tuple of strings, stored as its index."""
+
+    def __init__(self, *choices: str):
+        self.choices = choices
+        self._index = {choice: i for i, choice in enumerate(choices)}
+
+    def write(self, out: bytearray, value: str) -> None:
+        _write_uvarint(out, self._index[value])
+
+    def read(self, data: bytes, pos: int) -> tuple[str, int]:
+        index, pos = _read_uvarint(data, pos)
+        if index >= len(self.choices):
+            raise _InvalidCursor("unknown choice")
+        return self.choices[index], pos
+
+
+K = TypeVar("K", bound=tuple)
+
+_kinds: dict[int, str] = {}
+
+
+@dataclass(frozen=True)
+class CursorSchema(Generic[K]):
+    """Cursor layout for one sort order; decodes to the ``keyset`` tuple type."""
+
+    kind: int
+    keyset: type[K]
+    fields: tuple
+
+    def __post_init__(self):
+        if not 0 <= self.kind <= 0xFF:
+            raise ValueError(f"cursor kind {self.kind} does not fit in a byte")
+        if _kinds.setdefault(self.kind, self.keyset.__name__) != self.keyset.__name__:
+            raise ValueError(f"cursor kind {self.kind} is already registered")
+        if len(self.fields) != len(self.keyset._fields):
+            raise ValueError("one field codec is needed per keyset field")
+
+    def encode(self, *values) -> str:
+        out = bytearray((CURSOR_VERSION, self.kind))
+        for codec, value in zip(self.fields, values, strict=True):
+            codec.write(out, value)
+        if settings.CURSOR_SIGNING_ENABLED:
+            out += _tag(out)
+        return (
+            binascii.b2a_base64(out, newline=False)
+            .translate(_TO_URLSAFE)
+            .rstrip(b"=")
+            .decode("ascii")
+        )
+
+    def decode(self, cursor: str) -> K:
+        try:
+            return self._decode(cursor)
+        except Exception as exc:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor",
+            ) from exc
+
+    def _decode(self, cursor: str) -> K:
+        raw = cursor.encode("ascii")
+        data = binascii.a2b_base64(
+            raw.translate(_FROM_URLSAFE) + b"=" * (-len(raw) % 4), strict_mode=True
+        )
+        if settings.CURSOR_SIGNING_ENABLED:
+            data, tag = data[:-TAG_BYTES], data[-TAG_BYTES:]
+            if not hmac.compare_digest(tag, _tag(data)):
+                raise _InvalidCursor("bad signature")
+        if data[0] != CURSOR_VERSION or data[1] != self.kind:
+            raise _InvalidCursor("unknown version or kind")
+        pos = 2
+        values = []
+        for codec in self.fields:
+            value, pos = codec.read(data, pos)
+            values.append(value)
+        if pos != len(data):
+            raise _InvalidCursor("trailing bytes")
+        return self.keyset._make(values)
+
+
+def _tag(body: bytes | bytearray) -> bytes:
+    return hmac.digest(_SIGNING_KEY, body, "sha256")[:TAG_BYTES]
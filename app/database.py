@@ -2,14 +2,27 @@ from sqlalchemy.orm.session import Session
 
 
 from sqlalchemy import create_engine, event
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 
+from . import settings
+from .db_pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool
 from .settings import DATABASE_URL
 
-connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
-engine = create_engine(DATABASE_URL, connect_args=connect_args)
+
+def _pool_options() -> dict:
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
 
 if DATABASE_URL.startswith("sqlite"):
+    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
 
     @event.listens_for(engine, "connect")
     def set_sqlite_pragma(dbapi_connection, connection_record):
@@ -17,8 +30,35 @@ if DATABASE_URL.startswith("sqlite"):
         cursor.execute("PRAGMA foreign_keys=ON")
         cursor.close()
 
+    async_engine = None
+else:
+    # psycopg prepares statements server-side after a few executions; behind
+    # PgBouncer in transaction mode the next execution may hit another backend.
+    connect_args = (
+        {"prepare_threshold": None} if settings.DB_PGBOUNCER_TRANSACTION_MODE else {}
+    )
+    engine = create_engine(
+        DATABASE_URL,
+        connect_args=connect_args,
+        poolclass=InstrumentedQueuePool,
+        **_pool_options(),
+    )
+    # psycopg 3 has an async mode, so the same URL drives the async engine used
+    # by the read endpoints; they run their ORM code through
+    # ``AsyncSession.run_sync``.
+    async_engine = create_async_engine(
+        DATABASE_URL,
+        connect_args=connect_args,
+        poolclass=InstrumentedAsyncQueuePool,
+        **_pool_options(),
+    )
 
 SessionLocal = sessionmaker[Session](autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = (
+    async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+    if async_engine is not None
+    else None
+)
 
 Base = declarative_base()
 
@@ -29,3 +69,29 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+class ThreadedSession:
+    """``run_sync`` on a sync session in the threadpool.
+
+    Stands in for ``AsyncSession`` when the database URL has no async driver
+    (SQLite), so the async read endpoints work there too.
+    """
+
+    def __init__(self, session: Session):
+        self.sync_session = session
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+
+async def get_async_db():
+    if AsyncSessionLocal is None:
+        db = SessionLocal()
+        try:
+            yield ThreadedSession(db)
+        finally:
+            db.close()
+        return
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,20 @@
+from datetime import datetime
+from typing import NamedTuple
+
+from .cursor import CursorSchema, Timestamp, UInt
+
+
+class FeedKeyset(NamedTuple):
+    timestamp: datetime
+    post_id: int
+
+
+FEED_CURSOR = CursorSchema(kind=2, keyset=FeedKeyset, fields=(Timestamp(), UInt()))
+
+
+def encode_feed_cursor(timestamp: datetime, post_id: int) -> str:
+    return FEED_CURSOR.encode(timestamp, post_id)
+
+
+def decode_feed_cursor(cursor: str) -> FeedKeyset:
+    return FEED_CURSOR.decode(cursor)
@@ -0,0 +1,18 @@
+from typing import NamedTuple
+
+from .cursor import CursorSchema, UInt
+
+
+class FollowKeyset(NamedTuple):
+    user_id: int
+
+
+FOLLOW_CURSOR = CursorSchema(kind=4, keyset=FollowKeyset, fields=(UInt(),))
+
+
+def encode_follow_cursor(user_id: int) -> str:
+    return FOLLOW_CURSOR.encode(user_id)
+
+
+def decode_follow_cursor(cursor: str) -> int:
+    return FOLLOW_CURSOR.decode(cursor).user_id
@@ -1,3 +1,7 @@
+import asyncio
+import contextlib
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
@@ -8,9 +12,25 @@ from . import settings
 from .routers import users, posts, auth, admin, media, bookmarks, comments
 
 from .rate_limit import limiter, rate_limit_exceeded_handler
+from .services.comment_likes import fold_periodically
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    interval = settings.COMMENT_LIKE_FOLD_INTERVAL_SECONDS
+    if interval <= 0:
+        yield
+        return
+    fold_task = asyncio.create_task(fold_periodically(interval))
+    try:
+        yield
+    finally:
+        fold_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await fold_task
 
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
 app.add_middleware(SlowAPIMiddleware)
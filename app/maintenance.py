@@ -0,0 +1,125 @@
+"""Maintenance commands for denormalized data.
+
+Usage: ``python -m app.maintenance <command> [options]``
+"""
+
+import argparse
+from typing import Iterator
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from . import models
+from .database import SessionLocal
+from .services.comment_likes import fold_pending_comment_likes
+from .services.suggestions import refresh_suggestions
+from .services.top_comment import refresh_top_comments
+from .services.user_stats import reconcile_user_stats
+
+BATCH_SIZE = 1000
+
+
+def _id_batches(db: Session, id_column, ids: list[int]) -> Iterator[list[int]]:
+    if ids:
+        for start in range(0, len(ids), BATCH_SIZE):
+            yield ids[start : start + BATCH_SIZE]
+        return
+
+    last_id = 0
+    while True:
+        batch = list(
+            db.execute(
+                select(id_column)
+                .where(id_column > last_id)
+                .order_by(id_column)
+                .limit(BATCH_SIZE)
+            ).scalars()
+        )
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1]
+
+
+def _refresh_top_comments(args: argparse.Namespace) -> None:
+    db = SessionLocal()
+    try:
+        fixed = 0
+        for batch in _id_batches(db, models.Post.id, args.post_ids):
+            fixed += refresh_top_comments(db, batch)
+            db.commit()
+        print(f"Fixed {fixed} top comment pointer(s)")
+    finally:
+        db.close()
+
+
+def _reconcile_user_stats(args: argparse.Namespace) -> None:
+    db = SessionLocal()
+    try:
+        fixed = 0
+        for batch in _id_batches(db, models.User.id, args.user_ids):
+            fixed += reconcile_user_stats(db, batch)
+            db.commit()
+        print(f"Fixed {fixed} user stats row(s)")
+    finally:
+        db.close()
+
+
+def _refresh_suggestions(args: argparse.Namespace) -> None:
+    db = SessionLocal()
+    try:
+        written = refresh_suggestions(db, args.top_k)
+        db.commit()
+        print(f"Wrote {written} suggestion row(s)")
+    finally:
+        db.close()
+
+
+def _fold_comment_likes(args: argparse.Namespace) -> None:
+    touched = fold_pending_comment_likes()
+    print(f"Folded comment like deltas on {touched} post(s)")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.maintenance")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    top_comments = commands.add_parser(
+        "refresh-top-comments",
+        help="Recompute posts.top_comment_id and report how many were stale",
+    )
+    top_comments.add_argument(
+        "post_ids", nargs="*", type=int, help="Posts to check (default: all posts)"
+    )
+    top_comments.set_defaults(func=_refresh_top_comments)
+
+    user_stats = commands.add_parser(
+        "reconcile-user-stats",
+        help="Recompute user_stats counters and report how many were stale",
+    )
+    user_stats.add_argument(
+        "user_ids", nargs="*", type=int, help="Users to check (default: all users)"
+    )
+    user_stats.set_defaults(func=_reconcile_user_stats)
+
+    suggestions = commands.add_parser(
+        "refresh-suggestions",
+        help="Recompute friends-of-friends suggestions from the follow graph",
+    )
+    suggestions.add_argument(
+        "--top-k", type=int, default=None, help="Candidates kept per user"
+    )
+    suggestions.set_defaults(func=_refresh_suggestions)
+
+    comment_likes = commands.add_parser(
+        "fold-comment-likes",
+        help="Fold buffered comment like deltas into comments.like_count",
+    )
+    comment_likes.set_defaults(func=_fold_comment_likes)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,8 +9,9 @@ from sqlalchemy import (
     String,
     Table,
     Index,
+    text,
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import backref, relationship
 
 from .database import Base
 
@@ -20,6 +21,7 @@ Follow = Table(
     Base.metadata,
     Column("follower_id", Integer, ForeignKey("users.id"), primary_key=True),
     Column("followee_id", Integer, ForeignKey("users.id"), primary_key=True),
+    Index("ix_follows_followee_follower", "followee_id", "follower_id"),
 )
 
 
@@ -73,14 +75,87 @@ class User(Base):
     )
 
 
+class UserStats(Base):
+    """Denormalized profile counters, maintained by services/user_stats.py."""
+
+    __tablename__ = "user_stats"
+
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    followers_count = Column(Integer, nullable=False, default=0)
+    following_count = Column(Integer, nullable=False, default=0)
+    posts_count = Column(Integer, nullable=False, default=0)
+
+
+class UserSuggestion(Base):
+    """Precomputed "people you may know" rows, written by services/suggestions.py."""
+
+    __tablename__ = "user_suggestions"
+    __table_args__ = (Index("ix_user_suggestions_candidate_id", "candidate_id"),)
+
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    rank = Column(Integer, primary_key=True)
+    candidate_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    score = Column(Integer, nullable=False)
+
+
+class CommentLikeDelta(Base):
+    """Buffered like counts for hot comments; see services/comment_likes.py."""
+
+    __tablename__ = "comment_like_deltas"
+
+    comment_id = Column(
+        Integer, ForeignKey("comments.id", ondelete="CASCADE"), primary_key=True
+    )
+    shard = Column(Integer, primary_key=True)
+    delta = Column(Integer, nullable=False)
+
+
 class Post(Base):
     __tablename__ = "posts"
+    __table_args__ = (
+        Index("ix_posts_owner_timestamp", "owner_id", "timestamp", "id"),
+        Index("ix_posts_timestamp_id", "timestamp", "id"),
+        # Only posts that skipped fan-out are merged into home feeds at read time.
+        Index(
+            "ix_posts_owner_not_fanned_out",
+            "owner_id",
+            "timestamp",
+            "id",
+            postgresql_where=text("NOT fanned_out"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     content = Column(String(280), nullable=False)
     timestamp = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     owner_id = Column(Integer, ForeignKey("users.id"))
     media_id = Column(Integer, ForeignKey("media.id", ondelete="SET NULL"))
+    # Highest ranked top-level comment (like_count DESC, created_at ASC, id ASC),
+    # maintained by the comment endpoints; see services/top_comment.py.
+    top_comment_id = Column(
+        Integer,
+        ForeignKey(
+            "comments.id",
+            ondelete="SET NULL",
+            use_alter=True,
+            name="fk_posts_top_comment_id",
+        ),
+        nullable=True,
+    )
+    likes_count = Column(Integer, nullable=False, default=0)
+    retweets_count = Column(Integer, nullable=False, default=0)
+    # Comments and replies; maintained by the comment write paths.
+    comments_count = Column(Integer, nullable=False, default=0)
+    fanned_out = Column(Boolean, nullable=False, default=False)
+    # Bumped whenever the rendered post changes (edits, reactions, comments);
+    # feed and timeline ETags are derived from it.
+    version = Column(Integer, nullable=False, default=0)
 
     media = relationship("Media")
     owner = relationship("User", back_populates="posts")
@@ -107,6 +182,7 @@ class Post(Base):
         back_populates="post",
         cascade="all, delete-orphan",
         passive_deletes=True,
+        foreign_keys="Comment.post_id",
     )
 
 
@@ -136,6 +212,7 @@ class Media(Base):
 
 class Like(Base):
     __tablename__ = "likes"
+    __table_args__ = (Index("ix_likes_post_id", "post_id"),)
 
     user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
     post_id = Column(
@@ -148,6 +225,9 @@ class Like(Base):
 
 class Retweet(Base):
     __tablename__ = "retweets"
+    __table_args__ = (
+        Index("ix_retweets_user_timestamp", "user_id", "timestamp", "post_id"),
+    )
 
     user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
     post_id = Column(
@@ -161,6 +241,9 @@ class Retweet(Base):
 
 class Bookmark(Base):
     __tablename__ = "bookmarks"
+    __table_args__ = (
+        Index("ix_bookmarks_user_created", "user_id", "created_at", "post_id"),
+    )
 
     user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
     post_id = Column(
@@ -172,6 +255,27 @@ class Bookmark(Base):
     post = relationship("Post", back_populates="bookmarks")
 
 
+class FeedInboxItem(Base):
+    """A post delivered to a follower's home feed at write time."""
+
+    __tablename__ = "feed_inbox"
+    __table_args__ = (
+        Index("ix_feed_inbox_user_timestamp", "user_id", "post_timestamp", "post_id"),
+        Index("ix_feed_inbox_user_owner", "user_id", "owner_id"),
+    )
+
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    post_id = Column(
+        Integer, ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True
+    )
+    owner_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    post_timestamp = Column(DateTime, nullable=False)
+
+
 class Comment(Base):
     __tablename__ = "comments"
     __table_args__ = (
@@ -213,6 +317,8 @@ class Comment(Base):
 
     content = Column(String(400), nullable=False)
     like_count = Column(Integer, nullable=False, default=0)
+    # Number of replies in the thread; always 0 on replies themselves.
+    replies_count = Column(Integer, nullable=False, default=0)
     created_at = Column(
         DateTime, default=lambda: datetime.now(timezone.utc), nullable=False
     )
@@ -224,9 +330,14 @@ class Comment(Base):
     )
 
     user = relationship("User", back_populates="comments", foreign_keys=[user_id])
-    post = relationship("Post", back_populates="comments")
+    post = relationship("Post", back_populates="comments", foreign_keys=[post_id])
+    # passive_deletes leaves reply removal to the FK cascade instead of the ORM
+    # detaching replies (parent_id = NULL) when a thread root is deleted.
     parent = relationship(
-        "Comment", remote_side=[id], foreign_keys=[parent_id], backref="replies"
+        "Comment",
+        remote_side=[id],
+        foreign_keys=[parent_id],
+        backref=backref("replies", passive_deletes=True),
     )
     reply_to_comment = relationship(
         "Comment", remote_side=[id], foreign_keys=[reply_to_comment_id]
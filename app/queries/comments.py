@@ -0,0 +1,190 @@
+from datetime import datetime
+
+from sqlalchemy import Select, and_, false, or_, select, true
+from sqlalchemy.orm import Session, aliased
+
+from .. import models, schemas
+from ..comment_cursor import encode_comment_cursor
+from ..services.comment_likes import pending_likes
+
+
+def _comment_order(comment):
+    return (comment.like_count.desc(), comment.created_at.asc(), comment.id.asc())
+
+
+def _after_comment_keyset(comment, keyset: tuple[int, datetime, int]):
+    like_count, created_at, comment_id = keyset
+    return or_(
+        comment.like_count < like_count,
+        and_(comment.like_count == like_count, comment.created_at > created_at),
+        and_(
+            comment.like_count == like_count,
+            comment.created_at == created_at,
+            comment.id > comment_id,
+        ),
+    )
+
+
+def comment_rows_select(comment, viewer_id: int | None, from_clause=None) -> Select:
+    """Columns for rendering ``comment`` rows, with authors and avatars joined.
+
+    ``comment`` is ``models.Comment``, an alias of it, or the ``.c`` of a
+    ``RETURNING`` CTE; ``from_clause`` lets callers put it behind another FROM
+    (e.g. a LATERAL join, or that CTE).
+    """
+    author = aliased(models.User)
+    author_avatar = aliased(models.Media)
+    reply_user = aliased(models.User)
+    reply_avatar = aliased(models.Media)
+    query = (
+        select(
+            comment.id,
+            comment.post_id,
+            comment.parent_id,
+            comment.reply_to_comment_id,
+            comment.content,
+            comment.like_count,
+            pending_likes(comment).label("pending_likes"),
+            comment.replies_count,
+            comment.created_at,
+            comment.updated_at,
+            author.id.label("author_id"),
+            author.username.label("author_username"),
+            author.bio.label("author_bio"),
+            author_avatar.public_url.label("author_avatar_url"),
+            reply_user.id.label("reply_user_id"),
+            reply_user.username.label("reply_user_username"),
+            reply_user.bio.label("reply_user_bio"),
+            reply_avatar.public_url.label("reply_user_avatar_url"),
+        )
+        .select_from(from_clause if from_clause is not None else comment)
+        .join(author, author.id == comment.user_id)
+        .outerjoin(author_avatar, author_avatar.id == author.avatar_media_id)
+        .outerjoin(reply_user, reply_user.id == comment.reply_to_user_id)
+        .outerjoin(reply_avatar, reply_avatar.id == reply_user.avatar_media_id)
+    )
+    if viewer_id is None:
+        return query.add_columns(false().label("is_liked"))
+    viewer_like = aliased(models.CommentLike)
+    return query.outerjoin(
+        viewer_like,
+        and_(viewer_like.comment_id == comment.id, viewer_like.user_id == viewer_id),
+    ).add_columns(viewer_like.user_id.is_not(None).label("is_liked"))
+
+
+def comment_from_row(row) -> schemas.CommentResponse:
+    reply_to_user = None
+    if row.reply_user_id is not None:
+        reply_to_user = schemas.UserPreview(
+            id=row.reply_user_id,
+            username=row.reply_user_username,
+            avatar_url=row.reply_user_avatar_url,
+            bio=row.reply_user_bio,
+        )
+    return schemas.CommentResponse(
+        id=row.id,
+        post_id=row.post_id,
+        user=schemas.UserPreview(
+            id=row.author_id,
+            username=row.author_username,
+            avatar_url=row.author_avatar_url,
+            bio=row.author_bio,
+        ),
+        parent_id=row.parent_id,
+        reply_to_comment_id=row.reply_to_comment_id,
+        reply_to_user=reply_to_user,
+        content=row.content,
+        like_count=row.like_count + row.pending_likes,
+        replies_count=row.replies_count,
+        is_liked=row.is_liked,
+        created_at=row.created_at,
+        updated_at=row.updated_at,
+    )
+
+
+def comment_cursor_after(row) -> str:
+    # Pages are ordered by the stored count, not the displayed one.
+    return encode_comment_cursor(row.like_count, row.created_at, row.id)
+
+
+def fetch_comment_page(
+    db: Session,
+    viewer_id: int | None,
+    keyset: tuple[int, datetime, int] | None,
+    limit: int,
+    *criteria,
+):
+    """Up to ``limit + 1`` rendered comment rows matching ``criteria``."""
+    query = comment_rows_select(models.Comment, viewer_id).where(*criteria)
+    if keyset is not None:
+        query = query.where(_after_comment_keyset(models.Comment, keyset))
+    return db.execute(
+        query.order_by(*_comment_order(models.Comment)).limit(limit + 1)
+    ).all()
+
+
+def fetch_comment_threads(
+    db: Session,
+    post_id: int,
+    viewer_id: int | None,
+    keyset: tuple[int, datetime, int] | None,
+    limit: int,
+    replies_per_thread: int,
+) -> tuple[list[schemas.CommentThread], str | None]:
+    """A page of top-level comments, each with its first replies.
+
+    Two statements regardless of page size: the top-level page, then one
+    ``LATERAL`` join that takes ``replies_per_thread + 1`` replies per parent
+    from ``ix_comments_parent_sort``. The extra reply tells whether the
+    thread needs a replies cursor.
+    """
+    rows = fetch_comment_page(
+        db,
+        viewer_id,
+        keyset,
+        limit,
+        models.Comment.post_id == post_id,
+        models.Comment.parent_id.is_(None),
+    )
+    page = rows[:limit]
+    next_cursor = comment_cursor_after(page[-1]) if len(rows) > limit else None
+    if not page:
+        return [], next_cursor
+
+    parents = (
+        select(models.Comment.id.label("thread_id"))
+        .where(models.Comment.id.in_([row.id for row in page]))
+        .subquery("parents")
+    )
+    first_replies = (
+        select(models.Comment)
+        .where(models.Comment.parent_id == parents.c.thread_id)
+        .order_by(*_comment_order(models.Comment))
+        .limit(replies_per_thread + 1)
+        .lateral("first_replies")
+    )
+    reply = aliased(models.Comment, first_replies)
+    reply_rows = db.execute(
+        comment_rows_select(
+            reply, viewer_id, from_clause=parents.join(first_replies, true())
+        ).order_by(reply.parent_id, *_comment_order(reply))
+    ).all()
+
+    replies_by_parent: dict[int, list] = {}
+    for row in reply_rows:
+        replies_by_parent.setdefault(row.parent_id, []).append(row)
+
+    threads = []
+    for row in page:
+        replies = replies_by_parent.get(row.id, [])
+        shown = replies[:replies_per_thread]
+        threads.append(
+            schemas.CommentThread(
+                **comment_from_row(row).model_dump(),
+                replies=[comment_from_row(reply_row) for reply_row in shown],
+                replies_next_cursor=comment_cursor_after(shown[-1])
+                if len(replies) > replies_per_thread
+                else None,
+            )
+        )
+    return threads, next_cursor
@@ -0,0 +1,62 @@
+from typing import Literal
+
+from sqlalchemy import and_, false, select
+from sqlalchemy.orm import Session, aliased
+
+from .. import models, schemas
+
+
+def fetch_follow_page(
+    db: Session,
+    user_id: int,
+    direction: Literal["followers", "following"],
+    viewer_id: int | None,
+    after_id: int | None,
+    limit: int,
+) -> list[schemas.FollowListUser]:
+    """One page of a user's followers or followees, ordered by user id.
+
+    Followers walk ``ix_follows_followee_follower`` and followees walk the
+    ``follows`` primary key, so the keyset predicate turns into an index range
+    and every page costs the same however large the list is.
+    """
+    if direction == "followers":
+        anchor, listed = models.Follow.c.followee_id, models.Follow.c.follower_id
+    else:
+        anchor, listed = models.Follow.c.follower_id, models.Follow.c.followee_id
+
+    avatar = aliased(models.Media)
+    query = (
+        select(
+            models.User.id,
+            models.User.username,
+            avatar.public_url.label("avatar_url"),
+            models.User.bio,
+        )
+        .select_from(models.Follow)
+        .join(models.User, models.User.id == listed)
+        .outerjoin(avatar, avatar.id == models.User.avatar_media_id)
+        .where(anchor == user_id)
+        .order_by(listed.asc())
+        .limit(limit)
+    )
+    if after_id is not None:
+        query = query.where(listed > after_id)
+    if viewer_id is None:
+        query = query.add_columns(false().label("is_followed_by_viewer"))
+    else:
+        viewer_follow = models.Follow.alias("viewer_follow")
+        query = query.outerjoin(
+            viewer_follow,
+            and_(
+                viewer_follow.c.follower_id == viewer_id,
+                viewer_follow.c.followee_id == listed,
+            ),
+        ).add_columns(
+            viewer_follow.c.follower_id.is_not(None).label("is_followed_by_viewer")
+        )
+
+    return [
+        schemas.FollowListUser.model_validate(dict(row._mapping))
+        for row in db.execute(query)
+    ]
@@ -0,0 +1,60 @@
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, aliased
+
+from .. import models, schemas
+
+
+def _mutual_edges():
+    # f1: viewer -> mutual, f2: mutual -> target. Both are primary-key rows,
+    # so every mutual appears once per target without a DISTINCT.
+    f1 = models.Follow.alias("f1")
+    f2 = models.Follow.alias("f2")
+    return f1, f2, f1.join(f2, f2.c.follower_id == f1.c.followee_id)
+
+
+def fetch_mutuals_preview(
+    db: Session, viewer_id: int, target_id: int, limit: int
+) -> schemas.MutualsPreview:
+    """Mutual count plus the first ``limit`` mutuals, from one statement."""
+    f1, f2, edges = _mutual_edges()
+    avatar = aliased(models.Media)
+    rows = db.execute(
+        select(
+            models.User.id,
+            models.User.username,
+            models.User.bio,
+            avatar.public_url,
+            # Window aggregates run before LIMIT, so this is the full count.
+            func.count().over().label("mutual_count"),
+        )
+        .select_from(edges)
+        .join(models.User, models.User.id == f1.c.followee_id)
+        .outerjoin(avatar, avatar.id == models.User.avatar_media_id)
+        .where(f1.c.follower_id == viewer_id, f2.c.followee_id == target_id)
+        .order_by(models.User.id.asc())
+        .limit(limit)
+    ).all()
+
+    return schemas.MutualsPreview(
+        mutual_count=rows[0].mutual_count if rows else 0,
+        mutual_preview=[
+            schemas.UserPreview(
+                id=user_id, username=username, avatar_url=avatar_url, bio=bio
+            )
+            for user_id, username, bio, avatar_url, _ in rows
+        ],
+    )
+
+
+def count_mutuals(db: Session, viewer_id: int, target_ids: list[int]) -> dict[int, int]:
+    """Mutual counts for each of ``target_ids``; targets with none are omitted."""
+    if not target_ids:
+        return {}
+    f1, f2, edges = _mutual_edges()
+    rows = db.execute(
+        select(f2.c.followee_id, func.count())
+        .select_from(edges)
+        .where(f1.c.follower_id == viewer_id, f2.c.followee_id.in_(target_ids))
+        .group_by(f2.c.followee_id)
+    )
+    return dict(rows.all())
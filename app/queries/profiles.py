@@ -0,0 +1,88 @@
+from sqlalchemy import and_, false, func, select
+from sqlalchemy.orm import Session, aliased
+
+from .. import models, schemas
+
+MAX_BATCH_PROFILES = 100
+
+
+def fetch_profile_validator(db: Session, viewer_id: int | None, username: str):
+    """The columns a profile's ETag is built from; ``None`` if there is no user.
+
+    Media ids stand in for their URLs, so the media joins of
+    :func:`fetch_profiles` are left out.
+    """
+    stats = models.UserStats
+    if viewer_id is None:
+        followed = false()
+    else:
+        followed = (
+            select(models.Follow.c.follower_id)
+            .where(
+                models.Follow.c.follower_id == viewer_id,
+                models.Follow.c.followee_id == models.User.id,
+            )
+            .exists()
+        )
+    return db.execute(
+        select(
+            models.User.id,
+            models.User.bio,
+            models.User.avatar_media_id,
+            models.User.profile_cover_media_id,
+            stats.followers_count,
+            stats.following_count,
+            stats.posts_count,
+            followed.label("is_followed_by_viewer"),
+        )
+        .outerjoin(stats, stats.user_id == models.User.id)
+        .where(models.User.username == username)
+    ).first()
+
+
+def fetch_profiles(
+    db: Session, viewer_id: int | None, *criteria
+) -> list[schemas.UserProfile]:
+    """Load profiles matching ``criteria`` in one statement.
+
+    Counters come from ``user_stats``; the viewer's follow flag is a left join
+    on the ``follows`` primary key rather than a per-user lookup.
+    """
+    avatar = aliased(models.Media)
+    cover = aliased(models.Media)
+    stats = models.UserStats
+    query = (
+        select(
+            models.User.id,
+            models.User.username,
+            models.User.created_at,
+            models.User.bio,
+            func.coalesce(stats.followers_count, 0).label("followers_count"),
+            func.coalesce(stats.following_count, 0).label("following_count"),
+            func.coalesce(stats.posts_count, 0).label("posts_count"),
+            avatar.public_url.label("avatar_url"),
+            cover.public_url.label("cover_url"),
+        )
+        .outerjoin(stats, stats.user_id == models.User.id)
+        .outerjoin(avatar, avatar.id == models.User.avatar_media_id)
+        .outerjoin(cover, cover.id == models.User.profile_cover_media_id)
+        .where(*criteria)
+    )
+    if viewer_id is None:
+        query = query.add_columns(false().label("is_followed_by_viewer"))
+    else:
+        viewer_follow = models.Follow.alias("viewer_follow")
+        query = query.outerjoin(
+            viewer_follow,
+            and_(
+                viewer_follow.c.follower_id == viewer_id,
+                viewer_follow.c.followee_id == models.User.id,
+            ),
+        ).add_columns(
+            viewer_follow.c.follower_id.is_not(None).label("is_followed_by_viewer")
+        )
+
+    return [
+        schemas.UserProfile.model_validate(dict(row._mapping))
+        for row in db.execute(query)
+    ]
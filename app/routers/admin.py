@@ -4,7 +4,10 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
 from .. import auth, exceptions, models
-from ..database import get_db
+from ..database import async_engine, engine, get_db
+from ..db_pool import pool_stats
+from ..services.feed_cache import public_feed_cache
+from ..services.user_stats import bump_user_stats
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -20,6 +23,21 @@ def admin_delete_post(
     post = db.query(models.Post).filter(models.Post.id == post_id).first()
     if post is None:
         exceptions.raise_not_found_exception("Post not found")
+    bump_user_stats(db, post.owner_id, posts=-1)
     db.delete(post)
     db.commit()
+    public_feed_cache.invalidate_feed_shift([post_id])
     return
+
+
+@router.get("/feed-cache")
+def feed_cache_stats(_: models.User = Depends(auth.require_admin)):
+    return public_feed_cache.stats()
+
+
+@router.get("/db-pool")
+def db_pool_stats(_: models.User = Depends(auth.require_admin)):
+    stats = {"sync": pool_stats(engine.pool)}
+    if async_engine is not None:
+        stats["async"] = pool_stats(async_engine.sync_engine.pool)
+    return stats
@@ -1,12 +1,13 @@
 from typing import Annotated, List
 
 from fastapi import APIRouter, Depends, Query, Request
-from sqlalchemy import func, literal
-from sqlalchemy.orm import Session, aliased
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
 from .. import auth, exceptions, models, schemas
 from ..rate_limit import limiter
-from ..database import get_db
+from ..database import get_async_db, get_db
+from ..services.feed_hydration import hydrate_posts
 
 router = APIRouter(
     prefix="/bookmarks",
@@ -14,6 +15,7 @@ router = APIRouter(
 )
 
 db_dependency = Annotated[Session, Depends(get_db)]
+async_db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
 
 
 @router.post("/{post_id}", status_code=204)
@@ -22,7 +24,7 @@ def add_bookmark(
     request: Request,
     post_id: int,
     db: db_dependency,
-    current_user: models.User = Depends(auth.get_current_user),
+    current_user: auth.Principal = Depends(auth.get_principal),
 ):
     post = db.query(models.Post).filter(models.Post.id == post_id).first()
     if post is None:
@@ -45,7 +47,7 @@ def remove_bookmark(
     request: Request,
     post_id: int,
     db: db_dependency,
-    current_user: models.User = Depends(auth.get_current_user),
+    current_user: auth.Principal = Depends(auth.get_principal),
 ):
     existing = (
         db.query(models.Bookmark)
@@ -59,96 +61,22 @@ def remove_bookmark(
 
 
 @router.get("/", response_model=List[schemas.PostWithCounts])
-def list_bookmarks(
-    db: db_dependency,
-    current_user: models.User = Depends(auth.get_current_user),
+async def list_bookmarks(
+    db: async_db_dependency,
+    current_user: auth.Principal = Depends(auth.get_principal),
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
 ):
-    avatar_media = aliased(models.Media)
+    return await db.run_sync(_list_bookmarks, current_user.id, skip, limit)
 
-    likes_subq = (
-        db.query(
-            models.Like.post_id, func.count(models.Like.user_id).label("likes_count")
-        )
-        .group_by(models.Like.post_id)
-        .subquery()
-    )
-
-    retweets_subq = (
-        db.query(
-            models.Retweet.post_id,
-            func.count(models.Retweet.user_id).label("retweets_count"),
-        )
-        .group_by(models.Retweet.post_id)
-        .subquery()
-    )
-
-    liked_by_me_subq = (
-        db.query(models.Like.post_id.label("post_id"))
-        .filter(models.Like.user_id == current_user.id)
-        .subquery()
-    )
-
-    retweeted_by_me_subq = (
-        db.query(models.Retweet.post_id.label("post_id"))
-        .filter(models.Retweet.user_id == current_user.id)
-        .subquery()
-    )
 
+def _list_bookmarks(db: Session, user_id: int, skip: int, limit: int):
     rows = (
-        db.query(
-            models.Post,
-            models.User.username.label("owner_username"),
-            avatar_media.public_url.label("owner_avatar_url"),
-            func.coalesce(likes_subq.c.likes_count, 0).label("likes_count"),
-            func.coalesce(retweets_subq.c.retweets_count, 0).label("retweets_count"),
-            liked_by_me_subq.c.post_id.isnot(None).label("is_liked"),
-            retweeted_by_me_subq.c.post_id.isnot(None).label("is_retweeted"),
-            literal(True).label("is_bookmarked"),
-            models.Media.public_url.label("media_url"),
-        )
-        .join(models.Bookmark, models.Bookmark.post_id == models.Post.id)
-        .join(models.User, models.Post.owner_id == models.User.id)
-        .outerjoin(models.Media, models.Post.media_id == models.Media.id)
-        .outerjoin(avatar_media, models.User.avatar_media_id == avatar_media.id)
-        .outerjoin(likes_subq, models.Post.id == likes_subq.c.post_id)
-        .outerjoin(retweets_subq, models.Post.id == retweets_subq.c.post_id)
-        .outerjoin(liked_by_me_subq, models.Post.id == liked_by_me_subq.c.post_id)
-        .outerjoin(
-            retweeted_by_me_subq, models.Post.id == retweeted_by_me_subq.c.post_id
-        )
-        .filter(models.Bookmark.user_id == current_user.id)
-        .order_by(models.Bookmark.created_at.desc(), models.Post.id.desc())
+        db.query(models.Bookmark.post_id)
+        .filter(models.Bookmark.user_id == user_id)
+        .order_by(models.Bookmark.created_at.desc(), models.Bookmark.post_id.desc())
         .offset(skip)
         .limit(limit)
         .all()
     )
-
-    return [
-        schemas.PostWithCounts(
-            id=post.id,
-            content=post.content,
-            timestamp=post.timestamp,
-            owner_id=post.owner_id,
-            owner_username=owner_username,
-            owner_avatar_url=owner_avatar_url,
-            likes_count=likes_count,
-            retweets_count=retweets_count,
-            is_liked=is_liked,
-            is_retweeted=is_retweeted,
-            is_bookmarked=is_bookmarked,
-            media_url=media_url,
-        )
-        for (
-            post,
-            owner_username,
-            owner_avatar_url,
-            likes_count,
-            retweets_count,
-            is_liked,
-            is_retweeted,
-            is_bookmarked,
-            media_url,
-        ) in rows
-    ]
+    return hydrate_posts(db, [post_id for (post_id,) in rows], user_id)
@@ -1,18 +1,34 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Query, Request
-from sqlalchemy import and_, literal, or_
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.dialects.postgresql import insert
-from sqlalchemy.orm import Session, aliased
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
 from .. import auth, exceptions, models, schemas
-from ..comment_cursor import decode_comment_cursor, encode_comment_cursor
-from ..database import get_db
+from ..comment_cursor import decode_comment_cursor
+from ..database import get_async_db, get_db
+from ..etag import etag_matches, not_modified, set_etag, weak_etag
+from ..queries.comments import (
+    comment_cursor_after,
+    comment_from_row,
+    fetch_comment_page,
+    fetch_comment_threads,
+)
 from ..rate_limit import limiter
+from ..services.comment_likes import apply_comment_like_change
+from ..services.comment_write_service import (
+    delete_comment_row,
+    insert_comment,
+    load_reply_context,
+    update_comment_content,
+)
+from ..services.feed_cache import public_feed_cache
 
 router = APIRouter(tags=["comments"])
 
 db_dependency = Annotated[Session, Depends(get_db)]
+async_db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
 
 COMMENT_MAX_LENGTH = 400
 
@@ -28,50 +44,35 @@ def _trimmed_or_error(content: str) -> str:
     return trimmed
 
 
-def _ensure_top_level_comment(
-    db: Session, post_id: int, comment_id: int
-) -> models.Comment:
-    parent = (
-        db.query(models.Comment)
-        .filter(models.Comment.id == comment_id, models.Comment.post_id == post_id)
-        .first()
-    )
-    if not parent:
+def _resolve_reply_target(
+    context,
+    reply_to_comment_id: int | None,
+    reply_to_user_id: int | None,
+) -> tuple[int | None, int]:
+    """Validate a reply against ``load_reply_context`` columns.
+
+    Returns ``(reply_to_comment_id, reply_to_user_id)`` for the new row.
+    """
+    if context.parent_id is None:
         exceptions.raise_not_found_exception("Parent comment not found")
-    if parent.parent_id is not None:
+    if context.parent_parent_id is not None:
         exceptions.raise_bad_request_exception(
             "parent_id must reference a top-level comment"
         )
-    return parent
+    if reply_to_comment_id is None:
+        # Replying to a top-level comment: target the parent user (VK-style "Name,")
+        return None, context.parent_user_id
 
-
-def _ensure_reply_target(
-    db: Session,
-    post_id: int,
-    parent_id: int,
-    reply_to_comment_id: int,
-    reply_to_user_id: int | None,
-) -> tuple[int, int | None]:
-    target = (
-        db.query(models.Comment)
-        .filter(
-            models.Comment.id == reply_to_comment_id,
-            models.Comment.post_id == post_id,
-            models.Comment.parent_id == parent_id,
-        )
-        .first()
-    )
-    if not target:
+    if context.target_id is None:
         exceptions.raise_bad_request_exception(
             "reply_to_comment_id must be within the same thread"
         )
-    # If client didn't pass reply_to_user_id, derive it.
-    target_user_id = target.user_id
-    if reply_to_user_id is not None and reply_to_user_id != target_user_id:
+    # reply_to_user_id is optional; when given it must name the target's author.
+    if reply_to_user_id is not None and reply_to_user_id != context.target_user_id:
         exceptions.raise_bad_request_exception(
             "reply_to_user_id does not match reply_to_comment_id"
         )
-    return target_user_id, target.id
+    return context.target_id, context.target_user_id
 
 
 def _get_comment_or_404(db: Session, comment_id: int) -> models.Comment:
@@ -81,6 +82,12 @@ def _get_comment_or_404(db: Session, comment_id: int) -> models.Comment:
     return comment
 
 
+def _ensure_comment_editable(db: Session, comment_id: int, user_id: int) -> None:
+    comment = _get_comment_or_404(db, comment_id)
+    if comment.user_id != user_id:
+        exceptions.raise_forbidden_exception("Not authorized to edit this comment")
+
+
 @router.post("/posts/{post_id}/comments", response_model=schemas.CommentResponse)
 @limiter.limit("30/minute")
 def create_comment(
@@ -88,18 +95,18 @@ def create_comment(
     post_id: int,
     payload: schemas.CommentCreate,
     db: db_dependency,
-    current_user: models.User = Depends(auth.get_current_user),
+    current_user: auth.Principal = Depends(auth.get_principal),
 ):
-    post = db.query(models.Post).filter(models.Post.id == post_id).first()
-    if not post:
-        exceptions.raise_not_found_exception("Post not found")
-
-    content = _trimmed_or_error(payload.content)
-
     parent_id = payload.parent_id
     reply_to_comment_id = payload.reply_to_comment_id
     reply_to_user_id = payload.reply_to_user_id
 
+    context = load_reply_context(db, post_id, parent_id, reply_to_comment_id)
+    if context is None:
+        exceptions.raise_not_found_exception("Post not found")
+
+    content = _trimmed_or_error(payload.content)
+
     if parent_id is None:
         # top-level comment
         if reply_to_comment_id is not None or reply_to_user_id is not None:
@@ -107,65 +114,22 @@ def create_comment(
                 "reply_to_* must be null for top-level comments"
             )
     else:
-        parent = _ensure_top_level_comment(db, post_id, parent_id)
-        if reply_to_comment_id is not None:
-            reply_to_user_id, reply_to_comment_id = _ensure_reply_target(
-                db, post_id, parent.id, reply_to_comment_id, reply_to_user_id
-            )
-        else:
-            reply_to_comment_id = None
-            # Replying to a top-level comment: target the parent user (VK-style "Name,")
-            reply_to_user_id = parent.user_id
-
-    comment = models.Comment(
-        post_id=post_id,
-        user_id=current_user.id,
-        parent_id=parent_id,
-        reply_to_comment_id=reply_to_comment_id,
-        reply_to_user_id=reply_to_user_id,
-        content=content,
-    )
-    db.add(comment)
-    db.commit()
-    db.refresh(comment)
-
-    reply_to_user = (
-        db.query(models.User).filter(models.User.id == comment.reply_to_user_id).first()
-        if comment.reply_to_user_id
-        else None
-    )
+        reply_to_comment_id, reply_to_user_id = _resolve_reply_target(
+            context, reply_to_comment_id, reply_to_user_id
+        )
 
-    return schemas.CommentResponse(
-        id=comment.id,
-        post_id=comment.post_id,
-        user=schemas.UserPreview(
-            id=current_user.id,
-            username=current_user.username,
-            avatar_url=current_user.avatar_media.public_url
-            if current_user.avatar_media
-            else None,
-            bio=current_user.bio,
-        ),
-        parent_id=comment.parent_id,
-        reply_to_comment_id=comment.reply_to_comment_id,
-        reply_to_user=(
-            schemas.UserPreview(
-                id=reply_to_user.id,
-                username=reply_to_user.username,
-                avatar_url=reply_to_user.avatar_media.public_url
-                if reply_to_user.avatar_media
-                else None,
-                bio=reply_to_user.bio,
-            )
-            if reply_to_user
-            else None
-        ),
-        content=comment.content,
-        like_count=comment.like_count,
-        is_liked=False,
-        created_at=comment.created_at,
-        updated_at=comment.updated_at,
+    comment = insert_comment(
+        db,
+        post_id,
+        current_user.id,
+        parent_id,
+        reply_to_comment_id,
+        reply_to_user_id,
+        content,
     )
+    db.commit()
+    public_feed_cache.invalidate_posts([post_id])
+    return comment
 
 
 @router.patch("/comments/{comment_id}", response_model=schemas.CommentResponse)
@@ -175,177 +139,151 @@ def update_comment(
     comment_id: int,
     payload: schemas.CommentUpdate,
     db: db_dependency,
-    current_user: models.User = Depends(auth.get_current_user),
+    current_user: auth.Principal = Depends(auth.get_principal),
 ):
-    comment = _get_comment_or_404(db, comment_id)
-
-    if comment.user_id != current_user.id:
-        exceptions.raise_forbidden_exception("Not authorized to edit this comment")
-
-    comment.content = _trimmed_or_error(payload.content)
-    db.add(comment)
+    try:
+        content = _trimmed_or_error(payload.content)
+    except HTTPException:
+        # Missing or foreign comments are reported before invalid content.
+        _ensure_comment_editable(db, comment_id, current_user.id)
+        raise
+
+    comment = update_comment_content(db, comment_id, current_user.id, content)
+    if comment is None:
+        _ensure_comment_editable(db, comment_id, current_user.id)
     db.commit()
-    db.refresh(comment)
-
-    reply_to_user = (
-        db.query(models.User).filter(models.User.id == comment.reply_to_user_id).first()
-        if comment.reply_to_user_id
-        else None
-    )
-    is_liked = (
-        db.query(models.CommentLike)
-        .filter_by(user_id=current_user.id, comment_id=comment.id)
-        .first()
-        is not None
-    )
-
-    return schemas.CommentResponse(
-        id=comment.id,
-        post_id=comment.post_id,
-        user=schemas.UserPreview(
-            id=current_user.id,
-            username=current_user.username,
-            avatar_url=current_user.avatar_media.public_url
-            if current_user.avatar_media
-            else None,
-            bio=current_user.bio,
-        ),
-        parent_id=comment.parent_id,
-        reply_to_comment_id=comment.reply_to_comment_id,
-        reply_to_user=(
-            schemas.UserPreview(
-                id=reply_to_user.id,
-                username=reply_to_user.username,
-                avatar_url=reply_to_user.avatar_media.public_url
-                if reply_to_user.avatar_media
-                else None,
-                bio=reply_to_user.bio,
-            )
-            if reply_to_user
-            else None
-        ),
-        content=comment.content,
-        like_count=comment.like_count,
-        is_liked=is_liked,
-        created_at=comment.created_at,
-        updated_at=comment.updated_at,
-    )
+    public_feed_cache.invalidate_posts([comment.post_id])
+    return comment
 
 
 @router.get(
     "/posts/{post_id}/comments",
     response_model=schemas.CommentListResponse,
 )
-def list_top_level_comments(
+async def list_top_level_comments(
+    request: Request,
+    response: Response,
     post_id: int,
-    db: db_dependency,
-    current_user: models.User | None = Depends(auth.get_current_user_optional),
+    db: async_db_dependency,
+    current_user: auth.Principal | None = Depends(auth.get_principal_optional),
     limit: int = Query(20, ge=1, le=100),
     cursor: str | None = Query(None),
+):
+    return await db.run_sync(
+        _list_top_level_comments,
+        request,
+        response,
+        post_id,
+        current_user,
+        limit,
+        cursor,
+    )
+
+
+def _list_top_level_comments(
+    db: Session,
+    request: Request,
+    response: Response,
+    post_id: int,
+    current_user: auth.Principal | None,
+    limit: int,
+    cursor: str | None,
 ):
     post = db.query(models.Post).filter(models.Post.id == post_id).first()
     if not post:
         exceptions.raise_not_found_exception("Post not found")
 
-    if current_user is not None:
-        base_q = (
-            db.query(
-                models.Comment,
-                models.User,
-                models.CommentLike.user_id.label("liked_user_id"),
-            )
-            .join(models.User, models.Comment.user_id == models.User.id)
-            .outerjoin(
-                models.CommentLike,
-                and_(
-                    models.CommentLike.comment_id == models.Comment.id,
-                    models.CommentLike.user_id == current_user.id,
-                ),
-            )
-            .filter(
-                models.Comment.post_id == post_id,
-                models.Comment.parent_id.is_(None),
-            )
-        )
-    else:
-        base_q = (
-            db.query(models.Comment, models.User, literal(None).label("liked_user_id"))
-            .join(models.User, models.Comment.user_id == models.User.id)
-            .filter(
-                models.Comment.post_id == post_id,
-                models.Comment.parent_id.is_(None),
-            )
-        )
+    keyset = decode_comment_cursor(cursor) if cursor else None
+    rows = fetch_comment_page(
+        db,
+        current_user.id if current_user else None,
+        keyset,
+        limit,
+        models.Comment.post_id == post_id,
+        models.Comment.parent_id.is_(None),
+    )
 
-    if cursor:
-        c_like, c_created, c_id = decode_comment_cursor(cursor)
-        base_q = base_q.filter(
-            or_(
-                models.Comment.like_count < c_like,
-                and_(
-                    models.Comment.like_count == c_like,
-                    models.Comment.created_at > c_created,
-                ),
-                and_(
-                    models.Comment.like_count == c_like,
-                    models.Comment.created_at == c_created,
-                    models.Comment.id > c_id,
-                ),
+    # The page rows already carry everything the response renders, so the
+    # ETag is checked before building it.
+    etag = weak_etag(
+        [
+            (
+                row.id,
+                row.like_count,
+                row.pending_likes,
+                row.replies_count,
+                row.updated_at,
+                row.author_avatar_url,
+                row.author_bio,
+                row.is_liked,
             )
-        )
+            for row in rows
+        ]
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
 
-    rows = (
-        base_q.order_by(
-            models.Comment.like_count.desc(),
-            models.Comment.created_at.asc(),
-            models.Comment.id.asc(),
-        )
-        .limit(limit + 1)
-        .all()
+    next_cursor = comment_cursor_after(rows[limit - 1]) if len(rows) > limit else None
+    return schemas.CommentListResponse(
+        items=[comment_from_row(row) for row in rows[:limit]], next_cursor=next_cursor
     )
 
-    items: list[schemas.CommentResponse] = []
-    for comment, user, liked_user_id in rows[:limit]:
-        items.append(
-            schemas.CommentResponse(
-                id=comment.id,
-                post_id=comment.post_id,
-                user=schemas.UserPreview(
-                    id=user.id,
-                    username=user.username,
-                    avatar_url=user.avatar_media.public_url
-                    if user.avatar_media
-                    else None,
-                    bio=user.bio,
-                ),
-                parent_id=comment.parent_id,
-                reply_to_comment_id=comment.reply_to_comment_id,
-                reply_to_user=None,  # optional: join if you want it here
-                content=comment.content,
-                like_count=comment.like_count,
-                is_liked=liked_user_id is not None,
-                created_at=comment.created_at,
-                updated_at=comment.updated_at,
-            )
-        )
 
-    next_cursor = None
-    if len(rows) > limit:
-        last = rows[limit - 1][0]
-        next_cursor = encode_comment_cursor(last.like_count, last.created_at, last.id)
+@router.get(
+    "/posts/{post_id}/comments/threads",
+    response_model=schemas.CommentThreadListResponse,
+)
+async def list_comment_threads(
+    post_id: int,
+    db: async_db_dependency,
+    current_user: auth.Principal | None = Depends(auth.get_principal_optional),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = Query(None),
+    replies: int = Query(3, ge=1, le=10),
+):
+    viewer_id = current_user.id if current_user else None
+    return await db.run_sync(
+        _list_comment_threads, post_id, viewer_id, limit, cursor, replies
+    )
 
-    return schemas.CommentListResponse(items=items, next_cursor=next_cursor)
+
+def _list_comment_threads(
+    db: Session,
+    post_id: int,
+    viewer_id: int | None,
+    limit: int,
+    cursor: str | None,
+    replies: int,
+):
+    keyset = decode_comment_cursor(cursor) if cursor else None
+    if db.get(models.Post, post_id) is None:
+        exceptions.raise_not_found_exception("Post not found")
+    items, next_cursor = fetch_comment_threads(
+        db, post_id, viewer_id, keyset, limit, replies
+    )
+    return schemas.CommentThreadListResponse(items=items, next_cursor=next_cursor)
 
 
 @router.get(
     "/comments/{comment_id}/replies", response_model=schemas.CommentListResponse
 )
-def list_replies(
+async def list_replies(
     comment_id: int,
-    db: db_dependency,
-    current_user: models.User | None = Depends(auth.get_current_user_optional),
+    db: async_db_dependency,
+    current_user: auth.Principal | None = Depends(auth.get_principal_optional),
     limit: int = Query(20, ge=1, le=100),
     cursor: str | None = Query(None),
+):
+    return await db.run_sync(_list_replies, comment_id, current_user, limit, cursor)
+
+
+def _list_replies(
+    db: Session,
+    comment_id: int,
+    current_user: auth.Principal | None,
+    limit: int,
+    cursor: str | None,
 ):
     parent = db.query(models.Comment).filter(models.Comment.id == comment_id).first()
     if not parent:
@@ -355,108 +293,18 @@ def list_replies(
             "Replies can only be listed for top-level comments"
         )
 
-    reply_user = aliased(models.User)
-    if current_user is not None:
-        base_q = (
-            db.query(
-                models.Comment,
-                models.User,
-                reply_user,
-                models.CommentLike.user_id.label("liked_user_id"),
-            )
-            .join(models.User, models.Comment.user_id == models.User.id)
-            .outerjoin(reply_user, models.Comment.reply_to_user_id == reply_user.id)
-            .outerjoin(
-                models.CommentLike,
-                and_(
-                    models.CommentLike.comment_id == models.Comment.id,
-                    models.CommentLike.user_id == current_user.id,
-                ),
-            )
-            .filter(models.Comment.parent_id == comment_id)
-        )
-    else:
-        base_q = (
-            db.query(
-                models.Comment,
-                models.User,
-                reply_user,
-                literal(None).label("liked_user_id"),
-            )
-            .join(models.User, models.Comment.user_id == models.User.id)
-            .outerjoin(reply_user, models.Comment.reply_to_user_id == reply_user.id)
-            .filter(models.Comment.parent_id == comment_id)
-        )
-
-    if cursor:
-        c_like, c_created, c_id = decode_comment_cursor(cursor)
-        base_q = base_q.filter(
-            or_(
-                models.Comment.like_count < c_like,
-                and_(
-                    models.Comment.like_count == c_like,
-                    models.Comment.created_at > c_created,
-                ),
-                and_(
-                    models.Comment.like_count == c_like,
-                    models.Comment.created_at == c_created,
-                    models.Comment.id > c_id,
-                ),
-            )
-        )
-
-    rows = (
-        base_q.order_by(
-            models.Comment.like_count.desc(),
-            models.Comment.created_at.asc(),
-            models.Comment.id.asc(),
-        )
-        .limit(limit + 1)
-        .all()
+    keyset = decode_comment_cursor(cursor) if cursor else None
+    rows = fetch_comment_page(
+        db,
+        current_user.id if current_user else None,
+        keyset,
+        limit,
+        models.Comment.parent_id == comment_id,
+    )
+    next_cursor = comment_cursor_after(rows[limit - 1]) if len(rows) > limit else None
+    return schemas.CommentListResponse(
+        items=[comment_from_row(row) for row in rows[:limit]], next_cursor=next_cursor
     )
-
-    items: list[schemas.CommentResponse] = []
-    for comment, user, reply_to_user, liked_user_id in rows[:limit]:
-        items.append(
-            schemas.CommentResponse(
-                id=comment.id,
-                post_id=comment.post_id,
-                user=schemas.UserPreview(
-                    id=user.id,
-                    username=user.username,
-                    avatar_url=user.avatar_media.public_url
-                    if user.avatar_media
-                    else None,
-                    bio=user.bio,
-                ),
-                parent_id=comment.parent_id,
-                reply_to_comment_id=comment.reply_to_comment_id,
-                reply_to_user=(
-                    schemas.UserPreview(
-                        id=reply_to_user.id,
-                        username=reply_to_user.username,
-                        avatar_url=reply_to_user.avatar_media.public_url
-                        if reply_to_user.avatar_media
-                        else None,
-                        bio=reply_to_user.bio,
-                    )
-                    if reply_to_user
-                    else None
-                ),
-                content=comment.content,
-                like_count=comment.like_count,
-                is_liked=liked_user_id is not None,
-                created_at=comment.created_at,
-                updated_at=comment.updated_at,
-            )
-        )
-
-    next_cursor = None
-    if len(rows) > limit:
-        last = rows[limit - 1][0]
-        next_cursor = encode_comment_cursor(last.like_count, last.created_at, last.id)
-
-    return schemas.CommentListResponse(items=items, next_cursor=next_cursor)
 
 
 @router.post("/comments/{comment_id}/like", status_code=204)
@@ -465,9 +313,10 @@ def like_comment(
     request: Request,
     comment_id: int,
     db: db_dependency,
-    current_user: models.User = Depends(auth.get_current_user),
+    current_user: auth.Principal = Depends(auth.get_principal),
 ):
-    _get_comment_or_404(db, comment_id)
+    comment = _get_comment_or_404(db, comment_id)
+    post_id = comment.post_id
 
     insert_stmt = (
         insert(models.CommentLike)
@@ -477,13 +326,13 @@ def like_comment(
     )
     inserted_user_id = db.execute(insert_stmt).scalar_one_or_none()
 
-    if inserted_user_id is not None:
-        db.query(models.Comment).filter(models.Comment.id == comment_id).update(
-            {models.Comment.like_count: models.Comment.like_count + 1},
-            synchronize_session=False,
-        )
+    post_changed = inserted_user_id is not None and apply_comment_like_change(
+        db, comment, current_user.id, 1
+    )
 
     db.commit()
+    if post_changed:
+        public_feed_cache.invalidate_posts([post_id])
 
     return
 
@@ -494,9 +343,10 @@ def unlike_comment(
     request: Request,
     comment_id: int,
     db: db_dependency,
-    current_user: models.User = Depends(auth.get_current_user),
+    current_user: auth.Principal = Depends(auth.get_principal),
 ):
-    _get_comment_or_404(db, comment_id)
+    comment = _get_comment_or_404(db, comment_id)
+    post_id = comment.post_id
 
     deleted = (
         db.query(models.CommentLike)
@@ -504,15 +354,13 @@ def unlike_comment(
         .delete(synchronize_session=False)
     )
 
-    if deleted:
-        db.query(models.Comment).filter(
-            models.Comment.id == comment_id, models.Comment.like_count > 0
-        ).update(
-            {models.Comment.like_count: models.Comment.like_count - 1},
-            synchronize_session=False,
-        )
+    post_changed = bool(deleted) and apply_comment_like_change(
+        db, comment, current_user.id, -1
+    )
 
     db.commit()
+    if post_changed:
+        public_feed_cache.invalidate_posts([post_id])
     return
 
 
@@ -522,15 +370,16 @@ def delete_comment(
     request: Request,
     comment_id: int,
     db: db_dependency,
-    current_user: models.User = Depends(auth.get_current_user),
+    current_user: auth.Principal = Depends(auth.get_principal),
 ):
     comment = _get_comment_or_404(db, comment_id)
 
     is_owner = comment.user_id == current_user.id
-    is_admin = getattr(current_user, "is_admin", False)
-    if not (is_owner or is_admin):
+    if not (is_owner or auth.has_admin_rights(db, current_user)):
         exceptions.raise_forbidden_exception("Not authorized to delete this comment")
 
-    db.delete(comment)
+    post_id = comment.post_id
+    delete_comment_row(db, comment.id, post_id, comment.parent_id)
     db.commit()
+    public_feed_cache.invalidate_posts([post_id])
     return
@@ -62,7 +62,7 @@ def presign_media(
     request: Request,
     payload: schemas.MediaPresignRequest,
     db: db_dependency,
-    current_user: models.User = Depends(auth.get_current_user),
+    current_user: auth.Principal = Depends(auth.get_principal),
 ):
     _require_s3_config()
 
@@ -110,7 +110,7 @@ def complete_media(
     request: Request,
     media_id: int,
     db: db_dependency,
-    current_user: models.User = Depends(auth.get_current_user),
+    current_user: auth.Principal = Depends(auth.get_principal),
 ):
     _require_s3_config()
 
@@ -1,13 +1,27 @@
-from typing import Annotated, List, Literal
+from datetime import datetime
+from typing import Annotated, List, Literal, Union
 
-from fastapi import APIRouter, Depends, Query, Request
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from .. import auth, exceptions, models, schemas
-from ..database import get_db
+from .. import auth, exceptions, models, schemas, settings
+from ..database import get_async_db, get_db
+from ..etag import etag_matches, not_modified, set_etag, weak_etag
+from ..feed_cursor import decode_feed_cursor, encode_feed_cursor
 from ..rate_limit import limiter
-from ..services.feed_query import apply_feed_view_filter, build_posts_with_counts_query
-from ..services.post_mapper import to_post_with_counts
+from ..services.feed_cache import public_feed_cache
+from ..services.feed_hydration import (
+    apply_viewer_state,
+    flags_validator,
+    hydrate_posts,
+    load_page_validators,
+    load_shared_posts,
+)
+from ..services.feed_query import build_feed_page_query
+from ..services.feed_inbox import fan_out_post
+from ..services.user_stats import bump_user_stats
 from ..services.post_write_service import (
     get_owned_post_or_404,
     get_post_or_404,
@@ -22,6 +36,7 @@ router = APIRouter(
 )
 
 db_dependency = Annotated[Session, Depends(get_db)]
+async_db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
 
 
 @router.get("/", response_model=List[schemas.Post])
@@ -42,7 +57,7 @@ def create_new_post(
     request: Request,
     post: schemas.PostCreate,
     db: db_dependency,
-    current_user: models.User = Depends(auth.get_current_user),
+    current_user: auth.Principal = Depends(auth.get_principal),
 ):
     content = normalize_post_content(post.content)
 
@@ -55,7 +70,11 @@ def create_new_post(
         media_id=media_id,
     )
     db.add(db_post)
+    db.flush()
+    fan_out_post(db, db_post)
+    bump_user_stats(db, current_user.id, posts=1)
     db.commit()
+    public_feed_cache.invalidate_feed_shift()
     db.refresh(db_post)
     return db_post
 
@@ -66,14 +85,16 @@ def delete_existing_post(
     request: Request,
     post_id: int,
     db: db_dependency,
-    current_user: models.User = Depends(auth.get_current_user),
+    current_user: auth.Principal = Depends(auth.get_principal),
 ):
     post = get_post_or_404(db, post_id)
-    if post.owner_id != current_user.id and not current_user.is_admin:
+    if post.owner_id != current_user.id and not auth.has_admin_rights(db, current_user):
         exceptions.raise_forbidden_exception("Not authorized to delete this post")
 
+    bump_user_stats(db, post.owner_id, posts=-1)
     db.delete(post)
     db.commit()
+    public_feed_cache.invalidate_feed_shift([post_id])
     return
 
 
@@ -84,7 +105,7 @@ def update_post(
     post_id: int,
     post_update: schemas.PostUpdate,
     db: db_dependency,
-    current_user: models.User = Depends(auth.get_current_user),
+    current_user: auth.Principal = Depends(auth.get_principal),
 ):
     content = normalize_post_content(post_update.content)
 
@@ -93,8 +114,10 @@ def update_post(
     validate_post_edit_window(post)
 
     post.content = content
+    post.version = models.Post.version + 1
     db.add(post)
     db.commit()
+    public_feed_cache.invalidate_posts([post_id])
     return post
 
 
@@ -104,21 +127,28 @@ def like_post(
     request: Request,
     post_id: int,
     db: db_dependency,
-    current_user: models.User = Depends(auth.get_current_user),
+    current_user: auth.Principal = Depends(auth.get_principal),
 ):
     get_post_or_404(db, post_id)
 
-    like = (
-        db.query(models.Like)
-        .filter_by(user_id=current_user.id, post_id=post_id)
-        .first()
+    insert_stmt = (
+        insert(models.Like)
+        .values(user_id=current_user.id, post_id=post_id)
+        .on_conflict_do_nothing(index_elements=["user_id", "post_id"])
+        .returning(models.Like.user_id)
     )
-    if like:
+    if db.execute(insert_stmt).scalar_one_or_none() is None:
         exceptions.raise_conflict_exception("Already liked")
 
-    new_like = models.Like(user_id=current_user.id, post_id=post_id)
-    db.add(new_like)
+    db.query(models.Post).filter(models.Post.id == post_id).update(
+        {
+            models.Post.likes_count: models.Post.likes_count + 1,
+            models.Post.version: models.Post.version + 1,
+        },
+        synchronize_session=False,
+    )
     db.commit()
+    public_feed_cache.invalidate_posts([post_id])
     return
 
 
@@ -128,18 +158,27 @@ def unlike_post(
     request: Request,
     post_id: int,
     db: db_dependency,
-    current_user: models.User = Depends(auth.get_current_user),
+    current_user: auth.Principal = Depends(auth.get_principal),
 ):
-    like = (
+    deleted = (
         db.query(models.Like)
         .filter_by(user_id=current_user.id, post_id=post_id)
-        .first()
+        .delete(synchronize_session=False)
     )
-    if not like:
+    if not deleted:
         exceptions.raise_conflict_exception("Not liked yet")
 
-    db.delete(like)
+    db.query(models.Post).filter(
+        models.Post.id == post_id, models.Post.likes_count > 0
+    ).update(
+        {
+            models.Post.likes_count: models.Post.likes_count - 1,
+            models.Post.version: models.Post.version + 1,
+        },
+        synchronize_session=False,
+    )
     db.commit()
+    public_feed_cache.invalidate_posts([post_id])
     return
 
 
@@ -149,21 +188,28 @@ def retweet_post(
     request: Request,
     post_id: int,
     db: db_dependency,
-    current_user: models.User = Depends(auth.get_current_user),
+    current_user: auth.Principal = Depends(auth.get_principal),
 ):
     get_post_or_404(db, post_id)
 
-    retweet = (
-        db.query(models.Retweet)
-        .filter_by(user_id=current_user.id, post_id=post_id)
-        .first()
+    insert_stmt = (
+        insert(models.Retweet)
+        .values(user_id=current_user.id, post_id=post_id)
+        .on_conflict_do_nothing(index_elements=["user_id", "post_id"])
+        .returning(models.Retweet.user_id)
     )
-    if retweet:
+    if db.execute(insert_stmt).scalar_one_or_none() is None:
         exceptions.raise_conflict_exception("Already retweeted")
 
-    new_retweet = models.Retweet(user_id=current_user.id, post_id=post_id)
-    db.add(new_retweet)
+    db.query(models.Post).filter(models.Post.id == post_id).update(
+        {
+            models.Post.retweets_count: models.Post.retweets_count + 1,
+            models.Post.version: models.Post.version + 1,
+        },
+        synchronize_session=False,
+    )
     db.commit()
+    public_feed_cache.invalidate_posts([post_id])
     return
 
 
@@ -173,18 +219,27 @@ def unretweet_post(
     request: Request,
     post_id: int,
     db: db_dependency,
-    current_user: models.User = Depends(auth.get_current_user),
+    current_user: auth.Principal = Depends(auth.get_principal),
 ):
-    retweet = (
+    deleted = (
         db.query(models.Retweet)
         .filter_by(user_id=current_user.id, post_id=post_id)
-        .first()
+        .delete(synchronize_session=False)
     )
-    if not retweet:
+    if not deleted:
         exceptions.raise_conflict_exception("Not retweeted yet")
 
-    db.delete(retweet)
+    db.query(models.Post).filter(
+        models.Post.id == post_id, models.Post.retweets_count > 0
+    ).update(
+        {
+            models.Post.retweets_count: models.Post.retweets_count - 1,
+            models.Post.version: models.Post.version + 1,
+        },
+        synchronize_session=False,
+    )
     db.commit()
+    public_feed_cache.invalidate_posts([post_id])
     return
 
 
@@ -193,43 +248,133 @@ def unretweet_post(
     response_model=schemas.PostWithCounts,
     summary="Post detail with reaction counts",
 )
-def read_post_with_counts(
+async def read_post_with_counts(
     post_id: int,
-    db: db_dependency,
-    current_user: models.User = Depends(auth.get_current_user),
+    db: async_db_dependency,
+    current_user: auth.Principal = Depends(auth.get_principal),
 ):
-    row = (
-        build_posts_with_counts_query(db, current_user)
-        .filter(models.Post.id == post_id)
-        .first()
-    )
-    if row is None:
+    items = await db.run_sync(hydrate_posts, [post_id], current_user.id)
+    if not items:
         exceptions.raise_not_found_exception("Post not found")
-    return to_post_with_counts(row)
+    return items[0]
 
 
 @router.get(
     "/with_counts/",
-    response_model=List[schemas.PostWithCounts],
+    response_model=Union[
+        List[schemas.PostWithCounts], schemas.PostWithCountsListResponse
+    ],
     summary="Feed with reaction counts",
-    description="Returns posts ordered by newest first, including owner username and like/retweet counts.",
-    responses={200: {"description": "List of posts with counts"}},
+    description=(
+        "Returns posts ordered by newest first, including owner username and "
+        "like/retweet counts. Pass `cursor` (empty for the first page) to get "
+        "`{items, next_cursor}` keyset pages; without it the endpoint keeps the "
+        "legacy `skip`/`limit` list response."
+    ),
+    responses={
+        200: {"description": "List of posts with counts"},
+        304: {"description": "Page unchanged since the `If-None-Match` ETag"},
+    },
 )
-def read_posts_with_counts(
-    db: db_dependency,
-    current_user: models.User = Depends(auth.get_current_user),
+async def read_posts_with_counts(
+    request: Request,
+    response: Response,
+    db: async_db_dependency,
+    current_user: auth.Principal = Depends(auth.get_principal),
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
     view: Literal["public", "subscriptions"] = Query("public"),
+    cursor: str | None = Query(None),
 ):
-    query = build_posts_with_counts_query(db, current_user)
-    query = apply_feed_view_filter(query, db, current_user, view)
-
-    posts = (
-        query.order_by(models.Post.timestamp.desc(), models.Post.id.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
+    return await db.run_sync(
+        _read_posts_with_counts,
+        request,
+        response,
+        current_user,
+        skip,
+        limit,
+        view,
+        cursor,
     )
 
-    return [to_post_with_counts(row) for row in posts]
+
+def _read_posts_with_counts(
+    db: Session,
+    request: Request,
+    response: Response,
+    current_user: auth.Principal,
+    skip: int,
+    limit: int,
+    view: str,
+    cursor: str | None,
+):
+    keyset = decode_feed_cursor(cursor) if cursor else None
+
+    # The public view is viewer-independent up to the flags overlay, so its
+    # page rows and shared post data are served from ``public_feed_cache``.
+    cacheable = view == "public" and settings.FEED_CACHE_ENABLED
+    cache_key = ("offset", skip, limit) if cursor is None else ("cursor", cursor, limit)
+    cached = public_feed_cache.get(cache_key) if cacheable else None
+    if cached is not None:
+        page, cached_validators, posts = cached
+    else:
+        page = _query_feed_page(db, current_user, view, skip, limit, keyset, cursor)
+        cached_validators, posts = None, None
+
+    post_ids = [post_id for post_id, _ in page[:limit]]
+    # The only query on a cache hit; the viewer's flags are needed anyway.
+    post_validators, flags = load_page_validators(db, post_ids, current_user.id)
+    if post_validators != cached_validators:
+        # Not cached yet, or changed by another worker since it was cached.
+        posts = None
+
+    next_cursor = None
+    if cursor is not None and len(page) > limit:
+        last_id, last_timestamp = page[limit - 1]
+        next_cursor = encode_feed_cursor(last_timestamp, last_id)
+
+    etag = weak_etag(
+        view, cursor is None, next_cursor, post_validators, flags_validator(flags)
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    if posts is None:
+        posts = load_shared_posts(db, post_ids)
+        if cacheable:
+            public_feed_cache.put(
+                cache_key,
+                (page, post_validators, posts),
+                post_ids=[post_id for post_id, _ in page],
+                size=sum(len(post.model_dump_json()) for post in posts)
+                + 64 * len(page),
+                shifts_with_feed=not cursor,
+            )
+
+    items = apply_viewer_state(db, posts, current_user.id, flags)
+    set_etag(response, etag)
+    if cursor is None:
+        return items
+    return schemas.PostWithCountsListResponse(items=items, next_cursor=next_cursor)
+
+
+def _query_feed_page(
+    db: Session,
+    current_user: auth.Principal,
+    view: str,
+    skip: int,
+    limit: int,
+    keyset: tuple[datetime, int] | None,
+    cursor: str | None,
+) -> list[tuple[int, datetime]]:
+    """Return the page's ``(id, timestamp)`` rows.
+
+    Cursor pages fetch one extra row to tell whether there is a next page.
+    """
+    if cursor is None:
+        query = build_feed_page_query(db, current_user, view, skip + limit)
+        rows = query.offset(skip).limit(limit).all()
+    else:
+        query = build_feed_page_query(db, current_user, view, limit + 1, keyset)
+        rows = query.limit(limit + 1).all()
+    return [(post_id, timestamp) for post_id, timestamp in rows]
@@ -1,19 +1,36 @@
-from fastapi import APIRouter, Depends, Query, Request
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import exists, func
 
-from typing import Annotated, List
+from typing import Annotated, List, Literal, Union
 
 from .. import models, schemas, auth
 from ..rate_limit import limiter
-from ..database import get_db
+from ..database import get_async_db, get_db
+from ..etag import etag_matches, not_modified, set_etag, weak_etag
 from ..exceptions import (
     raise_not_found_exception,
     raise_bad_request_exception,
     raise_conflict_exception,
     raise_forbidden_exception,
 )
-from ..queries.timeline import fetch_user_timeline
+from ..follow_cursor import decode_follow_cursor, encode_follow_cursor
+from ..queries.follows import fetch_follow_page
+from ..queries.mutuals import count_mutuals, fetch_mutuals_preview
+from ..queries.profiles import (
+    MAX_BATCH_PROFILES,
+    fetch_profile_validator,
+    fetch_profiles,
+)
+from ..queries.timeline import build_timeline_items, fetch_user_timeline_page
+from ..services.feed_hydration import flags_validator, load_page_validators
+from ..timeline_cursor import decode_timeline_cursor, encode_timeline_cursor
+from ..services.feed_cache import public_feed_cache
+from ..services.follows import add_follows, remove_follow
+from ..services.post_write_service import touch_user_posts
+
+MAX_TIMELINE_CURSOR_LIMIT = 100
 
 router = APIRouter(
     prefix="/users",
@@ -21,6 +38,7 @@ router = APIRouter(
 )
 
 db_dependency = Annotated[Session, Depends(get_db)]
+async_db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
 
 
 @router.get("/me", response_model=schemas.User)
@@ -45,136 +63,298 @@ def read_me(current_user: models.User = Depends(auth.get_current_user)):
     )
 
 
+def _batch_keys(raw: str) -> list[str]:
+    keys = [key.strip() for key in raw.split(",") if key.strip()]
+    if len(keys) > MAX_BATCH_PROFILES:
+        raise_bad_request_exception(
+            f"At most {MAX_BATCH_PROFILES} users can be requested at once"
+        )
+    return keys
+
+
+def _batch_ids(raw: str) -> list[int]:
+    try:
+        return [int(key) for key in _batch_keys(raw)]
+    except ValueError:
+        raise_bad_request_exception("ids must be integers")
+
+
+@router.get("", response_model=List[schemas.UserProfile])
+async def get_user_profiles(
+    db: async_db_dependency,
+    usernames: str | None = Query(None, description="Comma-separated usernames"),
+    ids: str | None = Query(None, description="Comma-separated user ids"),
+    current_user: auth.Principal | None = Depends(auth.get_principal_optional),
+):
+    if (usernames is None) == (ids is None):
+        raise_bad_request_exception("Pass exactly one of usernames or ids")
+    keys = _batch_ids(ids) if ids is not None else _batch_keys(usernames)
+    return await db.run_sync(_get_user_profiles, keys, ids is not None, current_user)
+
+
+def _get_user_profiles(
+    db: Session,
+    keys: list[str] | list[int],
+    by_id: bool,
+    current_user: auth.Principal | None,
+):
+    if not keys:
+        return []
+    column = models.User.id if by_id else models.User.username
+    viewer_id = current_user.id if current_user else None
+    profiles = fetch_profiles(db, viewer_id, column.in_(keys))
+    # Unknown users are left out; the rest keep the order they were asked for.
+    by_key = {
+        (profile.id if by_id else profile.username): profile for profile in profiles
+    }
+    return [by_key[key] for key in dict.fromkeys(keys) if key in by_key]
+
+
 @router.get("/{username}", response_model=schemas.UserProfile)
-def get_user_profile(
+async def get_user_profile(
+    request: Request,
+    response: Response,
     username: str,
-    db: db_dependency,
-    current_user: models.User | None = Depends(auth.get_current_user_optional),
+    db: async_db_dependency,
+    current_user: auth.Principal | None = Depends(auth.get_principal_optional),
+):
+    return await db.run_sync(
+        _get_user_profile, request, response, username, current_user
+    )
+
+
+def _get_user_profile(
+    db: Session,
+    request: Request,
+    response: Response,
+    username: str,
+    current_user: auth.Principal | None,
 ):
+    viewer_id = current_user.id if current_user else None
+    validator = fetch_profile_validator(db, viewer_id, username)
+    if validator is None:
+        raise_not_found_exception("User not found")
+
+    etag = weak_etag(*validator)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    return fetch_profiles(db, viewer_id, models.User.id == validator.id)[0]
+
+
+@router.get(
+    "/{username}/timeline",
+    response_model=Union[List[schemas.TimelineItem], schemas.TimelinePage],
+    description=(
+        "Posts and reposts, newest first. Pass `cursor` (empty for the first "
+        "page) to get `{items, next_cursor}` keyset pages; without it the "
+        "endpoint keeps the legacy `skip`/`limit` list response."
+    ),
+)
+async def get_user_timeline(
+    request: Request,
+    response: Response,
+    username: str,
+    db: async_db_dependency,
+    current_user: auth.Principal | None = Depends(auth.get_principal_optional),
+    # Offset pages keep their original, unchecked skip/limit for old clients.
+    skip: int = 0,
+    limit: int = 10,
+    cursor: str | None = Query(None),
+):
+    if cursor is not None and not 1 <= limit <= MAX_TIMELINE_CURSOR_LIMIT:
+        raise_bad_request_exception(
+            f"limit must be between 1 and {MAX_TIMELINE_CURSOR_LIMIT} with a cursor"
+        )
+    viewer_id = current_user.id if current_user else 0
+    return await db.run_sync(
+        _get_user_timeline,
+        request,
+        response,
+        username,
+        viewer_id,
+        skip,
+        limit,
+        cursor,
+    )
+
+
+def _get_user_timeline(
+    db: Session,
+    request: Request,
+    response: Response,
+    username: str,
+    viewer_id: int,
+    skip: int,
+    limit: int,
+    cursor: str | None,
+):
+    keyset = decode_timeline_cursor(cursor) if cursor else None
+
     user = db.query(models.User).filter(models.User.username == username).first()
     if not user:
         raise_not_found_exception("User not found")
 
-    followers_count = (
-        db.query(func.count())
-        .select_from(models.Follow)
-        .filter(models.Follow.c.followee_id == user.id)
-        .scalar()
+    if cursor is None:
+        rows = fetch_user_timeline_page(db, user.id, skip, limit)
+    else:
+        rows = fetch_user_timeline_page(db, user.id, 0, limit + 1, keyset)
+    page = rows[:limit]
+
+    post_validators, flags = load_page_validators(
+        db, [row.post_id for row in page], viewer_id
     )
 
-    following_count = (
-        db.query(func.count())
-        .select_from(models.Follow)
-        .filter(models.Follow.c.follower_id == user.id)
-        .scalar()
+    next_cursor = None
+    if cursor is not None and len(rows) > limit:
+        last = page[-1]
+        next_cursor = encode_timeline_cursor(
+            last.activity_at, last.item_type, last.post_id
+        )
+
+    etag = weak_etag(
+        cursor is None,
+        next_cursor,
+        [tuple(row) for row in page],
+        post_validators,
+        flags_validator(flags),
     )
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+
+    items = build_timeline_items(db, page, viewer_id, flags)
+    if cursor is None:
+        return items
+    return schemas.TimelinePage(items=items, next_cursor=next_cursor)
+
 
-    posts_count = (
-        db.query(func.count(models.Post.id))
-        .filter(models.Post.owner_id == user.id)
-        .scalar()
+@router.get("/{username}/followers", response_model=schemas.FollowListPage)
+async def get_followers(
+    username: str,
+    db: async_db_dependency,
+    current_user: auth.Principal | None = Depends(auth.get_principal_optional),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = Query(None),
+):
+    viewer_id = current_user.id if current_user else None
+    return await db.run_sync(
+        _get_follow_page, username, "followers", viewer_id, limit, cursor
     )
 
-    is_followed_by_viewer = False
-    if current_user and current_user.id != user.id:
-        is_followed_by_viewer = (
-            db.query(models.Follow)
-            .filter(
-                models.Follow.c.follower_id == current_user.id,
-                models.Follow.c.followee_id == user.id,
-            )
-            .first()
-            is not None
-        )
 
-    return schemas.UserProfile(
-        id=user.id,
-        username=user.username,
-        created_at=user.created_at,
-        followers_count=followers_count or 0,
-        following_count=following_count or 0,
-        posts_count=posts_count or 0,
-        is_followed_by_viewer=is_followed_by_viewer,
-        avatar_url=user.avatar_media.public_url if user.avatar_media else None,
-        cover_url=user.profile_cover_media.public_url
-        if user.profile_cover_media
-        else None,
-        bio=user.bio,
+@router.get("/{username}/following", response_model=schemas.FollowListPage)
+async def get_following(
+    username: str,
+    db: async_db_dependency,
+    current_user: auth.Principal | None = Depends(auth.get_principal_optional),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = Query(None),
+):
+    viewer_id = current_user.id if current_user else None
+    return await db.run_sync(
+        _get_follow_page, username, "following", viewer_id, limit, cursor
     )
 
 
-@router.get("/{username}/timeline", response_model=List[schemas.TimelineItem])
-def get_user_timeline(
+def _get_follow_page(
+    db: Session,
     username: str,
-    db: db_dependency,
-    current_user: models.User | None = Depends(auth.get_current_user_optional),
-    skip: int = 0,
-    limit: int = 10,
+    direction: Literal["followers", "following"],
+    viewer_id: int | None,
+    limit: int,
+    cursor: str | None,
 ):
-    user = db.query(models.User).filter(models.User.username == username).first()
-    if not user:
+    after_id = decode_follow_cursor(cursor) if cursor else None
+    user_id = db.query(models.User.id).filter(models.User.username == username).scalar()
+    if user_id is None:
         raise_not_found_exception("User not found")
 
-    viewer_id = current_user.id if current_user else 0
-    return fetch_user_timeline(db, user.id, viewer_id, skip, limit)
+    rows = fetch_follow_page(db, user_id, direction, viewer_id, after_id, limit + 1)
+    page = rows[:limit]
+    next_cursor = encode_follow_cursor(page[-1].id) if len(rows) > limit else None
+    return schemas.FollowListPage(items=page, next_cursor=next_cursor)
 
 
 @router.get(
     "/{username}/mutuals/preview",
     response_model=schemas.MutualsPreview,
 )
-def get_mutuals_preview(
+async def get_mutuals_preview(
     username: str,
-    db: db_dependency,
-    current_user: models.User = Depends(auth.get_current_user),
+    db: async_db_dependency,
+    current_user: auth.Principal = Depends(auth.get_principal),
     limit: int = Query(5, ge=1, le=5),
 ):
-    user = db.query(models.User).filter(models.User.username == username).first()
-    if not user:
-        raise_not_found_exception("User not found")
+    return await db.run_sync(_get_mutuals_preview, username, current_user.id, limit)
 
-    f1 = models.Follow.alias("f1")  # viewer -> mutual
-    f2 = models.Follow.alias("f2")  # mutual -> profile user
 
-    mutuals_base = (
-        db.query(models.User)
-        .join(f1, f1.c.followee_id == models.User.id)
-        .join(f2, f2.c.follower_id == models.User.id)
-        .filter(
-            f1.c.follower_id == current_user.id,
-            f2.c.followee_id == user.id,
-        )
-    )
-
-    mutual_count = (
-        mutuals_base.with_entities(func.count(func.distinct(models.User.id))).scalar()
-        or 0
-    )
+def _get_mutuals_preview(db: Session, username: str, viewer_id: int, limit: int):
+    user_id = db.query(models.User.id).filter(models.User.username == username).scalar()
+    if user_id is None:
+        raise_not_found_exception("User not found")
+    return fetch_mutuals_preview(db, viewer_id, user_id, limit)
 
-    mutuals = mutuals_base.order_by(models.User.id.asc()).limit(limit).all()
 
-    preview = [
-        schemas.UserPreview(
-            id=mutual.id,
-            username=mutual.username,
-            avatar_url=mutual.avatar_media.public_url if mutual.avatar_media else None,
-            bio=mutual.bio,
-        )
-        for mutual in mutuals
+@router.get("/mutuals/counts", response_model=List[schemas.MutualCount])
+async def get_mutual_counts(
+    db: async_db_dependency,
+    ids: str = Query(..., description="Comma-separated user ids"),
+    current_user: auth.Principal = Depends(auth.get_principal),
+):
+    target_ids = list(dict.fromkeys(_batch_ids(ids)))
+    counts = await db.run_sync(count_mutuals, current_user.id, target_ids)
+    return [
+        schemas.MutualCount(user_id=user_id, mutual_count=counts.get(user_id, 0))
+        for user_id in target_ids
     ]
 
-    return schemas.MutualsPreview(mutual_count=mutual_count, mutual_preview=preview)
-
 
 @router.get("/discover/suggestions", response_model=schemas.SuggestionsResponse)
-def get_suggestions(
-    db: db_dependency,
-    current_user: models.User = Depends(auth.get_current_user),
+async def get_suggestions(
+    db: async_db_dependency,
+    current_user: auth.Principal = Depends(auth.get_principal),
     limit: int = Query(5, ge=1, le=5),
 ):
+    return await db.run_sync(_get_suggestions, current_user.id, limit)
+
+
+def _get_suggestions(db: Session, viewer_id: int, limit: int):
+    avatar = aliased(models.Media)
+    already_followed = exists().where(
+        models.Follow.c.follower_id == viewer_id,
+        models.Follow.c.followee_id == models.UserSuggestion.candidate_id,
+    )
+    rows = (
+        db.query(
+            models.User.id, models.User.username, avatar.public_url, models.User.bio
+        )
+        .select_from(models.UserSuggestion)
+        .join(models.User, models.User.id == models.UserSuggestion.candidate_id)
+        .outerjoin(avatar, avatar.id == models.User.avatar_media_id)
+        .filter(models.UserSuggestion.user_id == viewer_id, ~already_followed)
+        .order_by(models.UserSuggestion.rank)
+        .limit(limit)
+        .all()
+    )
+    suggestions = [
+        schemas.UserPreview(id=user_id, username=username, avatar_url=url, bio=bio)
+        for user_id, username, url, bio in rows
+    ]
+    if len(suggestions) < limit:
+        # New users have no graph suggestions yet; top up by recent activity.
+        suggestions += _recent_suggestions(
+            db, viewer_id, limit - len(suggestions), {s.id for s in suggestions}
+        )
+    return schemas.SuggestionsResponse(suggestions=suggestions)
+
+
+def _recent_suggestions(
+    db: Session, viewer_id: int, limit: int, exclude_ids: set[int]
+) -> list[schemas.UserPreview]:
     followed_subq = (
         db.query(models.Follow.c.followee_id)
-        .filter(models.Follow.c.follower_id == current_user.id)
+        .filter(models.Follow.c.follower_id == viewer_id)
         .subquery()
     )
 
@@ -190,9 +370,11 @@ def get_suggestions(
     base_q = (
         db.query(models.User)
         .outerjoin(recent_authors_subq, recent_authors_subq.c.user_id == models.User.id)
-        .filter(models.User.id != current_user.id)
+        .filter(models.User.id != viewer_id)
         .filter(~models.User.id.in_(followed_subq))
     )
+    if exclude_ids:
+        base_q = base_q.filter(~models.User.id.in_(exclude_ids))
 
     recent = (
         base_q.order_by(
@@ -212,7 +394,7 @@ def get_suggestions(
             fallback_q = fallback_q.filter(~models.User.id.in_(picked_ids))
         recent += fallback_q.limit(limit - len(recent)).all()
 
-    suggestions = [
+    return [
         schemas.UserPreview(
             id=user.id,
             username=user.username,
@@ -221,7 +403,6 @@ def get_suggestions(
         )
         for user in recent
     ]
-    return schemas.SuggestionsResponse(suggestions=suggestions)
 
 
 # User Registration Endpoint
@@ -242,6 +423,8 @@ def create_user(
         username=user.username, email=user.email, hashed_password=hashed_password
     )
     db.add(new_user)
+    db.flush()
+    db.add(models.UserStats(user_id=new_user.id))
     db.commit()
     db.refresh(new_user)
     return schemas.User(
@@ -263,20 +446,30 @@ def follow_user(
     request: Request,
     user_id: int,
     db: db_dependency,
-    current_user: models.User = Depends(auth.get_current_user),
+    current_user: auth.Principal = Depends(auth.get_principal),
 ):
-    user_to_follow = db.query(models.User).filter(models.User.id == user_id).first()
-    if not user_to_follow:
-        raise_not_found_exception("User not found")
-    if user_to_follow == current_user:
+    if user_id == current_user.id:
         raise_bad_request_exception("Cannot follow yourself")
-    if user_to_follow in current_user.following:
+    if not add_follows(db, current_user.id, [user_id]):
+        _raise_not_found_if_missing(db, user_id)
         raise_bad_request_exception("Already following this user")
-    current_user.following.append(user_to_follow)
     db.commit()
     return
 
 
+@router.post("/me/following", response_model=schemas.BulkFollowResult)
+@limiter.limit("5/minute")
+def follow_many_users(
+    request: Request,
+    payload: schemas.BulkFollowRequest,
+    db: db_dependency,
+    current_user: auth.Principal = Depends(auth.get_principal),
+):
+    followed = add_follows(db, current_user.id, payload.user_ids)
+    db.commit()
+    return schemas.BulkFollowResult(followed=followed)
+
+
 # Unfollow User Endpoint
 @router.post("/{user_id}/unfollow", status_code=204)
 @limiter.limit("30/minute")
@@ -284,20 +477,22 @@ def unfollow_user(
     request: Request,
     user_id: int,
     db: db_dependency,
-    current_user: models.User = Depends(auth.get_current_user),
+    current_user: auth.Principal = Depends(auth.get_principal),
 ):
-    user_to_unfollow = db.query(models.User).filter(models.User.id == user_id).first()
-    if not user_to_unfollow:
-        raise_not_found_exception("User not found")
-    if user_to_unfollow == current_user:
+    if user_id == current_user.id:
         raise_bad_request_exception("Cannot unfollow yourself")
-    if user_to_unfollow not in current_user.following:
+    if not remove_follow(db, current_user.id, user_id):
+        _raise_not_found_if_missing(db, user_id)
         raise_bad_request_exception("Not following this user")
-    current_user.following.remove(user_to_unfollow)
     db.commit()
     return
 
 
+def _raise_not_found_if_missing(db: Session, user_id: int) -> None:
+    if db.get(models.User, user_id) is None:
+        raise_not_found_exception("User not found")
+
+
 @router.put("/me/avatar", response_model=schemas.User)
 @limiter.limit("5/minute")
 def update_avatar(
@@ -309,7 +504,9 @@ def update_avatar(
     if payload.media_id is None:
         current_user.avatar_media_id = None
         db.add(current_user)
+        post_ids = touch_user_posts(db, current_user.id)
         db.commit()
+        public_feed_cache.invalidate_posts(post_ids)
         db.refresh(current_user)
         cover_url = (
             current_user.profile_cover_media.public_url
@@ -339,7 +536,9 @@ def update_avatar(
 
     current_user.avatar_media_id = media.id
     db.add(current_user)
+    post_ids = touch_user_posts(db, current_user.id)
     db.commit()
+    public_feed_cache.invalidate_posts(post_ids)
     db.refresh(current_user)
 
     return schemas.User(
@@ -427,7 +626,9 @@ def update_profile(
         current_user.bio = trimmed if trimmed else None
 
     db.add(current_user)
+    post_ids = touch_user_posts(db, current_user.id)
     db.commit()
+    public_feed_cache.invalidate_posts(post_ids)
     db.refresh(current_user)
 
     return schemas.User(
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 from typing import Optional, Literal, List
 
@@ -60,11 +60,34 @@ class PostTopCommentPreview(BaseModel):
     user: UserPreview
 
 
+class FollowListUser(UserPreview):
+    is_followed_by_viewer: bool = False
+
+
+class FollowListPage(BaseModel):
+    items: List[FollowListUser]
+    next_cursor: Optional[str] = None
+
+
 class MutualsPreview(BaseModel):
     mutual_count: int
     mutual_preview: List[UserPreview]
 
 
+class MutualCount(BaseModel):
+    user_id: int
+    mutual_count: int
+
+
+class BulkFollowRequest(BaseModel):
+    user_ids: List[int] = Field(..., max_length=100)
+
+
+class BulkFollowResult(BaseModel):
+    # Only users followed by this request; unknown, self and existing are left out.
+    followed: List[int]
+
+
 class AvatarUpdate(BaseModel):
     media_id: Optional[int] = None
 
@@ -105,6 +128,7 @@ class Post(PostBase):
 class PostWithCounts(Post):
     likes_count: int
     retweets_count: int
+    comments_count: int = 0
     owner_username: str
     owner_avatar_url: Optional[str] = None
     is_liked: bool
@@ -114,6 +138,11 @@ class PostWithCounts(Post):
     top_comment_preview: Optional[PostTopCommentPreview] = None
 
 
+class PostWithCountsListResponse(BaseModel):
+    items: List[PostWithCounts]
+    next_cursor: Optional[str] = None
+
+
 class TimelineItem(BaseModel):
     type: Literal["posts", "retweets"]
     activity_at: datetime
@@ -121,6 +150,11 @@ class TimelineItem(BaseModel):
     reposted_at: Optional[datetime] = None
 
 
+class TimelinePage(BaseModel):
+    items: List[TimelineItem]
+    next_cursor: Optional[str] = None
+
+
 class PostUpdate(BaseModel):
     content: str
 
@@ -196,6 +230,7 @@ class CommentResponse(BaseModel):
     reply_to_user: Optional[UserPreview] = None
     content: str
     like_count: int
+    replies_count: int = 0
     is_liked: bool = False
     created_at: datetime
     updated_at: datetime
@@ -206,3 +241,14 @@ class CommentResponse(BaseModel):
 class CommentListResponse(BaseModel):
     items: List[CommentResponse]
     next_cursor: Optional[str] = None
+
+
+class CommentThread(CommentResponse):
+    replies: List[CommentResponse] = []
+    # Pass to GET /comments/{id}/replies for the rest of the thread.
+    replies_next_cursor: Optional[str] = None
+
+
+class CommentThreadListResponse(BaseModel):
+    items: List[CommentThread]
+    next_cursor: Optional[str] = None
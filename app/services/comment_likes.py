@@ -0,0 +1,142 @@
+"""Comment like counters, with a buffered path for hot comments.
+
+Below ``COMMENT_LIKE_BUFFER_THRESHOLD`` likes a like or unlike updates
+``comments.like_count`` directly. Above it, every like on a viral comment
+would queue on the same row lock and rewrite its entries in the comment sort
+indexes, so the change is added to one of ``COMMENT_LIKE_DELTA_SHARDS`` rows
+in ``comment_like_deltas`` instead, picked by the liker's id.
+
+:func:`fold_comment_like_deltas` moves pending deltas into ``like_count`` in
+one statement. The app runs it every ``COMMENT_LIKE_FOLD_INTERVAL_SECONDS``
+(:func:`fold_periodically`) and ``python -m app.maintenance
+fold-comment-likes`` runs it on demand. Comment responses add pending deltas
+to the stored count; ordering and the post's top comment use the stored
+count, so they trail by at most one fold.
+"""
+
+import asyncio
+import logging
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from .. import models, settings
+from ..database import SessionLocal
+from .feed_cache import public_feed_cache
+from .post_write_service import touch_post
+from .top_comment import refresh_top_comments
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary key for pg_try_advisory_xact_lock; one fold runs at a time.
+_FOLD_LOCK_KEY = 0x636C6B66
+
+
+def apply_comment_like_change(
+    db: Session, comment: models.Comment, user_id: int, delta: int
+) -> bool:
+    """Count a like (``delta=1``) or unlike (``delta=-1``) of ``comment``.
+
+    Returns True if the post was touched (its cached pages are stale), False
+    if the change was buffered. Neither path touches ``updated_at``: a like
+    is not an edit.
+    """
+    if comment.like_count < settings.COMMENT_LIKE_BUFFER_THRESHOLD:
+        db.query(models.Comment).filter(
+            models.Comment.id == comment.id,
+            models.Comment.like_count + delta >= 0,
+        ).update(
+            {
+                models.Comment.like_count: models.Comment.like_count + delta,
+                models.Comment.updated_at: models.Comment.updated_at,
+            },
+            synchronize_session=False,
+        )
+        if comment.parent_id is None:
+            refresh_top_comments(db, [comment.post_id])
+        touch_post(db, comment.post_id)
+        return True
+
+    stmt = insert(models.CommentLikeDelta).values(
+        comment_id=comment.id,
+        shard=user_id % settings.COMMENT_LIKE_DELTA_SHARDS,
+        delta=delta,
+    )
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["comment_id", "shard"],
+            set_={"delta": models.CommentLikeDelta.delta + stmt.excluded.delta},
+        )
+    )
+    return False
+
+
+def pending_likes(comment):
+    """Scalar subquery: deltas not yet folded into ``comment.like_count``."""
+    return (
+        select(func.coalesce(func.sum(models.CommentLikeDelta.delta), 0))
+        .where(models.CommentLikeDelta.comment_id == comment.id)
+        .scalar_subquery()
+    )
+
+
+def fold_comment_like_deltas(db: Session) -> list[int]:
+    """Fold pending deltas into ``like_count``; returns the affected post ids.
+
+    Returns an empty list without doing anything if another fold holds the
+    lock. The caller commits and invalidates cached pages for the posts.
+    """
+    if not db.execute(select(func.pg_try_advisory_xact_lock(_FOLD_LOCK_KEY))).scalar():
+        return []
+
+    folded = (
+        models.CommentLikeDelta.__table__.delete()
+        .returning(models.CommentLikeDelta.comment_id, models.CommentLikeDelta.delta)
+        .cte("folded")
+    )
+    totals = (
+        select(folded.c.comment_id, func.sum(folded.c.delta).label("total"))
+        .group_by(folded.c.comment_id)
+        .having(func.sum(folded.c.delta) != 0)
+        .cte("totals")
+    )
+    rows = db.execute(
+        update(models.Comment)
+        .where(models.Comment.id == totals.c.comment_id)
+        .values(
+            like_count=func.greatest(models.Comment.like_count + totals.c.total, 0),
+            updated_at=models.Comment.updated_at,
+        )
+        .returning(models.Comment.post_id, models.Comment.parent_id)
+        .execution_options(synchronize_session=False)
+    ).all()
+
+    post_ids = sorted({post_id for post_id, _ in rows})
+    refresh_top_comments(
+        db, [post_id for post_id, parent_id in rows if parent_id is None]
+    )
+    for post_id in post_ids:
+        touch_post(db, post_id)
+    return post_ids
+
+
+def fold_pending_comment_likes() -> int:
+    """Run one fold in its own session; returns the number of posts touched."""
+    db = SessionLocal()
+    try:
+        post_ids = fold_comment_like_deltas(db)
+        db.commit()
+    finally:
+        db.close()
+    public_feed_cache.invalidate_posts(post_ids)
+    return len(post_ids)
+
+
+async def fold_periodically(interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(fold_pending_comment_likes)
+        except Exception:
+            logger.exception("Folding comment like deltas failed")
@@ -0,0 +1,180 @@
+"""Comment writes in at most two statements.
+
+A create first runs :func:`load_reply_context`, one query that checks the post
+and fetches the parent and reply-target comments. It then runs
+:func:`insert_comment`, a single statement whose CTEs insert the row, bump
+the parent's ``replies_count`` or the post's top comment pointer, bump
+``posts.version``, and select the rendered comment with its author and
+reply-target previews. An edit is one statement on the success path.
+
+``posts.comments_count`` counts comments and replies; it is bumped by
+:func:`insert_comment` and reduced by :func:`delete_comment_row`, which also
+subtracts the replies removed by the cascade.
+"""
+
+from sqlalchemy import and_, delete, func, insert, select, update
+from sqlalchemy.orm import Session, aliased
+
+from .. import models, schemas
+from ..queries.comments import comment_from_row, comment_rows_select
+from .top_comment import refresh_top_comments
+
+
+def load_reply_context(
+    db: Session,
+    post_id: int,
+    parent_id: int | None,
+    reply_to_comment_id: int | None,
+):
+    """The post id plus parent/reply-target columns; ``None`` if the post is gone.
+
+    The parent must belong to the post and the target to the parent's thread;
+    otherwise their columns are null.
+    """
+    query = select(models.Post.id).where(models.Post.id == post_id)
+    if parent_id is not None:
+        parent = aliased(models.Comment)
+        query = query.outerjoin(
+            parent, and_(parent.id == parent_id, parent.post_id == models.Post.id)
+        ).add_columns(
+            parent.id.label("parent_id"),
+            parent.parent_id.label("parent_parent_id"),
+            parent.user_id.label("parent_user_id"),
+        )
+    if parent_id is not None and reply_to_comment_id is not None:
+        target = aliased(models.Comment)
+        query = query.outerjoin(
+            target,
+            and_(
+                target.id == reply_to_comment_id,
+                target.post_id == models.Post.id,
+                target.parent_id == parent_id,
+            ),
+        ).add_columns(
+            target.id.label("target_id"), target.user_id.label("target_user_id")
+        )
+    return db.execute(query).first()
+
+
+def insert_comment(
+    db: Session,
+    post_id: int,
+    user_id: int,
+    parent_id: int | None,
+    reply_to_comment_id: int | None,
+    reply_to_user_id: int | None,
+    content: str,
+) -> schemas.CommentResponse:
+    inserted = (
+        insert(models.Comment)
+        .values(
+            post_id=post_id,
+            user_id=user_id,
+            parent_id=parent_id,
+            reply_to_comment_id=reply_to_comment_id,
+            reply_to_user_id=reply_to_user_id,
+            content=content,
+        )
+        .returning(*models.Comment.__table__.c)
+        .cte("inserted")
+    )
+
+    post_values = {
+        "version": models.Post.version + 1,
+        "comments_count": models.Post.comments_count + 1,
+    }
+    if parent_id is None:
+        # A new comment ranks below every existing top-level comment (no
+        # likes, newest), so it only becomes the top comment of a post
+        # that had none.
+        post_values["top_comment_id"] = func.coalesce(
+            models.Post.top_comment_id, select(inserted.c.id).scalar_subquery()
+        )
+    side_effects = [
+        update(models.Post)
+        .where(models.Post.id == post_id)
+        .values(post_values)
+        .cte("touched_post")
+    ]
+    if parent_id is not None:
+        side_effects.append(
+            update(models.Comment)
+            .where(models.Comment.id == parent_id)
+            .values(
+                replies_count=models.Comment.replies_count + 1,
+                updated_at=models.Comment.updated_at,
+            )
+            .cte("bumped_parent")
+        )
+
+    row = db.execute(
+        comment_rows_select(inserted.c, user_id, from_clause=inserted).add_cte(
+            *side_effects
+        )
+    ).one()
+    return comment_from_row(row)
+
+
+def update_comment_content(
+    db: Session, comment_id: int, user_id: int, content: str
+) -> schemas.CommentResponse | None:
+    """Edit the caller's own comment; ``None`` if it is missing or not theirs."""
+    updated = (
+        update(models.Comment)
+        .where(models.Comment.id == comment_id, models.Comment.user_id == user_id)
+        .values(content=content)
+        .returning(*models.Comment.__table__.c)
+        .cte("updated")
+    )
+    touched_post = (
+        update(models.Post)
+        .where(models.Post.id.in_(select(updated.c.post_id)))
+        .values(version=models.Post.version + 1)
+        .cte("touched_post")
+    )
+    row = db.execute(
+        comment_rows_select(updated.c, user_id, from_clause=updated).add_cte(
+            touched_post
+        )
+    ).first()
+    return comment_from_row(row) if row is not None else None
+
+
+def delete_comment_row(
+    db: Session, comment_id: int, post_id: int, parent_id: int | None
+) -> None:
+    """Delete a comment; replies of a top-level comment go with it (FK cascade).
+
+    ``replies_count`` comes back from the ``DELETE`` itself, so replies added
+    while the row was locked are still subtracted from ``comments_count``.
+    """
+    replies_count = db.execute(
+        delete(models.Comment)
+        .where(models.Comment.id == comment_id)
+        .returning(models.Comment.replies_count)
+    ).scalar_one_or_none()
+    if replies_count is None:
+        return
+
+    if parent_id is None:
+        refresh_top_comments(db, [post_id])
+    else:
+        # A removed reply isn't an edit of the parent, so keep updated_at.
+        db.execute(
+            update(models.Comment)
+            .where(models.Comment.id == parent_id)
+            .values(
+                replies_count=models.Comment.replies_count - 1,
+                updated_at=models.Comment.updated_at,
+            )
+        )
+    db.execute(
+        update(models.Post)
+        .where(models.Post.id == post_id)
+        .values(
+            version=models.Post.version + 1,
+            comments_count=func.greatest(
+                models.Post.comments_count - 1 - replies_count, 0
+            ),
+        )
+    )
@@ -0,0 +1,133 @@
+"""Bounded in-process cache for the viewer-independent part of public feed pages.
+
+Entries are keyed by page position (offset or cursor plus limit), expire after
+``FEED_CACHE_TTL_SECONDS`` and are evicted least-recently-used once their
+estimated size exceeds ``FEED_CACHE_MAX_BYTES``. Writes invalidate the entries
+they affect. The cache is per process: a hit is checked against
+``posts.version`` (one narrow query that also reads the viewer's flags), so
+edits made through other workers are picked up at once, but page membership
+(posts created or deleted elsewhere) stays stale for up to the TTL.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, Iterable
+
+from .. import settings
+
+
+@dataclass
+class _Entry:
+    value: Any
+    post_ids: frozenset[int]
+    size: int
+    expires_at: float
+    # Offset pages and the first cursor page move when a post is inserted or
+    # removed anywhere above them; pages after a cursor do not.
+    shifts_with_feed: bool
+
+
+class FeedPageCache:
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= self._clock():
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.value
+
+    def put(
+        self,
+        key: Hashable,
+        value: Any,
+        post_ids: Iterable[int],
+        size: int,
+        shifts_with_feed: bool,
+    ) -> None:
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = _Entry(
+                value=value,
+                post_ids=frozenset(post_ids),
+                size=size,
+                expires_at=self._clock() + self.ttl_seconds,
+                shifts_with_feed=shifts_with_feed,
+            )
+            self._size += size
+            while self._size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def invalidate_posts(self, post_ids: Iterable[int]) -> None:
+        """Drop pages that contain any of ``post_ids`` (edits, reactions, comments)."""
+        ids = set(post_ids)
+        self._invalidate(lambda entry: not ids.isdisjoint(entry.post_ids))
+
+    def invalidate_feed_shift(self, post_ids: Iterable[int] = ()) -> None:
+        """Drop pages whose contents move when posts are created or deleted."""
+        ids = set(post_ids)
+        self._invalidate(
+            lambda entry: entry.shifts_with_feed or not ids.isdisjoint(entry.post_ids)
+        )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def _invalidate(self, predicate: Callable[[_Entry], bool]) -> None:
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if predicate(entry)]
+            for key in stale:
+                self._drop(key)
+            self.invalidations += len(stale)
+
+    def _drop(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        self._size -= entry.size
+
+
+public_feed_cache = FeedPageCache(
+    max_bytes=settings.FEED_CACHE_MAX_BYTES,
+    ttl_seconds=settings.FEED_CACHE_TTL_SECONDS,
+)
@@ -0,0 +1,265 @@
+"""Two-phase post hydration.
+
+Endpoints first select the page's post ids with a narrow, index-driven query,
+then hand them to :func:`hydrate_posts`, which fills in owners, media, counts,
+viewer flags and top comments with a fixed number of ``= ANY(:ids)`` queries.
+
+Hydration is split into a viewer-independent part (:func:`load_shared_posts`,
+safe to cache) and a per-request overlay (:func:`apply_viewer_state`).
+:func:`load_page_validators` reads the values ETags are built from in one
+narrow statement, so unchanged pages can be answered before hydrating.
+"""
+
+from typing import Sequence
+
+from sqlalchemy import Integer, any_, exists, literal, select, union_all
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session, aliased
+
+from .. import models, schemas
+from .post_mapper import PostWithCountsRow, to_post_with_counts
+
+
+def _any_id(ids: Sequence[int]):
+    # One array parameter keeps the statement text identical for every page size.
+    return any_(literal(list(ids), ARRAY(Integer)))
+
+
+def _fetch_posts(db: Session, post_ids: Sequence[int]):
+    avatar_media = aliased(models.Media)
+    return db.execute(
+        select(
+            models.Post,
+            models.User.username,
+            avatar_media.public_url,
+            models.Media.public_url,
+        )
+        .join(models.User, models.Post.owner_id == models.User.id)
+        .outerjoin(models.Media, models.Post.media_id == models.Media.id)
+        .outerjoin(avatar_media, models.User.avatar_media_id == avatar_media.id)
+        .where(models.Post.id == _any_id(post_ids))
+    ).all()
+
+
+def _fetch_top_comments(db: Session, comment_ids: Sequence[int]):
+    if not comment_ids:
+        return {}
+
+    avatar_media = aliased(models.Media)
+    rows = db.execute(
+        select(
+            models.Comment,
+            models.User.username,
+            avatar_media.public_url,
+            models.User.bio,
+        )
+        .join(models.User, models.Comment.user_id == models.User.id)
+        .outerjoin(avatar_media, models.User.avatar_media_id == avatar_media.id)
+        .where(models.Comment.id == _any_id(comment_ids))
+    ).all()
+    return {row[0].id: row for row in rows}
+
+
+def fetch_viewer_flags(
+    db: Session,
+    post_ids: Sequence[int],
+    top_comment_ids: Sequence[int],
+    viewer_id: int,
+) -> dict[str, set[int]]:
+    flags: dict[str, set[int]] = {
+        "like": set(),
+        "retweet": set(),
+        "bookmark": set(),
+        "comment_like": set(),
+    }
+    if not viewer_id or not post_ids:
+        return flags
+
+    rows = db.execute(
+        union_all(
+            select(models.Like.post_id, literal("like")).where(
+                models.Like.user_id == viewer_id,
+                models.Like.post_id == _any_id(post_ids),
+            ),
+            select(models.Retweet.post_id, literal("retweet")).where(
+                models.Retweet.user_id == viewer_id,
+                models.Retweet.post_id == _any_id(post_ids),
+            ),
+            select(models.Bookmark.post_id, literal("bookmark")).where(
+                models.Bookmark.user_id == viewer_id,
+                models.Bookmark.post_id == _any_id(post_ids),
+            ),
+            select(models.CommentLike.comment_id, literal("comment_like")).where(
+                models.CommentLike.user_id == viewer_id,
+                models.CommentLike.comment_id == _any_id(top_comment_ids),
+            ),
+        )
+    ).all()
+    for row_id, kind in rows:
+        flags[kind].add(row_id)
+    return flags
+
+
+def load_page_validators(
+    db: Session, post_ids: Sequence[int], viewer_id: int
+) -> tuple[tuple, dict[str, set[int]]]:
+    """Return ``(post_validators, viewer_flags)`` for a page in one statement.
+
+    ``posts.version`` is bumped by every write that changes how a post renders
+    (content, counters, top comment, the owner's or top commenter's avatar and
+    bio), so ``(id, version)`` per post stands in for the rendered post. The
+    viewer's flags are ``EXISTS`` probes on the reaction primary keys; both go
+    into the page's ETag (see :func:`flags_validator`) and the flags can be
+    passed on to :func:`apply_viewer_state` if the page is hydrated after all.
+    """
+    flags: dict[str, set[int]] = {
+        "like": set(),
+        "retweet": set(),
+        "bookmark": set(),
+        "comment_like": set(),
+    }
+    unique_ids = list(dict.fromkeys(post_ids))
+    if not unique_ids:
+        return (), flags
+
+    query = select(models.Post.id, models.Post.version, models.Post.top_comment_id)
+    if viewer_id:
+        query = query.add_columns(
+            exists()
+            .where(models.Like.user_id == viewer_id)
+            .where(models.Like.post_id == models.Post.id)
+            .label("like"),
+            exists()
+            .where(models.Retweet.user_id == viewer_id)
+            .where(models.Retweet.post_id == models.Post.id)
+            .label("retweet"),
+            exists()
+            .where(models.Bookmark.user_id == viewer_id)
+            .where(models.Bookmark.post_id == models.Post.id)
+            .label("bookmark"),
+            exists()
+            .where(models.CommentLike.user_id == viewer_id)
+            .where(models.CommentLike.comment_id == models.Post.top_comment_id)
+            .label("comment_like"),
+        )
+    rows = db.execute(query.where(models.Post.id == _any_id(unique_ids))).all()
+    by_id = {row.id: row for row in rows}
+
+    validators = []
+    for post_id in unique_ids:
+        row = by_id.get(post_id)
+        if row is None:
+            continue
+        validators.append((row.id, row.version))
+        if viewer_id:
+            for kind in ("like", "retweet", "bookmark"):
+                if getattr(row, kind):
+                    flags[kind].add(row.id)
+            if row.comment_like:
+                flags["comment_like"].add(row.top_comment_id)
+    return tuple(validators), flags
+
+
+def flags_validator(flags: dict[str, set[int]]) -> tuple:
+    return tuple((kind, tuple(sorted(ids))) for kind, ids in sorted(flags.items()))
+
+
+def load_shared_posts(
+    db: Session, post_ids: Sequence[int]
+) -> list[schemas.PostWithCounts]:
+    """Build the viewer-independent part of ``PostWithCounts`` for ``post_ids``.
+
+    Order is preserved and ids that no longer exist are skipped. Viewer flags
+    are left ``False``; :func:`apply_viewer_state` fills them in.
+    """
+    unique_ids = list(dict.fromkeys(post_ids))
+    if not unique_ids:
+        return []
+
+    posts = {row[0].id: row for row in _fetch_posts(db, unique_ids)}
+    top_comments = _fetch_top_comments(
+        db,
+        [row[0].top_comment_id for row in posts.values() if row[0].top_comment_id],
+    )
+
+    items: list[schemas.PostWithCounts] = []
+    for post_id in unique_ids:
+        if post_id not in posts:
+            continue
+        post, owner_username, owner_avatar_url, media_url = posts[post_id]
+        top = top_comments.get(post.top_comment_id)
+        comment, username, avatar_url, bio = top or (None,) * 4
+        items.append(
+            to_post_with_counts(
+                PostWithCountsRow(
+                    post=post,
+                    owner_username=owner_username,
+                    owner_avatar_url=owner_avatar_url,
+                    likes_count=post.likes_count,
+                    retweets_count=post.retweets_count,
+                    comments_count=post.comments_count,
+                    is_liked=False,
+                    is_retweeted=False,
+                    is_bookmarked=False,
+                    media_url=media_url,
+                    top_comment_id=comment.id if comment else None,
+                    top_comment_content=comment.content if comment else None,
+                    top_comment_like_count=comment.like_count if comment else None,
+                    top_comment_is_liked=False,
+                    top_comment_created_at=comment.created_at if comment else None,
+                    top_comment_user_id=comment.user_id if comment else None,
+                    top_comment_username=username,
+                    top_comment_user_avatar_url=avatar_url,
+                    top_comment_user_bio=bio,
+                )
+            )
+        )
+    return items
+
+
+def apply_viewer_state(
+    db: Session,
+    posts: Sequence[schemas.PostWithCounts],
+    viewer_id: int,
+    flags: dict[str, set[int]] | None = None,
+) -> list[schemas.PostWithCounts]:
+    """Overlay the viewer's like/retweet/bookmark flags on shared posts.
+
+    The input items are never mutated (they may live in the feed cache);
+    posts with viewer state are returned as copies. ``flags`` from an earlier
+    :func:`fetch_viewer_flags` call are reused instead of querying again.
+    """
+    if flags is None:
+        top_comment_ids = [
+            post.top_comment_preview.id for post in posts if post.top_comment_preview
+        ]
+        flags = fetch_viewer_flags(
+            db, [post.id for post in posts], top_comment_ids, viewer_id
+        )
+
+    items: list[schemas.PostWithCounts] = []
+    for post in posts:
+        update = {
+            "is_liked": post.id in flags["like"],
+            "is_retweeted": post.id in flags["retweet"],
+            "is_bookmarked": post.id in flags["bookmark"],
+        }
+        preview = post.top_comment_preview
+        if preview is not None and preview.id in flags["comment_like"]:
+            update["top_comment_preview"] = preview.model_copy(
+                update={"is_liked": True}
+            )
+        if any(update.values()):
+            post = post.model_copy(update=update)
+        items.append(post)
+    return items
+
+
+def hydrate_posts(
+    db: Session, post_ids: Sequence[int], viewer_id: int
+) -> list[schemas.PostWithCounts]:
+    """Build ``PostWithCounts`` items for ``post_ids``, preserving their order.
+
+    Ids that no longer exist are skipped. ``viewer_id`` of 0 means anonymous.
+    """
+    return apply_viewer_state(db, load_shared_posts(db, post_ids), viewer_id)
@@ -0,0 +1,97 @@
+from sqlalchemy import delete, func, literal, select, true
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from .. import models, settings
+
+_INBOX_COLUMNS = ["user_id", "post_id", "owner_id", "post_timestamp"]
+
+
+def _has_too_many_followers(db: Session, user_id: int) -> bool:
+    cutoff = settings.FEED_FANOUT_MAX_FOLLOWERS
+    # Count at most cutoff + 1 rows so the check stays cheap for huge accounts.
+    capped_followers = (
+        select(literal(1))
+        .select_from(models.Follow)
+        .where(models.Follow.c.followee_id == user_id)
+        .limit(cutoff + 1)
+        .subquery()
+    )
+    count = db.execute(select(func.count()).select_from(capped_followers)).scalar()
+    return count > cutoff
+
+
+def fan_out_post(db: Session, post: models.Post) -> None:
+    """Deliver a freshly flushed post to its author's and followers' inboxes.
+
+    Authors above FEED_FANOUT_MAX_FOLLOWERS only get their own inbox row; the
+    post stays ``fanned_out = False`` and is merged into followers' feeds at
+    read time.
+    """
+    db.execute(
+        insert(models.FeedInboxItem)
+        .from_select(
+            _INBOX_COLUMNS,
+            select(
+                models.Post.owner_id.label("user_id"),
+                models.Post.id,
+                models.Post.owner_id,
+                models.Post.timestamp,
+            ).where(models.Post.id == post.id),
+        )
+        .on_conflict_do_nothing()
+    )
+
+    if _has_too_many_followers(db, post.owner_id):
+        return
+
+    db.execute(
+        insert(models.FeedInboxItem)
+        .from_select(
+            _INBOX_COLUMNS,
+            select(
+                models.Follow.c.follower_id,
+                models.Post.id,
+                models.Post.owner_id,
+                models.Post.timestamp,
+            )
+            .join(models.Post, models.Post.owner_id == models.Follow.c.followee_id)
+            .where(models.Post.id == post.id),
+        )
+        .on_conflict_do_nothing()
+    )
+    post.fanned_out = True
+
+
+def backfill_inbox(db: Session, follower_id: int, followee_ids: list[int]) -> None:
+    """Copy each new followee's most recent fanned-out posts into the inbox."""
+    followees = (
+        select(models.User.id).where(models.User.id.in_(followee_ids)).subquery()
+    )
+    recent_posts = (
+        select(models.Post.id, models.Post.owner_id, models.Post.timestamp)
+        .where(models.Post.owner_id == followees.c.id, models.Post.fanned_out.is_(True))
+        .order_by(models.Post.timestamp.desc(), models.Post.id.desc())
+        .limit(settings.FEED_INBOX_BACKFILL_LIMIT)
+        .lateral()
+    )
+    rows = select(
+        literal(follower_id),
+        recent_posts.c.id,
+        recent_posts.c.owner_id,
+        recent_posts.c.timestamp,
+    ).select_from(followees.join(recent_posts, true()))
+    db.execute(
+        insert(models.FeedInboxItem)
+        .from_select(_INBOX_COLUMNS, rows)
+        .on_conflict_do_nothing()
+    )
+
+
+def prune_inbox(db: Session, follower_id: int, followee_id: int) -> None:
+    db.execute(
+        delete(models.FeedInboxItem).where(
+            models.FeedInboxItem.user_id == follower_id,
+            models.FeedInboxItem.owner_id == followee_id,
+        )
+    )
@@ -1,155 +1,99 @@
-from sqlalchemy import and_, func, or_, select
-from sqlalchemy.orm import Query, Session, aliased
+from datetime import datetime
 
-from .. import models
+from sqlalchemy import select, tuple_, union_all
+from sqlalchemy.orm import Query, Session
 
+from .. import auth, models
 
-def build_posts_with_counts_query(db: Session, current_user: models.User):
-    avatar_media = aliased(models.Media)
-    top_comment_user = aliased(models.User)
-    top_comment_avatar_media = aliased(models.Media)
-    top_comment_liked_by_me = aliased(models.CommentLike)
 
-    likes_subq = (
-        db.query(
-            models.Like.post_id, func.count(models.Like.user_id).label("likes_count")
-        )
-        .group_by(models.Like.post_id)
-        .subquery()
-    )
-
-    retweets_subq = (
-        db.query(
-            models.Retweet.post_id,
-            func.count(models.Retweet.user_id).label("retweets_count"),
-        )
-        .group_by(models.Retweet.post_id)
-        .subquery()
-    )
-
-    liked_by_me_subq = (
-        db.query(models.Like.post_id.label("post_id"))
-        .filter(models.Like.user_id == current_user.id)
-        .subquery()
-    )
+def _subscription_post_ids(
+    current_user: auth.Principal,
+    window: int,
+    keyset: tuple[datetime, int] | None,
+):
+    # Inbox rows are a range scan on (user_id, post_timestamp, post_id); posts
+    # from accounts that skipped fan-out come from the small partial index.
+    inbox_q = select(
+        models.FeedInboxItem.post_id.label("post_id"),
+        models.FeedInboxItem.post_timestamp.label("timestamp"),
+    ).where(models.FeedInboxItem.user_id == current_user.id)
 
-    retweeted_by_me_subq = (
-        db.query(models.Retweet.post_id.label("post_id"))
-        .filter(models.Retweet.user_id == current_user.id)
-        .subquery()
+    followee_ids = select(models.Follow.c.followee_id).where(
+        models.Follow.c.follower_id == current_user.id
     )
-
-    bookmarked_by_me_subq = (
-        db.query(models.Bookmark.post_id.label("post_id"))
-        .filter(models.Bookmark.user_id == current_user.id)
-        .subquery()
+    merged_q = select(
+        models.Post.id.label("post_id"),
+        models.Post.timestamp.label("timestamp"),
+    ).where(
+        models.Post.fanned_out.is_(False),
+        models.Post.owner_id.in_(followee_ids),
     )
 
-    ranked_top_comments_subq = (
-        db.query(
-            models.Comment.id.label("comment_id"),
-            models.Comment.post_id.label("post_id"),
-            models.Comment.user_id.label("comment_user_id"),
-            models.Comment.content.label("comment_content"),
-            models.Comment.like_count.label("comment_like_count"),
-            models.Comment.created_at.label("comment_created_at"),
-            func.row_number()
-            .over(
-                partition_by=models.Comment.post_id,
-                order_by=(
-                    models.Comment.like_count.desc(),
-                    models.Comment.created_at.asc(),
-                    models.Comment.id.asc(),
-                ),
-            )
-            .label("comment_rank"),
-        )
-        .filter(models.Comment.parent_id.is_(None))
-        .subquery()
-    )
-
-    return (
-        db.query(
-            models.Post,
-            models.User.username.label("owner_username"),
-            avatar_media.public_url.label("owner_avatar_url"),
-            func.coalesce(likes_subq.c.likes_count, 0).label("likes_count"),
-            func.coalesce(retweets_subq.c.retweets_count, 0).label("retweets_count"),
-            liked_by_me_subq.c.post_id.isnot(None).label("is_liked"),
-            retweeted_by_me_subq.c.post_id.isnot(None).label("is_retweeted"),
-            bookmarked_by_me_subq.c.post_id.isnot(None).label("is_bookmarked"),
-            models.Media.public_url.label("media_url"),
-            ranked_top_comments_subq.c.comment_id.label("top_comment_id"),
-            ranked_top_comments_subq.c.comment_content.label("top_comment_content"),
-            ranked_top_comments_subq.c.comment_like_count.label(
-                "top_comment_like_count"
-            ),
-            top_comment_liked_by_me.user_id.isnot(None).label("top_comment_is_liked"),
-            ranked_top_comments_subq.c.comment_created_at.label(
-                "top_comment_created_at"
-            ),
-            top_comment_user.id.label("top_comment_user_id"),
-            top_comment_user.username.label("top_comment_username"),
-            top_comment_avatar_media.public_url.label("top_comment_user_avatar_url"),
-            top_comment_user.bio.label("top_comment_user_bio"),
-        )
-        .join(models.User, models.Post.owner_id == models.User.id)
-        .outerjoin(models.Media, models.Post.media_id == models.Media.id)
-        .outerjoin(avatar_media, models.User.avatar_media_id == avatar_media.id)
-        .outerjoin(likes_subq, models.Post.id == likes_subq.c.post_id)
-        .outerjoin(retweets_subq, models.Post.id == retweets_subq.c.post_id)
-        .outerjoin(liked_by_me_subq, models.Post.id == liked_by_me_subq.c.post_id)
-        .outerjoin(
-            retweeted_by_me_subq, models.Post.id == retweeted_by_me_subq.c.post_id
-        )
-        .outerjoin(
-            bookmarked_by_me_subq,
-            models.Post.id == bookmarked_by_me_subq.c.post_id,
-        )
-        .outerjoin(
-            ranked_top_comments_subq,
-            and_(
-                ranked_top_comments_subq.c.post_id == models.Post.id,
-                ranked_top_comments_subq.c.comment_rank == 1,
-            ),
-        )
-        .outerjoin(
-            top_comment_user,
-            ranked_top_comments_subq.c.comment_user_id == top_comment_user.id,
+    if keyset is not None:
+        inbox_q = inbox_q.where(
+            tuple_(models.FeedInboxItem.post_timestamp, models.FeedInboxItem.post_id)
+            < keyset
         )
-        .outerjoin(
-            top_comment_avatar_media,
-            top_comment_user.avatar_media_id == top_comment_avatar_media.id,
+        merged_q = merged_q.where(
+            tuple_(models.Post.timestamp, models.Post.id) < keyset
         )
-        .outerjoin(
-            top_comment_liked_by_me,
-            and_(
-                top_comment_liked_by_me.comment_id
-                == ranked_top_comments_subq.c.comment_id,
-                top_comment_liked_by_me.user_id == current_user.id,
-            ),
-        )
-    )
+
+    inbox_q = inbox_q.order_by(
+        models.FeedInboxItem.post_timestamp.desc(),
+        models.FeedInboxItem.post_id.desc(),
+    ).limit(window)
+    merged_q = merged_q.order_by(
+        models.Post.timestamp.desc(), models.Post.id.desc()
+    ).limit(window)
+
+    candidates = union_all(inbox_q, merged_q).subquery()
+    return select(candidates.c.post_id)
 
 
 def apply_feed_view_filter(
     query: Query,
     db: Session,
-    current_user: models.User,
+    current_user: auth.Principal,
     view: str,
+    window: int,
+    keyset: tuple[datetime, int] | None = None,
 ) -> Query:
+    """Restrict the feed to the requested view.
+
+    ``window`` is how many rows the caller will read past ``keyset`` (offset
+    plus page size), so each subscriptions branch only yields that many
+    candidates.
+    """
     if view != "subscriptions":
         return query
 
-    followee_ids_subq = (
-        db.query(models.Follow.c.followee_id)
-        .filter(models.Follow.c.follower_id == current_user.id)
-        .subquery()
+    return query.filter(
+        models.Post.id.in_(_subscription_post_ids(current_user, window, keyset))
     )
 
+
+def apply_feed_keyset(query: Query, timestamp: datetime, post_id: int) -> Query:
+    # Row comparison matches the (timestamp DESC, id DESC) feed order, so the
+    # page starts right after the cursor row instead of scanning past an offset.
     return query.filter(
-        or_(
-            models.Post.owner_id == current_user.id,
-            models.Post.owner_id.in_(select(followee_ids_subq.c.followee_id)),
-        )
+        tuple_(models.Post.timestamp, models.Post.id) < (timestamp, post_id)
     )
+
+
+def build_feed_page_query(
+    db: Session,
+    current_user: auth.Principal,
+    view: str,
+    window: int,
+    keyset: tuple[datetime, int] | None = None,
+) -> Query:
+    """Select the ``(id, timestamp)`` of feed posts in feed order.
+
+    Only the page's ids come out of this query; the caller applies the
+    offset/limit and hydrates the ids with ``feed_hydration.hydrate_posts``.
+    """
+    query = db.query(models.Post.id, models.Post.timestamp)
+    query = apply_feed_view_filter(query, db, current_user, view, window, keyset)
+    if keyset is not None:
+        query = apply_feed_keyset(query, *keyset)
+    return query.order_by(models.Post.timestamp.desc(), models.Post.id.desc())
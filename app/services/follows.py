@@ -0,0 +1,55 @@
+from typing import Iterable
+
+from sqlalchemy import delete, literal, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from .. import models
+from .feed_inbox import backfill_inbox, prune_inbox
+from .user_stats import bump_follow_stats
+
+
+def add_follows(
+    db: Session, follower_id: int, followee_ids: Iterable[int]
+) -> list[int]:
+    """Follow every existing user in ``followee_ids``; returns the new followees.
+
+    Unknown ids, the follower and users already followed are skipped by the
+    insert itself, so nothing is loaded into the session. ``RETURNING`` order
+    is unspecified, so the ids are sorted before they are returned.
+    """
+    ids = sorted(set(followee_ids) - {follower_id})
+    if not ids:
+        return []
+    targets = select(literal(follower_id), models.User.id).where(
+        models.User.id.in_(ids)
+    )
+    followed = sorted(
+        db.execute(
+            insert(models.Follow)
+            .from_select(["follower_id", "followee_id"], targets)
+            .on_conflict_do_nothing()
+            .returning(models.Follow.c.followee_id)
+        ).scalars()
+    )
+    if followed:
+        bump_follow_stats(db, follower_id, followed, 1)
+        backfill_inbox(db, follower_id, followed)
+    return followed
+
+
+def remove_follow(db: Session, follower_id: int, followee_id: int) -> bool:
+    """Remove one follow edge; returns False if it did not exist."""
+    removed = db.execute(
+        delete(models.Follow)
+        .where(
+            models.Follow.c.follower_id == follower_id,
+            models.Follow.c.followee_id == followee_id,
+        )
+        .returning(models.Follow.c.followee_id)
+    ).first()
+    if removed is None:
+        return False
+    bump_follow_stats(db, follower_id, [followee_id], -1)
+    prune_inbox(db, follower_id, followee_id)
+    return True
@@ -12,6 +12,7 @@ class PostWithCountsRow:
     owner_avatar_url: str | None
     likes_count: int
     retweets_count: int
+    comments_count: int
     is_liked: bool
     is_retweeted: bool
     is_bookmarked: bool
@@ -65,6 +66,7 @@ def to_post_with_counts(
         owner_avatar_url=data.owner_avatar_url,
         likes_count=data.likes_count,
         retweets_count=data.retweets_count,
+        comments_count=data.comments_count,
         is_liked=data.is_liked,
         is_retweeted=data.is_retweeted,
         is_bookmarked=data.is_bookmarked,
@@ -1,9 +1,10 @@
 from datetime import datetime, timedelta, timezone
 from typing import Literal
 
+from sqlalchemy import or_, select, update
 from sqlalchemy.orm import Session
 
-from .. import exceptions, models
+from .. import auth, exceptions, models
 
 POST_MAX_LENGTH = 280
 
@@ -18,7 +19,7 @@ def normalize_post_content(content: str, max_length: int = POST_MAX_LENGTH) -> s
 
 
 def validate_post_media_for_create(
-    db: Session, current_user: models.User, media_id: int | None
+    db: Session, current_user: auth.Principal, media_id: int | None
 ) -> None:
     if media_id is None:
         return
@@ -53,10 +54,41 @@ def get_post_or_404(db: Session, post_id: int) -> models.Post:
 def get_owned_post_or_404(
     db: Session,
     post_id: int,
-    current_user: models.User,
+    current_user: auth.Principal,
     action: Literal["edit", "delete"] = "edit",
 ) -> models.Post:
     post = get_post_or_404(db, post_id)
     if post.owner_id != current_user.id:
         exceptions.raise_forbidden_exception(f"Not authorized to {action} this post")
     return post
+
+
+def touch_user_posts(db: Session, user_id: int) -> list[int]:
+    """Bump ``posts.version`` wherever ``user_id``'s avatar or bio is rendered.
+
+    That is their own posts and posts whose top comment is theirs. Returns the
+    post ids so cached pages holding them can be invalidated.
+    """
+    their_comments = select(models.Comment.id).where(models.Comment.user_id == user_id)
+    return list(
+        db.execute(
+            update(models.Post)
+            .where(
+                or_(
+                    models.Post.owner_id == user_id,
+                    models.Post.top_comment_id.in_(their_comments),
+                )
+            )
+            .values(version=models.Post.version + 1)
+            .returning(models.Post.id)
+            .execution_options(synchronize_session=False)
+        ).scalars()
+    )
+
+
+def touch_post(db: Session, post_id: int) -> None:
+    """Bump ``posts.version`` so cached validators for the post change."""
+    db.query(models.Post).filter(models.Post.id == post_id).update(
+        {models.Post.version: models.Post.version + 1},
+        synchronize_session=False,
+    )
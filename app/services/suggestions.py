@@ -0,0 +1,147 @@
+"""Friends-of-friends "people you may know" suggestions.
+
+The whole ``follows`` table is loaded into a compressed sparse row (CSR)
+adjacency structure: ``indices[indptr[i]:indptr[i + 1]]`` are the accounts
+node ``i`` follows. A candidate's score for a user is the number of the user's
+followees who follow the candidate, i.e. the two-hop path count. Sources are
+processed in chunks with NumPy gathers, ``np.unique`` counting and a
+``lexsort`` per chunk; the top ``SUGGESTIONS_TOP_K`` candidates per user are
+written to ``user_suggestions``.
+
+This is a batch job (``python -m app.maintenance refresh-suggestions``); the
+API only reads the stored rows.
+"""
+
+from dataclasses import dataclass
+from typing import Iterator
+
+import numpy as np
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from .. import models, settings
+
+# Upper bound on two-hop paths expanded per chunk, to cap peak memory.
+MAX_PATHS_PER_CHUNK = 4_000_000
+
+
+@dataclass(frozen=True)
+class FollowGraph:
+    user_ids: np.ndarray  # dense node index -> users.id
+    indptr: np.ndarray
+    indices: np.ndarray
+
+    @property
+    def size(self) -> int:
+        return len(self.user_ids)
+
+
+def build_follow_graph(edges: np.ndarray) -> FollowGraph:
+    """Build the CSR graph from an ``(n, 2)`` array of (follower, followee) ids."""
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    user_ids = np.unique(edges)
+    followers = np.searchsorted(user_ids, edges[:, 0])
+    followees = np.searchsorted(user_ids, edges[:, 1])
+    order = np.lexsort((followees, followers))
+    degrees = np.bincount(followers, minlength=len(user_ids))
+    indptr = np.zeros(len(user_ids) + 1, dtype=np.int64)
+    np.cumsum(degrees, out=indptr[1:])
+    return FollowGraph(
+        user_ids=user_ids,
+        indptr=indptr,
+        indices=followees[order].astype(np.int32),
+    )
+
+
+def load_follow_graph(db: Session) -> FollowGraph:
+    rows = db.execute(
+        select(models.Follow.c.follower_id, models.Follow.c.followee_id)
+    ).all()
+    return build_follow_graph(np.array(rows, dtype=np.int64).reshape(-1, 2))
+
+
+def _expand(graph: FollowGraph, nodes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Out-neighbours of ``nodes`` as (position in ``nodes``, neighbour) pairs."""
+    starts = graph.indptr[nodes]
+    lengths = graph.indptr[nodes + 1] - starts
+    owners = np.repeat(np.arange(len(nodes)), lengths)
+    offsets = np.arange(lengths.sum()) - np.repeat(
+        np.cumsum(lengths) - lengths, lengths
+    )
+    return owners, graph.indices[np.repeat(starts, lengths) + offsets]
+
+
+def _chunks(graph: FollowGraph) -> Iterator[np.ndarray]:
+    degrees = np.diff(graph.indptr)
+    # Two-hop paths starting at each node: the sum of its followees' degrees.
+    followers = np.repeat(np.arange(graph.size), degrees)
+    paths = np.bincount(followers, weights=degrees[graph.indices], minlength=graph.size)
+    cumulative = np.cumsum(paths)
+    start = 0
+    while start < graph.size:
+        done = cumulative[start - 1] if start else 0
+        end = int(np.searchsorted(cumulative, done + MAX_PATHS_PER_CHUNK, "right"))
+        end = max(end, start + 1)
+        yield np.arange(start, end)
+        start = end
+
+
+def friends_of_friends(
+    graph: FollowGraph, top_k: int
+) -> Iterator[tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+    """Yield ``(user_ids, ranks, candidate_ids, scores)`` arrays per chunk.
+
+    Candidates exclude the user and accounts they already follow. Within a
+    user, candidates are ranked by score, then by lower user id.
+    """
+    n = graph.size
+    for sources in _chunks(graph):
+        first_owner, followees = _expand(graph, sources)
+        second_owner, candidates = _expand(graph, followees)
+        source = sources[first_owner[second_owner]]
+
+        keys = source * n + candidates
+        followed = sources[first_owner] * n + followees
+        keep = (candidates != source) & ~np.isin(keys, followed)
+        keys, scores = np.unique(keys[keep], return_counts=True)
+        if not len(keys):
+            continue
+
+        source, candidates = np.divmod(keys, n)
+        order = np.lexsort((candidates, -scores, source))
+        source, candidates, scores = source[order], candidates[order], scores[order]
+        ranks = np.arange(len(source)) - np.searchsorted(source, source)
+        top = ranks < top_k
+        yield (
+            graph.user_ids[source[top]],
+            ranks[top],
+            graph.user_ids[candidates[top]],
+            scores[top],
+        )
+
+
+def refresh_suggestions(db: Session, top_k: int | None = None) -> int:
+    """Recompute ``user_suggestions`` from ``follows``; returns rows written.
+
+    Old rows are replaced inside the caller's transaction, so readers keep
+    seeing the previous snapshot until it commits.
+    """
+    top_k = top_k or settings.SUGGESTIONS_TOP_K
+    graph = load_follow_graph(db)
+    db.execute(delete(models.UserSuggestion))
+    written = 0
+    for user_ids, ranks, candidate_ids, scores in friends_of_friends(graph, top_k):
+        db.execute(
+            insert(models.UserSuggestion),
+            [
+                {"user_id": u, "rank": r, "candidate_id": c, "score": s}
+                for u, r, c, s in zip(
+                    user_ids.tolist(),
+                    ranks.tolist(),
+                    candidate_ids.tolist(),
+                    scores.tolist(),
+                )
+            ],
+        )
+        written += len(user_ids)
+    return written
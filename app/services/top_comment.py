@@ -0,0 +1,46 @@
+from typing import Iterable
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from .. import models
+
+
+def _best_top_comment_id():
+    return (
+        select(models.Comment.id)
+        .where(
+            models.Comment.post_id == models.Post.id,
+            models.Comment.parent_id.is_(None),
+        )
+        .order_by(
+            models.Comment.like_count.desc(),
+            models.Comment.created_at.asc(),
+            models.Comment.id.asc(),
+        )
+        .limit(1)
+        .scalar_subquery()
+    )
+
+
+def refresh_top_comments(db: Session, post_ids: Iterable[int]) -> int:
+    """Recompute ``posts.top_comment_id`` for the given posts.
+
+    Only rows whose pointer is out of date are written; the number of fixed
+    pointers is returned, so the same call doubles as a consistency check.
+    """
+    ids = sorted(set(post_ids))
+    if not ids:
+        return 0
+
+    best = _best_top_comment_id()
+    result = db.execute(
+        update(models.Post)
+        .where(
+            models.Post.id.in_(ids),
+            models.Post.top_comment_id.is_distinct_from(best),
+        )
+        .values(top_comment_id=best)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
@@ -0,0 +1,121 @@
+from typing import Iterable
+
+from sqlalchemy import case, func, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from .. import models
+
+
+def bump_user_stats(
+    db: Session,
+    user_id: int,
+    followers: int = 0,
+    following: int = 0,
+    posts: int = 0,
+) -> None:
+    """Add the given deltas to a user's counters, creating the row if missing."""
+    stats = models.UserStats.__table__
+    stmt = insert(stats).values(
+        user_id=user_id,
+        followers_count=max(followers, 0),
+        following_count=max(following, 0),
+        posts_count=max(posts, 0),
+    )
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[stats.c.user_id],
+            set_={
+                "followers_count": func.greatest(
+                    stats.c.followers_count + followers, 0
+                ),
+                "following_count": func.greatest(
+                    stats.c.following_count + following, 0
+                ),
+                "posts_count": func.greatest(stats.c.posts_count + posts, 0),
+            },
+        )
+    )
+
+
+def bump_follow_stats(
+    db: Session, follower_id: int, followee_ids: list[int], delta: int
+) -> None:
+    """Apply a follow (+1) or unfollow (-1) of ``followee_ids`` to both sides."""
+    stats = models.UserStats.__table__
+    following_delta = delta * len(followee_ids)
+    # Rows go in user-id order so crossing follows lock them in the same order
+    # and cannot deadlock.
+    rows = [
+        {
+            "user_id": user_id,
+            "followers_count": 0 if user_id == follower_id else max(delta, 0),
+            "following_count": max(following_delta, 0) if user_id == follower_id else 0,
+            "posts_count": 0,
+        }
+        for user_id in sorted({follower_id, *followee_ids})
+    ]
+    stmt = insert(stats).values(rows)
+    is_follower = stmt.excluded.user_id == follower_id
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[stats.c.user_id],
+            set_={
+                "followers_count": func.greatest(
+                    stats.c.followers_count + case((is_follower, 0), else_=delta), 0
+                ),
+                "following_count": func.greatest(
+                    stats.c.following_count
+                    + case((is_follower, following_delta), else_=0),
+                    0,
+                ),
+            },
+        )
+    )
+
+
+def reconcile_user_stats(db: Session, user_ids: Iterable[int]) -> int:
+    """Recompute counters from the source tables; returns how many rows changed."""
+    ids = sorted(set(user_ids))
+    if not ids:
+        return 0
+
+    stats = models.UserStats.__table__
+    computed = select(
+        models.User.id,
+        select(func.count())
+        .select_from(models.Follow)
+        .where(models.Follow.c.followee_id == models.User.id)
+        .scalar_subquery(),
+        select(func.count())
+        .select_from(models.Follow)
+        .where(models.Follow.c.follower_id == models.User.id)
+        .scalar_subquery(),
+        select(func.count())
+        .select_from(models.Post)
+        .where(models.Post.owner_id == models.User.id)
+        .scalar_subquery(),
+    ).where(models.User.id.in_(ids))
+
+    stmt = insert(stats).from_select(
+        ["user_id", "followers_count", "following_count", "posts_count"], computed
+    )
+    counters = (stats.c.followers_count, stats.c.following_count, stats.c.posts_count)
+    changed = db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[stats.c.user_id],
+            set_={
+                "followers_count": stmt.excluded.followers_count,
+                "following_count": stmt.excluded.following_count,
+                "posts_count": stmt.excluded.posts_count,
+            },
+            where=tuple_(*counters).is_distinct_from(
+                tuple_(
+                    stmt.excluded.followers_count,
+                    stmt.excluded.following_count,
+                    stmt.excluded.posts_count,
+                )
+            ),
+        ).returning(stats.c.user_id)
+    ).all()
+    return len(changed)
@@ -7,8 +7,33 @@ from dotenv import load_dotenv
 load_dotenv(Path(__file__).resolve().parent.parent / ".env")
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./microblog.db")
+
+# Connection pool, per engine (the sync and async engines each get one).
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in (
+    "1",
+    "true",
+    "yes",
+    "on",
+)
+# Transaction-pooling PgBouncer hands each transaction a different server
+# connection, so server-side prepared statements must be turned off.
+DB_PGBOUNCER_TRANSACTION_MODE = os.getenv(
+    "DB_PGBOUNCER_TRANSACTION_MODE", "false"
+).lower() in ("1", "true", "yes", "on")
+
 SECRET_KEY = os.getenv("SECRET_KEY", "dev-only-change-me")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+# Append an HMAC tag (keyed from SECRET_KEY) to pagination cursors.
+CURSOR_SIGNING_ENABLED = os.getenv("CURSOR_SIGNING_ENABLED", "true").lower() in (
+    "1",
+    "true",
+    "yes",
+    "on",
+)
 
 _raw = os.getenv("CORS_ORIGINS", "http://localhost:5173")
 CORS_ORIGINS = [o.strip() for o in _raw.split(",") if o.strip()]
@@ -21,6 +46,34 @@ S3_BUCKET = os.getenv("S3_BUCKET")
 S3_PUBLIC_PREFIX = os.getenv("S3_PUBLIC_PREFIX", "public/")
 S3_PUBLIC_BASE_URL = os.getenv("S3_PUBLIC_BASE_URL")
 
+# Accounts with more followers than this skip fan-out on write; their posts are
+# merged into followers' home feeds at read time instead.
+FEED_FANOUT_MAX_FOLLOWERS = int(os.getenv("FEED_FANOUT_MAX_FOLLOWERS", "5000"))
+FEED_INBOX_BACKFILL_LIMIT = int(os.getenv("FEED_INBOX_BACKFILL_LIMIT", "200"))
+
+FEED_CACHE_ENABLED = os.getenv("FEED_CACHE_ENABLED", "true").lower() in (
+    "1",
+    "true",
+    "yes",
+    "on",
+)
+FEED_CACHE_TTL_SECONDS = float(os.getenv("FEED_CACHE_TTL_SECONDS", "15"))
+FEED_CACHE_MAX_BYTES = int(os.getenv("FEED_CACHE_MAX_BYTES", "4194304"))
+
+# Friends-of-friends candidates stored per user; extra rows let the endpoint
+# skip accounts followed since the last refresh.
+SUGGESTIONS_TOP_K = int(os.getenv("SUGGESTIONS_TOP_K", "20"))
+
+# Comments with at least this many likes count new likes in sharded
+# comment_like_deltas rows, folded into comments.like_count periodically,
+# instead of all updating the comment row. An interval of 0 disables the
+# in-app fold (run `python -m app.maintenance fold-comment-likes` instead).
+COMMENT_LIKE_BUFFER_THRESHOLD = int(os.getenv("COMMENT_LIKE_BUFFER_THRESHOLD", "100"))
+COMMENT_LIKE_DELTA_SHARDS = int(os.getenv("COMMENT_LIKE_DELTA_SHARDS", "16"))
+COMMENT_LIKE_FOLD_INTERVAL_SECONDS = float(
+    os.getenv("COMMENT_LIKE_FOLD_INTERVAL_SECONDS", "5")
+)
+
 MEDIA_MAX_BYTES_POST = int(os.getenv("MEDIA_MAX_BYTES_POST", "5242880"))
 MEDIA_MAX_BYTES_AVATAR = int(os.getenv("MEDIA_MAX_BYTES_AVATAR", "2097152"))
 
@@ -29,9 +29,12 @@ TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", _default_test_database_url())
 # set DATABASE_URL before importing app/settings
 os.environ["DATABASE_URL"] = TEST_DATABASE_URL
 os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+# Tests fold buffered comment likes explicitly, inside their own transaction.
+os.environ.setdefault("COMMENT_LIKE_FOLD_INTERVAL_SECONDS", "0")
 
 from app.main import app  # noqa: E402
-from app.database import get_db  # noqa: E402
+from app.database import get_async_db, get_db  # noqa: E402
+from app.services.feed_cache import public_feed_cache  # noqa: E402
 
 engine = create_engine(TEST_DATABASE_URL)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -66,12 +69,57 @@ def db_session():
         connection.close()
 
 
+@pytest.fixture()
+def count_statements(db_session):
+    """Run ``call()`` and return its result with the SQL it executed.
+
+    Statements are ``(sql, parameters)`` pairs in execution order.
+    """
+
+    def run(call):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+            statements.append((statement, parameters))
+
+        conn = db_session.connection()
+        event.listen(conn, "before_cursor_execute", before_cursor_execute)
+        try:
+            response = call()
+        finally:
+            event.remove(conn, "before_cursor_execute", before_cursor_execute)
+        return response, statements
+
+    return run
+
+
+class RolledBackAsyncSession:
+    """Runs async endpoints' ``run_sync`` work on the per-test sync session.
+
+    Async endpoints only talk to the database through ``AsyncSession.run_sync``,
+    so this keeps them inside the same rolled-back transaction as the rest.
+    """
+
+    def __init__(self, session):
+        self.sync_session = session
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return fn(self.sync_session, *args, **kwargs)
+
+
 @pytest.fixture()
 def client(db_session):
     def override_get_db():
         yield db_session
 
+    async def override_get_async_db():
+        yield RolledBackAsyncSession(db_session)
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    # Cached pages would outlive the per-test rollback.
+    public_feed_cache.clear()
     with TestClient(app) as c:
         yield c
     app.dependency_overrides.clear()
+    public_feed_cache.clear()
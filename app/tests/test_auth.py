@@ -55,3 +55,34 @@ def test_login_wrong_password_fails(client):
 
     bad_login = login_user(client, username, "wrong-password")
     assert bad_login.status_code == 401
+
+
+def test_principal_comes_from_token_claims(client, count_statements):
+    import jwt
+
+    from app import auth
+
+    suffix = uuid.uuid4().hex[:8]
+    username = f"user_{suffix}"
+    user_id = register_user(client, username, f"{username}@example.com", "p").json()[
+        "id"
+    ]
+    token = login_user(client, username, "p").json()["access_token"]
+    claims = jwt.decode(token, auth.SECRET_KEY, algorithms=[auth.ALGORITHM])
+    assert (claims["sub"], claims["uid"], claims["adm"]) == (username, user_id, False)
+    post_id = client.post(
+        "/posts/", json={"content": "hi"}, headers=auth_headers(token)
+    ).json()["id"]
+
+    like, statements = count_statements(
+        lambda: client.post(f"/posts/{post_id}/like", headers=auth_headers(token))
+    )
+    assert like.status_code == 204
+    assert not [s for s, _ in statements if "FROM users" in s]
+
+    # Tokens issued before the uid claim still resolve, via one lookup.
+    legacy = auth.create_access_token({"sub": username})
+    unlike = client.post(f"/posts/{post_id}/unlike", headers=auth_headers(legacy))
+    assert unlike.status_code == 204
+    me = client.get("/users/me", headers=auth_headers(legacy))
+    assert me.json()["id"] == user_id
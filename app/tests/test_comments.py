@@ -236,3 +236,303 @@ def test_reply_with_invalid_reply_to_comment_id_returns_400(client):
         reply_to_comment_id=0,
     )
     assert bad_reply.status_code == 400
+
+
+def test_replies_count_follows_reply_writes(client):
+    suffix = uuid.uuid4().hex[:8]
+    username = f"replies_{suffix}"
+    assert (
+        register_user(client, username, f"{username}@example.com", "p").status_code
+        == 200
+    )
+    token = login_user(client, username, "p").json()["access_token"]
+    post_id = create_post(client, token, "post").json()["id"]
+    root = create_comment(client, token, post_id, "root").json()
+    assert root["replies_count"] == 0
+
+    replies = [
+        create_comment(
+            client, token, post_id, f"reply {i}", parent_id=root["id"]
+        ).json()
+        for i in range(3)
+    ]
+    assert [reply["replies_count"] for reply in replies] == [0, 0, 0]
+
+    listed = get_top_level_comments(client, post_id).json()["items"]
+    assert [(c["id"], c["replies_count"]) for c in listed] == [(root["id"], 3)]
+    assert listed[0]["updated_at"] == root["updated_at"]
+
+    assert (
+        client.delete(f"/comments/{replies[0]['id']}", headers=auth_headers(token))
+    ).status_code == 204
+    listed = get_top_level_comments(client, post_id).json()["items"]
+    assert listed[0]["replies_count"] == 2
+
+
+def test_comment_list_etag(client):
+    suffix = uuid.uuid4().hex[:8]
+    username = f"etag_{suffix}"
+    assert (
+        register_user(client, username, f"{username}@example.com", "p").status_code
+        == 200
+    )
+    token = login_user(client, username, "p").json()["access_token"]
+
+    post_id = create_post(client, token, "post").json()["id"]
+    comment_id = create_comment(client, token, post_id, "first").json()["id"]
+
+    listing = get_top_level_comments(client, post_id, token)
+    etag = listing.headers["ETag"]
+
+    def conditional_list():
+        return client.get(
+            f"/posts/{post_id}/comments?limit=20",
+            headers={**auth_headers(token), "If-None-Match": etag},
+        )
+
+    assert conditional_list().status_code == 304
+
+    assert (
+        client.post(
+            f"/comments/{comment_id}/like", headers=auth_headers(token)
+        ).status_code
+        == 204
+    )
+    changed = conditional_list()
+    assert changed.status_code == 200
+    assert changed.json()["items"][0]["is_liked"] is True
+
+
+def test_comment_threads_include_first_replies_and_cursor(client, count_statements):
+    suffix = uuid.uuid4().hex[:8]
+    username = f"thread_{suffix}"
+    assert (
+        register_user(client, username, f"{username}@example.com", "p").status_code
+        == 200
+    )
+    token = login_user(client, username, "p").json()["access_token"]
+    post_id = create_post(client, token, "post").json()["id"]
+
+    roots = [
+        create_comment(client, token, post_id, f"root {i}").json()["id"]
+        for i in range(3)
+    ]
+    replies = [
+        create_comment(client, token, post_id, f"reply {i}", parent_id=roots[0]).json()[
+            "id"
+        ]
+        for i in range(4)
+    ]
+    create_comment(client, token, post_id, "only reply", parent_id=roots[1])
+    assert (
+        client.post(f"/comments/{replies[2]}/like", headers=auth_headers(token))
+    ).status_code == 204
+
+    res, statements = count_statements(
+        lambda: client.get(
+            f"/posts/{post_id}/comments/threads?limit=2&replies=2",
+            headers=auth_headers(token),
+        )
+    )
+    assert res.status_code == 200
+    assert len(statements) == 3
+    data = res.json()
+    assert [thread["id"] for thread in data["items"]] == roots[:2]
+    first, second = data["items"]
+    assert [r["id"] for r in first["replies"]] == [replies[2], replies[0]]
+    assert first["replies"][0]["is_liked"] is True
+    assert [r["content"] for r in second["replies"]] == ["only reply"]
+    assert second["replies_next_cursor"] is None
+
+    rest = client.get(
+        f"/comments/{roots[0]}/replies?cursor={first['replies_next_cursor']}"
+    ).json()
+    assert [r["id"] for r in rest["items"]] == [replies[1], replies[3]]
+
+    page_2 = client.get(
+        f"/posts/{post_id}/comments/threads?limit=2&cursor={data['next_cursor']}"
+    ).json()
+    assert [thread["id"] for thread in page_2["items"]] == [roots[2]]
+    assert page_2["items"][0]["replies"] == []
+    assert page_2["next_cursor"] is None
+
+
+def test_comment_endpoints_select_avatars_without_per_user_queries(
+    client, db_session, count_statements
+):
+    from app import models
+
+    suffix = uuid.uuid4().hex[:8]
+    tokens = {}
+    for name in ("author", "first", "second"):
+        username = f"avatar_{name}_{suffix}"
+        assert (
+            register_user(client, username, f"{username}@example.com", "p").status_code
+            == 200
+        )
+        user = db_session.query(models.User).filter_by(username=username).one()
+        avatar = models.Media(
+            owner_id=user.id,
+            kind="avatar",
+            status="ready",
+            bucket="test",
+            object_key=f"avatars/{username}.png",
+            content_type="image/png",
+            size_bytes=1,
+            public_url=f"https://cdn.example.com/{username}.png",
+        )
+        db_session.add(avatar)
+        db_session.flush()
+        user.avatar_media_id = avatar.id
+        db_session.flush()
+        tokens[name] = login_user(client, username, "p").json()["access_token"]
+
+    post_id = create_post(client, tokens["author"], "post").json()["id"]
+    root = create_comment(client, tokens["author"], post_id, "root").json()
+    create_comment(client, tokens["first"], post_id, "other root")
+    reply = create_comment(
+        client, tokens["first"], post_id, "reply", parent_id=root["id"]
+    ).json()
+
+    def counted(call):
+        res, statements = count_statements(call)
+        assert res.status_code == 200, res.text
+        return res.json(), len(statements)
+
+    created, count = counted(
+        lambda: create_comment(
+            client,
+            tokens["second"],
+            post_id,
+            "nested",
+            parent_id=root["id"],
+            reply_to_comment_id=reply["id"],
+        )
+    )
+    assert count == 2
+    assert created["user"]["avatar_url"].endswith(f"avatar_second_{suffix}.png")
+    assert created["reply_to_user"]["avatar_url"].endswith(f"avatar_first_{suffix}.png")
+
+    updated, count = counted(
+        lambda: client.patch(
+            f"/comments/{created['id']}",
+            json={"content": "edited"},
+            headers=auth_headers(tokens["second"]),
+        )
+    )
+    assert count == 1
+    assert updated["content"] == "edited"
+    assert (
+        updated["reply_to_user"]["avatar_url"]
+        == (created["reply_to_user"]["avatar_url"])
+    )
+
+    top_level, count = counted(
+        lambda: get_top_level_comments(client, post_id, tokens["second"])
+    )
+    assert count == 2
+    assert all(item["user"]["avatar_url"] for item in top_level["items"])
+
+    replies, count = counted(
+        lambda: client.get(
+            f"/comments/{root['id']}/replies", headers=auth_headers(tokens["author"])
+        )
+    )
+    assert count == 2
+    assert [item["id"] for item in replies["items"]] == [reply["id"], created["id"]]
+    assert all(item["user"]["avatar_url"] for item in replies["items"])
+    assert replies["items"][1]["reply_to_user"]["avatar_url"].endswith(
+        f"avatar_first_{suffix}.png"
+    )
+
+
+def test_buffered_comment_likes_are_shown_and_folded(client, db_session, monkeypatch):
+    from app import models, settings
+    from app.services.comment_likes import fold_comment_like_deltas
+
+    monkeypatch.setattr(settings, "COMMENT_LIKE_BUFFER_THRESHOLD", 0)
+    suffix = uuid.uuid4().hex[:8]
+    tokens = []
+    for i in range(3):
+        username = f"hot_{i}_{suffix}"
+        assert (
+            register_user(client, username, f"{username}@example.com", "p").status_code
+            == 200
+        )
+        tokens.append(login_user(client, username, "p").json()["access_token"])
+    post_id = create_post(client, tokens[0], "post").json()["id"]
+    comment_id = create_comment(client, tokens[0], post_id, "hot take").json()["id"]
+
+    for token in tokens:
+        assert (
+            client.post(f"/comments/{comment_id}/like", headers=auth_headers(token))
+        ).status_code == 204
+    assert (
+        client.delete(f"/comments/{comment_id}/like", headers=auth_headers(tokens[1]))
+    ).status_code == 204
+
+    comment = db_session.get(models.Comment, comment_id)
+    assert comment.like_count == 0
+    listed = get_top_level_comments(client, post_id, tokens[0]).json()["items"]
+    assert listed[0]["like_count"] == 2
+    assert listed[0]["is_liked"] is True
+
+    assert fold_comment_like_deltas(db_session) == [post_id]
+    db_session.expire_all()
+    assert db_session.get(models.Comment, comment_id).like_count == 2
+    assert db_session.query(models.CommentLikeDelta).count() == 0
+    listed = get_top_level_comments(client, post_id).json()["items"]
+    assert listed[0]["like_count"] == 2
+    assert fold_comment_like_deltas(db_session) == []
+
+
+def test_comment_writes_maintain_post_and_report_errors_in_order(client, db_session):
+    from app import models
+
+    suffix = uuid.uuid4().hex[:8]
+    tokens = []
+    for i in range(2):
+        username = f"writes_{i}_{suffix}"
+        assert (
+            register_user(client, username, f"{username}@example.com", "p").status_code
+            == 200
+        )
+        tokens.append(login_user(client, username, "p").json()["access_token"])
+    post_id = create_post(client, tokens[0], "post").json()["id"]
+    version = db_session.get(models.Post, post_id).version
+
+    first = create_comment(client, tokens[0], post_id, "first").json()
+    second = create_comment(client, tokens[1], post_id, "second").json()
+    reply = create_comment(client, tokens[1], post_id, "re", parent_id=first["id"])
+    assert reply.status_code == 200
+    assert reply.json()["reply_to_user"]["id"] == first["user"]["id"]
+
+    db_session.expire_all()
+    post = db_session.get(models.Post, post_id)
+    assert post.top_comment_id == first["id"]
+    assert post.version == version + 3
+
+    assert (
+        create_comment(client, tokens[0], post_id, "x", parent_id=10**9).status_code
+        == 404
+    )
+    assert (
+        create_comment(
+            client, tokens[0], post_id, "x", parent_id=reply.json()["id"]
+        ).status_code
+        == 400
+    )
+    assert create_comment(client, tokens[0], 10**9, " ").status_code == 404
+
+    edit = client.patch(
+        f"/comments/{second['id']}",
+        json={"content": " "},
+        headers=auth_headers(tokens[0]),
+    )
+    assert edit.status_code == 403
+    missing = client.patch(
+        "/comments/1000000000",
+        json={"content": " "},
+        headers=auth_headers(tokens[0]),
+    )
+    assert missing.status_code == 404
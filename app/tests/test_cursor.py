@@ -0,0 +1,63 @@
+import base64
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from app import settings
+from app.comment_cursor import decode_comment_cursor, encode_comment_cursor
+from app.feed_cursor import decode_feed_cursor, encode_feed_cursor
+from app.follow_cursor import decode_follow_cursor, encode_follow_cursor
+from app.timeline_cursor import decode_timeline_cursor, encode_timeline_cursor
+
+
+def assert_invalid(decode, cursor: str):
+    with pytest.raises(HTTPException) as exc:
+        decode(cursor)
+    assert exc.value.status_code == 400
+    assert exc.value.detail == "Invalid cursor"
+
+
+@pytest.mark.parametrize("signed", [True, False])
+def test_cursors_round_trip(monkeypatch, signed):
+    monkeypatch.setattr(settings, "CURSOR_SIGNING_ENABLED", signed)
+    created_at = datetime(2026, 10, 16, 12, 30, 45, 123456)
+
+    cursor = encode_comment_cursor(37, created_at, 123456789)
+    assert decode_comment_cursor(cursor) == (37, created_at, 123456789)
+    assert len(cursor) == (31 if signed else 20)
+    assert decode_comment_cursor(encode_comment_cursor(-1, created_at, 1))[0] == -1
+
+    assert decode_feed_cursor(encode_feed_cursor(created_at, 9)) == (created_at, 9)
+    assert decode_timeline_cursor(
+        encode_timeline_cursor(created_at, "retweets", 5)
+    ) == (created_at, "retweets", 5)
+    assert decode_follow_cursor(encode_follow_cursor(2**40)) == 2**40
+
+
+def test_aware_timestamps_decode_as_naive_utc():
+    aware = datetime(2026, 10, 16, 14, 0, tzinfo=timezone.utc)
+    timestamp, _ = decode_feed_cursor(encode_feed_cursor(aware, 1))
+    assert timestamp == datetime(2026, 10, 16, 14, 0)
+
+
+def test_tampered_truncated_and_foreign_cursors_are_rejected():
+    created_at = datetime(2026, 10, 16, 12, 0)
+    cursor = encode_comment_cursor(3, created_at, 42)
+    raw = bytearray(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    raw[3] ^= 1
+    tampered = base64.urlsafe_b64encode(bytes(raw)).rstrip(b"=").decode()
+
+    assert_invalid(decode_comment_cursor, tampered)
+    assert_invalid(decode_comment_cursor, cursor[:-4])
+    assert_invalid(decode_comment_cursor, "not a cursor!")
+    # A valid cursor from another endpoint is not accepted.
+    assert_invalid(decode_comment_cursor, encode_feed_cursor(created_at, 42))
+    assert_invalid(decode_follow_cursor, cursor)
+
+
+def test_unsigned_cursors_are_rejected_when_signing_is_on(monkeypatch):
+    monkeypatch.setattr(settings, "CURSOR_SIGNING_ENABLED", False)
+    unsigned = encode_follow_cursor(7)
+    monkeypatch.setattr(settings, "CURSOR_SIGNING_ENABLED", True)
+    assert_invalid(decode_follow_cursor, unsigned)
@@ -187,3 +187,487 @@ def test_feed_returns_top_comment_preview(client):
     assert post_for_liker is not None
     assert post_for_liker["top_comment_preview"] is not None
     assert post_for_liker["top_comment_preview"]["is_liked"] is True
+
+
+def test_reaction_counters_follow_like_and_retweet_toggles(client):
+    suffix = uuid.uuid4().hex[:8]
+    author = f"author_{suffix}"
+    fan = f"fan_{suffix}"
+
+    assert (
+        register_user(client, author, f"{author}@example.com", "pass-a").status_code
+        == 200
+    )
+    assert register_user(client, fan, f"{fan}@example.com", "pass-f").status_code == 200
+
+    token_author = login_user(client, author, "pass-a").json()["access_token"]
+    token_fan = login_user(client, fan, "pass-f").json()["access_token"]
+
+    post_id = create_post(client, token_author, "count me").json()["id"]
+    headers = auth_headers(token_fan)
+
+    assert client.post(f"/posts/{post_id}/like", headers=headers).status_code == 204
+    assert client.post(f"/posts/{post_id}/like", headers=headers).status_code == 409
+    assert client.post(f"/posts/{post_id}/retweet", headers=headers).status_code == 204
+
+    data = get_post_with_counts(client, token_fan, post_id).json()
+    assert data["likes_count"] == 1
+    assert data["retweets_count"] == 1
+    assert data["is_liked"] is True
+    assert data["is_retweeted"] is True
+
+    assert client.post(f"/posts/{post_id}/unlike", headers=headers).status_code == 204
+    assert client.post(f"/posts/{post_id}/unlike", headers=headers).status_code == 409
+    assert (
+        client.post(f"/posts/{post_id}/unretweet", headers=headers).status_code == 204
+    )
+
+    data = get_post_with_counts(client, token_fan, post_id).json()
+    assert data["likes_count"] == 0
+    assert data["retweets_count"] == 0
+    assert data["is_liked"] is False
+    assert data["is_retweeted"] is False
+
+
+def test_comments_count_follows_comment_and_thread_deletes(client):
+    suffix = uuid.uuid4().hex[:8]
+    author = f"author_{suffix}"
+    assert (
+        register_user(client, author, f"{author}@example.com", "pass-a").status_code
+        == 200
+    )
+    token = login_user(client, author, "pass-a").json()["access_token"]
+    headers = auth_headers(token)
+    post_id = create_post(client, token, "discuss").json()["id"]
+
+    root = create_comment(client, token, post_id, "root").json()
+    other = create_comment(client, token, post_id, "other").json()
+    replies = [
+        client.post(
+            f"/posts/{post_id}/comments",
+            json={"content": f"reply {i}", "parent_id": root["id"]},
+            headers=headers,
+        ).json()
+        for i in range(2)
+    ]
+    assert get_post_with_counts(client, token, post_id).json()["comments_count"] == 4
+    feed = get_feed(client, token, "public").json()
+    assert [p["comments_count"] for p in feed if p["id"] == post_id] == [4]
+
+    assert (
+        client.delete(f"/comments/{replies[0]['id']}", headers=headers).status_code
+        == 204
+    )
+    assert get_post_with_counts(client, token, post_id).json()["comments_count"] == 3
+
+    # Deleting a thread also removes its remaining reply.
+    assert client.delete(f"/comments/{root['id']}", headers=headers).status_code == 204
+    data = get_post_with_counts(client, token, post_id).json()
+    assert data["comments_count"] == 1
+    assert data["top_comment_preview"]["id"] == other["id"]
+
+
+def test_feed_cursor_pagination_is_stable(client):
+    suffix = uuid.uuid4().hex[:8]
+    username = f"user_{suffix}"
+
+    assert (
+        register_user(client, username, f"{username}@example.com", "pass").status_code
+        == 200
+    )
+    token = login_user(client, username, "pass").json()["access_token"]
+
+    for i in range(3):
+        assert create_post(client, token, f"cursor post {i}").status_code == 200
+
+    first = client.get(
+        "/posts/with_counts/?view=subscriptions&limit=2&cursor=",
+        headers=auth_headers(token),
+    )
+    assert first.status_code == 200
+    first_page = first.json()
+    assert [p["content"] for p in first_page["items"]] == [
+        "cursor post 2",
+        "cursor post 1",
+    ]
+    assert first_page["next_cursor"]
+
+    # A post created after the first page must not shift the next page.
+    assert create_post(client, token, "late post").status_code == 200
+
+    second = client.get(
+        "/posts/with_counts/?view=subscriptions&limit=2",
+        params={"cursor": first_page["next_cursor"]},
+        headers=auth_headers(token),
+    )
+    assert second.status_code == 200
+    second_page = second.json()
+    assert [p["content"] for p in second_page["items"]] == ["cursor post 0"]
+    assert second_page["next_cursor"] is None
+
+    bad = client.get(
+        "/posts/with_counts/?cursor=not-a-cursor", headers=auth_headers(token)
+    )
+    assert bad.status_code == 400
+
+
+def test_subscriptions_feed_inbox_fanout_backfill_and_prune(client, monkeypatch):
+    from app import settings
+
+    suffix = uuid.uuid4().hex[:8]
+    reader = f"reader_{suffix}"
+    writer = f"writer_{suffix}"
+    star = f"star_{suffix}"
+
+    assert (
+        register_user(client, reader, f"{reader}@example.com", "p").status_code == 200
+    )
+    writer_id = register_user(client, writer, f"{writer}@example.com", "p").json()["id"]
+    star_id = register_user(client, star, f"{star}@example.com", "p").json()["id"]
+
+    token_reader = login_user(client, reader, "p").json()["access_token"]
+    token_writer = login_user(client, writer, "p").json()["access_token"]
+    token_star = login_user(client, star, "p").json()["access_token"]
+
+    # Written before the follow: reaches the reader through the follow backfill.
+    assert create_post(client, token_writer, "before follow").status_code == 200
+    headers = auth_headers(token_reader)
+    assert client.post(f"/users/{writer_id}/follow", headers=headers).status_code == 204
+    assert client.post(f"/users/{star_id}/follow", headers=headers).status_code == 204
+
+    # Written after the follow: fanned out on write.
+    assert create_post(client, token_writer, "after follow").status_code == 200
+
+    # Over the fan-out cutoff: merged into the feed at read time.
+    monkeypatch.setattr(settings, "FEED_FANOUT_MAX_FOLLOWERS", 0)
+    assert create_post(client, token_star, "from a big account").status_code == 200
+
+    contents = [
+        p["content"] for p in get_feed(client, token_reader, "subscriptions").json()
+    ]
+    assert contents[:3] == ["from a big account", "after follow", "before follow"]
+
+    assert (
+        client.post(f"/users/{writer_id}/unfollow", headers=headers).status_code == 204
+    )
+    contents = [
+        p["content"] for p in get_feed(client, token_reader, "subscriptions").json()
+    ]
+    assert "before follow" not in contents
+    assert "after follow" not in contents
+    assert "from a big account" in contents
+
+
+def test_top_comment_pointer_tracks_likes_and_deletes(client, db_session):
+    from app import models
+    from app.services.top_comment import refresh_top_comments
+
+    suffix = uuid.uuid4().hex[:8]
+    author = f"author_{suffix}"
+    liker = f"liker_{suffix}"
+
+    assert (
+        register_user(client, author, f"{author}@example.com", "p").status_code == 200
+    )
+    assert register_user(client, liker, f"{liker}@example.com", "p").status_code == 200
+    token_author = login_user(client, author, "p").json()["access_token"]
+    token_liker = login_user(client, liker, "p").json()["access_token"]
+
+    post_id = create_post(client, token_author, "pointer post").json()["id"]
+    first = create_comment(client, token_author, post_id, "first").json()["id"]
+    second = create_comment(client, token_author, post_id, "second").json()["id"]
+    reply = client.post(
+        f"/posts/{post_id}/comments",
+        json={"content": "reply to first", "parent_id": first},
+        headers=auth_headers(token_author),
+    )
+    assert reply.status_code == 200
+
+    def top_comment_content():
+        preview = get_post_with_counts(client, token_author, post_id).json()[
+            "top_comment_preview"
+        ]
+        return preview["content"] if preview else None
+
+    assert top_comment_content() == "first"
+
+    assert like_comment(client, token_liker, second).status_code == 204
+    assert top_comment_content() == "second"
+
+    unlike = client.delete(
+        f"/comments/{second}/like", headers=auth_headers(token_liker)
+    )
+    assert unlike.status_code == 204
+    assert top_comment_content() == "first"
+
+    # Deleting a thread root removes its replies instead of promoting them.
+    deleted = client.delete(f"/comments/{first}", headers=auth_headers(token_author))
+    assert deleted.status_code == 204
+    assert top_comment_content() == "second"
+    assert (
+        db_session.query(models.Comment)
+        .filter(models.Comment.post_id == post_id)
+        .count()
+        == 1
+    )
+
+    db_session.query(models.Post).filter(models.Post.id == post_id).update(
+        {models.Post.top_comment_id: None}
+    )
+    assert refresh_top_comments(db_session, [post_id]) == 1
+    assert refresh_top_comments(db_session, [post_id]) == 0
+    assert top_comment_content() == "second"
+
+
+def test_bookmarks_list_is_hydrated(client):
+    suffix = uuid.uuid4().hex[:8]
+    username = f"user_{suffix}"
+
+    assert (
+        register_user(client, username, f"{username}@example.com", "p").status_code
+        == 200
+    )
+    token = login_user(client, username, "p").json()["access_token"]
+    headers = auth_headers(token)
+
+    older = create_post(client, token, "older bookmark").json()["id"]
+    newer = create_post(client, token, "newer bookmark").json()["id"]
+    assert client.post(f"/bookmarks/{newer}", headers=headers).status_code == 204
+    assert client.post(f"/bookmarks/{older}", headers=headers).status_code == 204
+    assert client.post(f"/posts/{older}/like", headers=headers).status_code == 204
+
+    listed = client.get("/bookmarks/", headers=headers)
+    assert listed.status_code == 200
+    items = listed.json()
+    assert [p["id"] for p in items] == [older, newer]
+    assert all(p["is_bookmarked"] for p in items)
+    assert items[0]["likes_count"] == 1
+    assert items[0]["is_liked"] is True
+    assert items[0]["owner_username"] == username
+
+
+def test_feed_query_count_does_not_grow_with_page_size(client, count_statements):
+    suffix = uuid.uuid4().hex[:8]
+    username = f"user_{suffix}"
+
+    assert (
+        register_user(client, username, f"{username}@example.com", "p").status_code
+        == 200
+    )
+    token = login_user(client, username, "p").json()["access_token"]
+
+    def feed_statements(limit: int) -> int:
+        res, statements = count_statements(
+            lambda: client.get(
+                f"/posts/with_counts/?view=subscriptions&limit={limit}",
+                headers=auth_headers(token),
+            )
+        )
+        assert res.status_code == 200
+        assert len(res.json()) == limit
+        return len(statements)
+
+    for i in range(5):
+        post_id = create_post(client, token, f"post {i}").json()["id"]
+        assert create_comment(client, token, post_id, f"comment {i}").status_code == 200
+
+    assert feed_statements(1) == feed_statements(5)
+
+
+def test_public_feed_cache_shares_pages_and_invalidates_on_writes(client):
+    from app.services.feed_cache import public_feed_cache
+
+    suffix = uuid.uuid4().hex[:8]
+    author = f"author_{suffix}"
+    reader = f"reader_{suffix}"
+
+    assert (
+        register_user(client, author, f"{author}@example.com", "p").status_code == 200
+    )
+    assert (
+        register_user(client, reader, f"{reader}@example.com", "p").status_code == 200
+    )
+    token_author = login_user(client, author, "p").json()["access_token"]
+    token_reader = login_user(client, reader, "p").json()["access_token"]
+
+    post_id = create_post(client, token_author, "cached post").json()["id"]
+    assert (
+        client.post(
+            f"/posts/{post_id}/like", headers=auth_headers(token_reader)
+        ).status_code
+        == 204
+    )
+
+    def public_post(token):
+        feed = get_feed(client, token, view="public")
+        assert feed.status_code == 200
+        return next(p for p in feed.json() if p["id"] == post_id)
+
+    before = public_feed_cache.stats()
+    assert public_post(token_author)["is_liked"] is False
+    # Same page position for another viewer: shared part from the cache,
+    # viewer flags computed per request.
+    assert public_post(token_reader)["is_liked"] is True
+    after = public_feed_cache.stats()
+    assert after["misses"] == before["misses"] + 1
+    assert after["hits"] == before["hits"] + 1
+
+    assert (
+        client.post(
+            f"/posts/{post_id}/unlike", headers=auth_headers(token_reader)
+        ).status_code
+        == 204
+    )
+    refreshed = public_post(token_reader)
+    assert refreshed["likes_count"] == 0
+    assert refreshed["is_liked"] is False
+
+    assert create_post(client, token_author, "newest post").status_code == 200
+    assert (
+        get_feed(client, token_reader, "public").json()[0]["content"] == "newest post"
+    )
+
+
+def test_feed_page_cache_ttl_and_memory_cap():
+    from app.services.feed_cache import FeedPageCache
+
+    now = [0.0]
+    cache = FeedPageCache(max_bytes=100, ttl_seconds=10, clock=lambda: now[0])
+
+    cache.put("a", "page a", post_ids=[1], size=60, shifts_with_feed=True)
+    cache.put("b", "page b", post_ids=[2], size=30, shifts_with_feed=False)
+    assert cache.get("a") == "page a"
+
+    # "b" is now least recently used and is evicted to stay under the cap.
+    cache.put("c", "page c", post_ids=[3], size=30, shifts_with_feed=False)
+    assert cache.get("b") is None
+    assert cache.stats()["evictions"] == 1
+
+    cache.invalidate_feed_shift()
+    assert cache.get("a") is None
+    assert cache.get("c") == "page c"
+
+    cache.invalidate_posts([3])
+    assert cache.get("c") is None
+
+    cache.put("d", "page d", post_ids=[4], size=10, shifts_with_feed=False)
+    now[0] = 11.0
+    assert cache.get("d") is None
+    assert cache.stats()["size_bytes"] == 0
+
+
+def test_cached_feed_page_hits_and_staleness(
+    client, db_session, count_statements, monkeypatch
+):
+    from app import models
+    from app.services.feed_cache import public_feed_cache
+
+    now = [1000.0]
+    monkeypatch.setattr(public_feed_cache, "_clock", lambda: now[0])
+    suffix = uuid.uuid4().hex[:8]
+    username = f"cached_{suffix}"
+    user_id = register_user(client, username, f"{username}@example.com", "p").json()[
+        "id"
+    ]
+    token = login_user(client, username, "p").json()["access_token"]
+    post_id = create_post(client, token, "cached").json()["id"]
+    like = client.post(f"/posts/{post_id}/like", headers=auth_headers(token))
+    assert like.status_code == 204
+
+    assert get_feed(client, token, "public").status_code == 200
+    hit, statements = count_statements(lambda: get_feed(client, token, "public"))
+    assert len(statements) == 1
+    assert [(p["id"], p["is_liked"]) for p in hit.json()] == [(post_id, True)]
+
+    # Writes made through another worker don't invalidate this process's cache.
+    db_session.query(models.Post).filter(models.Post.id == post_id).update(
+        {
+            models.Post.content: "edited elsewhere",
+            models.Post.version: models.Post.version + 1,
+        }
+    )
+    db_session.add(models.Post(content="posted elsewhere", owner_id=user_id))
+    db_session.flush()
+
+    # Cached posts are checked against posts.version on every hit...
+    items = get_feed(client, token, "public").json()
+    assert [p["content"] for p in items] == ["edited elsewhere"]
+    # ...but page membership is only refreshed once the entry expires.
+    now[0] += public_feed_cache.ttl_seconds
+    items = get_feed(client, token, "public").json()
+    assert [p["content"] for p in items] == ["posted elsewhere", "edited elsewhere"]
+
+
+def test_feed_etag_returns_304_until_page_changes(client, count_statements):
+    suffix = uuid.uuid4().hex[:8]
+    author = f"author_{suffix}"
+    reader = f"reader_{suffix}"
+
+    assert (
+        register_user(client, author, f"{author}@example.com", "p").status_code == 200
+    )
+    assert (
+        register_user(client, reader, f"{reader}@example.com", "p").status_code == 200
+    )
+    token_author = login_user(client, author, "p").json()["access_token"]
+    token_reader = login_user(client, reader, "p").json()["access_token"]
+
+    post_id = create_post(client, token_author, "etag post").json()["id"]
+
+    def conditional_feed(token, etag):
+        return client.get(
+            "/posts/with_counts/?view=public&skip=0&limit=10",
+            headers={**auth_headers(token), "If-None-Match": etag},
+        )
+
+    first = get_feed(client, token_reader, "public")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert etag.startswith('W/"')
+
+    unchanged, statements = count_statements(
+        lambda: conditional_feed(token_reader, etag)
+    )
+    assert unchanged.status_code == 304
+    # The cached page is revalidated with one narrow statement; nothing is hydrated.
+    assert len(statements) == 1
+    assert unchanged.content == b""
+    assert unchanged.headers["ETag"] == etag
+
+    # Viewer flags are part of the validator.
+    assert (
+        client.post(
+            f"/bookmarks/{post_id}", headers=auth_headers(token_author)
+        ).status_code
+        == 204
+    )
+    assert conditional_feed(token_author, etag).status_code == 200
+    assert conditional_feed(token_reader, etag).status_code == 304
+
+    assert (
+        client.post(
+            f"/posts/{post_id}/like", headers=auth_headers(token_author)
+        ).status_code
+        == 204
+    )
+    changed = conditional_feed(token_reader, etag)
+    assert changed.status_code == 200
+    assert changed.json()[0]["likes_count"] == 1
+    assert changed.headers["ETag"] != etag
+
+    etag = changed.headers["ETag"]
+    assert (
+        create_comment(client, token_author, post_id, "first comment").status_code
+        == 200
+    )
+    assert conditional_feed(token_reader, etag).status_code == 200
+
+    # The owner's bio is rendered with the post, so changing it is a change too.
+    etag = conditional_feed(token_reader, etag).headers["ETag"]
+    assert (
+        client.put(
+            "/users/me/profile", json={"bio": "hi"}, headers=auth_headers(token_author)
+        ).status_code
+        == 200
+    )
+    assert conditional_feed(token_reader, etag).status_code == 200
@@ -98,3 +98,41 @@ def test_non_admin_cannot_delete_any_post(client):
 
     resp = client.delete("/admin/posts/1", headers=auth_headers(token))
     assert resp.status_code == 403
+
+
+def test_revoked_admin_loses_delete_rights_before_token_expiry(client, db_session):
+    suffix = uuid.uuid4().hex[:8]
+    admin_username = f"admin_{suffix}"
+    user_username = f"user_{suffix}"
+    for username in (admin_username, user_username):
+        assert (
+            register_user(client, username, f"{username}@example.com", "p").status_code
+            == 200
+        )
+    admin = db_session.query(models.User).filter_by(username=admin_username).one()
+    admin.is_admin = True
+    db_session.flush()
+    admin_token = login_user(client, admin_username, "p").json()["access_token"]
+    user_token = login_user(client, user_username, "p").json()["access_token"]
+
+    post_id = client.post(
+        "/posts/", json={"content": "post"}, headers=auth_headers(user_token)
+    ).json()["id"]
+    comment_id = client.post(
+        f"/posts/{post_id}/comments",
+        json={"content": "comment"},
+        headers=auth_headers(user_token),
+    ).json()["id"]
+
+    # The token still carries the admin claim; the users row no longer does.
+    admin.is_admin = False
+    db_session.flush()
+    headers = auth_headers(admin_token)
+    assert client.delete(f"/comments/{comment_id}", headers=headers).status_code == 403
+    assert client.delete(f"/posts/{post_id}", headers=headers).status_code == 403
+    assert client.delete(f"/admin/posts/{post_id}", headers=headers).status_code == 403
+
+    admin.is_admin = True
+    db_session.flush()
+    assert client.delete(f"/comments/{comment_id}", headers=headers).status_code == 204
+    assert client.delete(f"/posts/{post_id}", headers=headers).status_code == 204
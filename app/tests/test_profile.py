@@ -117,3 +117,336 @@ def test_timeline_posts_and_retweets_ordered(client):
 
     # Newest activity should be the retweet (type=retweets)
     assert items[0]["type"] == "retweets"
+
+
+def test_profile_and_timeline_etags(client, count_statements):
+    suffix = uuid.uuid4().hex[:8]
+    user_a = f"user_a_{suffix}"
+    user_b = f"user_b_{suffix}"
+
+    assert (
+        register_user(client, user_a, f"{user_a}@example.com", "pass-a").status_code
+        == 200
+    )
+    reg_b = register_user(client, user_b, f"{user_b}@example.com", "pass-b")
+    token_a = login_user(client, user_a, "pass-a").json()["access_token"]
+    token_b = login_user(client, user_b, "pass-b").json()["access_token"]
+
+    post_id = create_post(client, token_a, "hello").json()["id"]
+
+    profile = get_profile(client, user_a)
+    timeline = get_timeline(client, user_a)
+    profile_etag = profile.headers["ETag"]
+    timeline_etag = timeline.headers["ETag"]
+
+    # A match is answered from the validator query, before anything is loaded.
+    res, statements = count_statements(
+        lambda: client.get(f"/users/{user_a}", headers={"If-None-Match": profile_etag})
+    )
+    assert (res.status_code, len(statements)) == (304, 1)
+    res, statements = count_statements(
+        lambda: client.get(
+            f"/users/{user_a}/timeline?skip=0&limit=10",
+            headers={"If-None-Match": f'"other", {timeline_etag}'},
+        )
+    )
+    assert (res.status_code, len(statements)) == (304, 3)
+
+    assert follow_user(client, token_b, profile.json()["id"]).status_code == 204
+    assert retweet_post(client, token_b, post_id).status_code == 204
+    assert reg_b.status_code == 200
+
+    profile = client.get(f"/users/{user_a}", headers={"If-None-Match": profile_etag})
+    assert profile.status_code == 200
+    assert profile.json()["followers_count"] == 1
+
+    timeline = client.get(
+        f"/users/{user_a}/timeline?skip=0&limit=10",
+        headers={"If-None-Match": timeline_etag},
+    )
+    assert timeline.status_code == 200
+    assert timeline.json()[0]["post"]["retweets_count"] == 1
+
+    # The author's bio is rendered with their posts, so it is part of both.
+    timeline_etag = timeline.headers["ETag"]
+    profile_etag = profile.headers["ETag"]
+    assert (
+        client.put(
+            "/users/me/profile", json={"bio": "new bio"}, headers=auth_headers(token_a)
+        ).status_code
+        == 200
+    )
+    profile = client.get(f"/users/{user_a}", headers={"If-None-Match": profile_etag})
+    assert profile.status_code == 200
+    assert profile.json()["bio"] == "new bio"
+    timeline = client.get(
+        f"/users/{user_a}/timeline?skip=0&limit=10",
+        headers={"If-None-Match": timeline_etag},
+    )
+    assert timeline.status_code == 200
+
+
+def test_timeline_cursor_pagination_matches_offset_order(client):
+    suffix = uuid.uuid4().hex[:8]
+    user_a = f"user_a_{suffix}"
+    user_b = f"user_b_{suffix}"
+
+    assert (
+        register_user(client, user_a, f"{user_a}@example.com", "pass-a").status_code
+        == 200
+    )
+    assert (
+        register_user(client, user_b, f"{user_b}@example.com", "pass-b").status_code
+        == 200
+    )
+    token_a = login_user(client, user_a, "pass-a").json()["access_token"]
+    token_b = login_user(client, user_b, "pass-b").json()["access_token"]
+
+    own_ids = [create_post(client, token_a, f"a{i}").json()["id"] for i in range(3)]
+    other_id = create_post(client, token_b, "b").json()["id"]
+    assert retweet_post(client, token_a, other_id).status_code == 204
+    assert retweet_post(client, token_a, own_ids[0]).status_code == 204
+
+    expected = [
+        (item["type"], item["post"]["id"])
+        for item in get_timeline(client, user_a).json()
+    ]
+    assert len(expected) == 5
+
+    seen = []
+    cursor = ""
+    while True:
+        page = client.get(f"/users/{user_a}/timeline?limit=2&cursor={cursor}")
+        assert page.status_code == 200
+        body = page.json()
+        assert len(body["items"]) <= 2
+        seen += [(item["type"], item["post"]["id"]) for item in body["items"]]
+        if body["next_cursor"] is None:
+            break
+        cursor = body["next_cursor"]
+
+    assert seen == expected
+    assert (
+        client.get(f"/users/{user_a}/timeline?cursor=not-a-cursor").status_code == 400
+    )
+    # Offset pages keep their original, unbounded limit; cursor pages are capped.
+    assert client.get(f"/users/{user_a}/timeline?limit=150").status_code == 200
+    assert client.get(f"/users/{user_a}/timeline?cursor=&limit=150").status_code == 400
+
+
+def test_user_stats_follow_post_delete_and_reconcile(client, db_session):
+    from app import models
+    from app.services.user_stats import reconcile_user_stats
+
+    suffix = uuid.uuid4().hex[:8]
+    user_a = f"user_a_{suffix}"
+    user_b = f"user_b_{suffix}"
+
+    user_a_id = register_user(client, user_a, f"{user_a}@example.com", "pass-a").json()[
+        "id"
+    ]
+    user_b_id = register_user(client, user_b, f"{user_b}@example.com", "pass-b").json()[
+        "id"
+    ]
+    token_a = login_user(client, user_a, "pass-a").json()["access_token"]
+    token_b = login_user(client, user_b, "pass-b").json()["access_token"]
+
+    post_id = create_post(client, token_a, "first").json()["id"]
+    assert create_post(client, token_a, "second").status_code == 200
+    assert follow_user(client, token_b, user_a_id).status_code == 204
+    assert follow_user(client, token_a, user_b_id).status_code == 204
+    assert (
+        client.post(f"/users/{user_b_id}/unfollow", headers=auth_headers(token_a))
+    ).status_code == 204
+    assert (
+        client.delete(f"/posts/{post_id}", headers=auth_headers(token_a))
+    ).status_code == 204
+
+    data = get_profile(client, user_a).json()
+    assert (data["posts_count"], data["followers_count"], data["following_count"]) == (
+        1,
+        1,
+        0,
+    )
+    data = get_profile(client, user_b).json()
+    assert (data["posts_count"], data["followers_count"], data["following_count"]) == (
+        0,
+        0,
+        1,
+    )
+
+    stats = db_session.get(models.UserStats, user_a_id)
+    stats.followers_count = 42
+    stats.posts_count = 0
+    db_session.flush()
+
+    assert reconcile_user_stats(db_session, [user_a_id, user_b_id]) == 1
+    db_session.expire_all()
+    data = get_profile(client, user_a).json()
+    assert (data["posts_count"], data["followers_count"]) == (1, 1)
+    assert reconcile_user_stats(db_session, [user_a_id, user_b_id]) == 0
+
+
+def test_batch_profiles_by_username_and_id(client, count_statements):
+    suffix = uuid.uuid4().hex[:8]
+    names = [f"batch_{i}_{suffix}" for i in range(3)]
+    ids = [
+        register_user(client, name, f"{name}@example.com", "p").json()["id"]
+        for name in names
+    ]
+    token = login_user(client, names[0], "p").json()["access_token"]
+    assert follow_user(client, token, ids[2]).status_code == 204
+    other_token = login_user(client, names[2], "p").json()["access_token"]
+    assert create_post(client, other_token, "hello").status_code == 200
+
+    res, statements = count_statements(
+        lambda: client.get(
+            f"/users?usernames={names[2]},missing_{suffix},{names[1]}",
+            headers=auth_headers(token),
+        )
+    )
+    assert res.status_code == 200
+    assert len(statements) == 1
+    data = res.json()
+    assert [p["username"] for p in data] == [names[2], names[1]]
+    assert [p["is_followed_by_viewer"] for p in data] == [True, False]
+    assert (data[0]["followers_count"], data[0]["posts_count"]) == (1, 1)
+
+    res = client.get(f"/users?ids={ids[1]},{ids[0]}")
+    assert res.status_code == 200
+    assert [p["id"] for p in res.json()] == [ids[1], ids[0]]
+    assert not any(p["is_followed_by_viewer"] for p in res.json())
+
+    assert client.get("/users?ids=1,x").status_code == 400
+    assert client.get(f"/users?ids=1&usernames={names[0]}").status_code == 400
+    too_many = ",".join(str(i) for i in range(101))
+    assert client.get(f"/users?ids={too_many}").status_code == 400
+
+
+def test_mutuals_preview_and_batch_counts(client):
+    suffix = uuid.uuid4().hex[:8]
+    names = {key: f"mut_{key}_{suffix}" for key in ("viewer", "a", "b", "c", "t")}
+    ids = {
+        key: register_user(client, name, f"{name}@example.com", "p").json()["id"]
+        for key, name in names.items()
+    }
+    tokens = {
+        key: login_user(client, name, "p").json()["access_token"]
+        for key, name in names.items()
+    }
+    for key in ("a", "b", "c"):
+        assert follow_user(client, tokens["viewer"], ids[key]).status_code == 204
+    for key in ("a", "b"):
+        assert follow_user(client, tokens[key], ids["t"]).status_code == 204
+
+    res = client.get(
+        f"/users/{names['t']}/mutuals/preview?limit=1",
+        headers=auth_headers(tokens["viewer"]),
+    )
+    assert res.status_code == 200
+    data = res.json()
+    assert data["mutual_count"] == 2
+    assert [u["id"] for u in data["mutual_preview"]] == [ids["a"]]
+    assert data["mutual_preview"][0]["avatar_url"] is None
+
+    res = client.get(
+        f"/users/mutuals/counts?ids={ids['t']},{ids['c']},{ids['t']}",
+        headers=auth_headers(tokens["viewer"]),
+    )
+    assert res.status_code == 200
+    assert res.json() == [
+        {"user_id": ids["t"], "mutual_count": 2},
+        {"user_id": ids["c"], "mutual_count": 0},
+    ]
+    assert (
+        client.get(
+            f"/users/missing_{suffix}/mutuals/preview",
+            headers=auth_headers(tokens["viewer"]),
+        ).status_code
+        == 404
+    )
+
+
+def test_bulk_follow_and_follow_errors(client):
+    suffix = uuid.uuid4().hex[:8]
+    names = {key: f"bulk_{key}_{suffix}" for key in ("viewer", "b", "c")}
+    ids = {
+        key: register_user(client, name, f"{name}@example.com", "p").json()["id"]
+        for key, name in names.items()
+    }
+    token = login_user(client, names["viewer"], "p").json()["access_token"]
+    b_token = login_user(client, names["b"], "p").json()["access_token"]
+    assert create_post(client, b_token, "from b").status_code == 200
+    headers = auth_headers(token)
+
+    requested = [ids["c"], ids["b"], ids["viewer"], 0, ids["b"]]
+    res = client.post(
+        "/users/me/following", json={"user_ids": requested}, headers=headers
+    )
+    assert res.status_code == 200
+    assert res.json() == {"followed": sorted([ids["b"], ids["c"]])}
+    res = client.post(
+        "/users/me/following", json={"user_ids": requested}, headers=headers
+    )
+    assert res.json() == {"followed": []}
+    too_many = {"user_ids": list(range(1, 102))}
+    assert (
+        client.post("/users/me/following", json=too_many, headers=headers).status_code
+        == 422
+    )
+
+    assert get_profile(client, names["viewer"]).json()["following_count"] == 2
+    assert get_profile(client, names["b"]).json()["followers_count"] == 1
+    feed = client.get("/posts/with_counts/?view=subscriptions", headers=headers).json()
+    assert [post["content"] for post in feed] == ["from b"]
+
+    assert follow_user(client, token, ids["b"]).status_code == 400
+    assert follow_user(client, token, ids["viewer"]).status_code == 400
+    assert follow_user(client, token, 0).status_code == 404
+    unfollow = f"/users/{ids['c']}/unfollow"
+    assert client.post(unfollow, headers=headers).status_code == 204
+    assert client.post(unfollow, headers=headers).status_code == 400
+    assert client.post("/users/0/unfollow", headers=headers).status_code == 404
+    assert get_profile(client, names["viewer"]).json()["following_count"] == 1
+
+
+def test_followers_and_following_keyset_pages(client):
+    suffix = uuid.uuid4().hex[:8]
+    target = f"fl_target_{suffix}"
+    target_id = register_user(client, target, f"{target}@example.com", "p").json()["id"]
+    follower_ids = []
+    for i in range(5):
+        name = f"fl_{i}_{suffix}"
+        follower_ids.append(
+            register_user(client, name, f"{name}@example.com", "p").json()["id"]
+        )
+        token = login_user(client, name, "p").json()["access_token"]
+        assert follow_user(client, token, target_id).status_code == 204
+    viewer_token = login_user(client, f"fl_0_{suffix}", "p").json()["access_token"]
+    for followee_id in follower_ids[2:4]:
+        assert follow_user(client, viewer_token, followee_id).status_code == 204
+
+    seen, flags, cursor = [], [], ""
+    while cursor is not None:
+        res = client.get(
+            f"/users/{target}/followers?limit=2&cursor={cursor}",
+            headers=auth_headers(viewer_token),
+        )
+        assert res.status_code == 200
+        data = res.json()
+        assert len(data["items"]) <= 2
+        seen += [user["id"] for user in data["items"]]
+        flags += [user["is_followed_by_viewer"] for user in data["items"]]
+        cursor = data["next_cursor"]
+    assert seen == sorted(follower_ids)
+    assert flags == [False, False, True, True, False]
+
+    following = client.get(f"/users/fl_0_{suffix}/following").json()
+    assert [user["id"] for user in following["items"]] == [target_id] + sorted(
+        follower_ids[2:4]
+    )
+    assert following["next_cursor"] is None
+    assert not any(user["is_followed_by_viewer"] for user in following["items"])
+
+    assert client.get(f"/users/{target}/followers?cursor=bad").status_code == 400
+    assert client.get(f"/users/missing_{suffix}/following").status_code == 404
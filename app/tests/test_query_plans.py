@@ -0,0 +1,235 @@
+"""Plan regression checks for the hot read endpoints.
+
+Seeds a dataset large enough for the planner to prefer indexes, captures every
+SELECT an endpoint runs and fails if ``EXPLAIN`` shows a sequential scan on
+one of the large tables.
+"""
+
+import json
+import uuid
+
+from sqlalchemy import text
+
+USERS = 20000
+POSTS = 50000
+LARGE_TABLES = {
+    "users",
+    "posts",
+    "likes",
+    "retweets",
+    "bookmarks",
+    "follows",
+    "feed_inbox",
+}
+
+
+def register_user(client, username: str, email: str, password: str):
+    return client.post(
+        "/users/",
+        json={"username": username, "email": email, "password": password},
+    )
+
+
+def login_user(client, username: str, password: str):
+    return client.post(
+        "/token",
+        data={"username": username, "password": password},
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+
+
+def auth_headers(token: str):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def seed_dataset(db_session, prefix: str, viewer_id: int) -> None:
+    conn = db_session.connection()
+    params = {"prefix": prefix, "users": USERS, "posts": POSTS, "viewer": viewer_id}
+
+    conn.execute(
+        text(
+            """
+            INSERT INTO users (username, email, hashed_password, is_admin, created_at)
+            SELECT :prefix || g, :prefix || g || '@example.com', 'x', false, now()
+            FROM generate_series(0, :users - 1) AS g
+            """
+        ),
+        params,
+    )
+    conn.execute(
+        text(
+            """
+            CREATE TEMP TABLE plan_users ON COMMIT DROP AS
+            SELECT id, row_number() OVER (ORDER BY id) - 1 AS n
+            FROM users WHERE username LIKE :prefix || '%'
+            """
+        ),
+        params,
+    )
+    conn.execute(
+        text(
+            """
+            INSERT INTO posts (content, owner_id, timestamp, likes_count,
+                               retweets_count, comments_count, fanned_out, version)
+            SELECT 'post ' || g, u.id, now() - g * interval '1 minute', 0, 0, 0,
+                   true, 0
+            FROM generate_series(0, :posts - 1) AS g
+            JOIN plan_users u ON u.n = g % :users
+            """
+        ),
+        params,
+    )
+    conn.execute(
+        text(
+            """
+            CREATE TEMP TABLE plan_posts ON COMMIT DROP AS
+            SELECT id, row_number() OVER (ORDER BY id) - 1 AS n
+            FROM posts
+            WHERE owner_id IN (SELECT id FROM plan_users)
+            """
+        )
+    )
+    # 7 is coprime with the post count, so every (user, post) pair is distinct.
+    conn.execute(
+        text(
+            """
+            INSERT INTO likes (user_id, post_id)
+            SELECT u.id, p.id
+            FROM generate_series(0, :posts - 1) AS g
+            JOIN plan_users u ON u.n = g % :users
+            JOIN plan_posts p ON p.n = (g * 7) % :posts
+            """
+        ),
+        params,
+    )
+    conn.execute(
+        text(
+            """
+            INSERT INTO retweets (user_id, post_id, timestamp)
+            SELECT u.id, p.id, now() - g * interval '1 second'
+            FROM generate_series(0, :posts / 5 - 1) AS g
+            JOIN plan_users u ON u.n = g % :users
+            JOIN plan_posts p ON p.n = (g * 7) % :posts
+            """
+        ),
+        params,
+    )
+    conn.execute(
+        text(
+            """
+            INSERT INTO bookmarks (user_id, post_id, created_at)
+            SELECT u.id, p.id, now() - g * interval '1 second'
+            FROM generate_series(0, :posts / 5 - 1) AS g
+            JOIN plan_users u ON u.n = g % :users
+            JOIN plan_posts p ON p.n = (g * 7) % :posts
+            UNION ALL
+            SELECT :viewer, p.id, now() - p.n * interval '1 second'
+            FROM plan_posts p WHERE p.n < 200
+            """
+        ),
+        params,
+    )
+    # Ten followees per user, never themselves; the viewer follows fifty.
+    conn.execute(
+        text(
+            """
+            INSERT INTO follows (follower_id, followee_id)
+            SELECT a.id, b.id
+            FROM generate_series(0, :users * 10 - 1) AS g
+            JOIN plan_users a ON a.n = g % :users
+            JOIN plan_users b ON b.n = (g % :users + 1 + g / :users) % :users
+            UNION ALL
+            SELECT :viewer, id FROM plan_users WHERE n < 50
+            """
+        ),
+        params,
+    )
+    conn.execute(
+        text(
+            """
+            INSERT INTO feed_inbox (user_id, post_id, owner_id, post_timestamp)
+            SELECT f.follower_id, p.id, p.owner_id, p.timestamp
+            FROM follows f
+            JOIN posts p ON p.owner_id = f.followee_id
+            WHERE f.follower_id = :viewer
+               OR f.follower_id IN (SELECT id FROM plan_users WHERE n < 100)
+            """
+        ),
+        params,
+    )
+    for table in sorted(LARGE_TABLES):
+        conn.execute(text(f"ANALYZE {table}"))
+
+
+def capture_selects(count_statements, call):
+    response, statements = count_statements(call)
+    assert response.status_code == 200, response.text
+    selects = [
+        (statement, parameters)
+        for statement, parameters in statements
+        if statement.lstrip().upper().startswith(("SELECT", "WITH"))
+    ]
+    assert selects
+    return selects
+
+
+def seq_scans(plan: dict) -> list[str]:
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan["Relation Name"] in LARGE_TABLES:
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        found += seq_scans(child)
+    return found
+
+
+def assert_no_seq_scans(db_session, name: str, statements) -> None:
+    conn = db_session.connection()
+    for statement, parameters in statements:
+        result = conn.exec_driver_sql(
+            "EXPLAIN (FORMAT JSON) " + statement, parameters
+        ).scalar()
+        plan = (json.loads(result) if isinstance(result, str) else result)[0]["Plan"]
+        assert not seq_scans(plan), f"{name}: Seq Scan in plan for:\n{statement}"
+
+
+def test_hot_read_queries_use_indexes(client, db_session, count_statements):
+    suffix = uuid.uuid4().hex[:8]
+    viewer = f"plan_viewer_{suffix}"
+    assert (
+        register_user(client, viewer, f"{viewer}@example.com", "p").status_code == 200
+    )
+    token = login_user(client, viewer, "p").json()["access_token"]
+    viewer_id = client.get("/users/me", headers=auth_headers(token)).json()["id"]
+
+    prefix = f"plan_{suffix}_"
+    seed_dataset(db_session, prefix, viewer_id)
+    profile_user = f"{prefix}1"
+
+    calls = {
+        "public feed": lambda: client.get(
+            "/posts/with_counts/?view=public&limit=20", headers=auth_headers(token)
+        ),
+        "subscriptions feed": lambda: client.get(
+            "/posts/with_counts/?view=subscriptions&cursor=&limit=20",
+            headers=auth_headers(token),
+        ),
+        "timeline": lambda: client.get(
+            f"/users/{profile_user}/timeline?cursor=&limit=20",
+            headers=auth_headers(token),
+        ),
+        "profile": lambda: client.get(
+            f"/users/{profile_user}", headers=auth_headers(token)
+        ),
+        "bookmarks": lambda: client.get(
+            "/bookmarks/?limit=20", headers=auth_headers(token)
+        ),
+        "followers": lambda: client.get(
+            f"/users/{profile_user}/followers?limit=20", headers=auth_headers(token)
+        ),
+        "following": lambda: client.get(
+            f"/users/{profile_user}/following?limit=20", headers=auth_headers(token)
+        ),
+    }
+    for name, call in calls.items():
+        statements = capture_selects(count_statements, call)
+        assert_no_seq_scans(db_session, name, statements)
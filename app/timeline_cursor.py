@@ -0,0 +1,27 @@
+from datetime import datetime
+from typing import NamedTuple
+
+from .cursor import Choice, CursorSchema, Timestamp, UInt
+
+TIMELINE_ITEM_TYPES = ("posts", "retweets")
+
+
+class TimelineKeyset(NamedTuple):
+    activity_at: datetime
+    item_type: str
+    post_id: int
+
+
+TIMELINE_CURSOR = CursorSchema(
+    kind=3,
+    keyset=TimelineKeyset,
+    fields=(Timestamp(), Choice(*TIMELINE_ITEM_TYPES), UInt()),
+)
+
+
+def encode_timeline_cursor(activity_at: datetime, item_type: str, post_id: int) -> str:
+    return TIMELINE_CURSOR.encode(activity_at, item_type, post_id)
+
+
+def decode_timeline_cursor(cursor: str) -> TimelineKeyset:
+    return TIMELINE_CURSOR.decode(cursor)
@@ -0,0 +1,161 @@
+"""Compare sync and async feed reads under high concurrency.
+
+Serves the same public feed page from a sync (threadpool) route and then from
+an async (``AsyncSession.run_sync``) route, each in its own uvicorn process,
+hammers it with concurrent requests and reports throughput and latency
+percentiles.
+
+    DATABASE_URL=postgresql+psycopg://... python -m benchmarks.async_reads \\
+        --concurrency 200 --requests 4000 --db-latency-ms 5
+
+``--db-latency-ms`` adds a ``pg_sleep`` to every request to stand in for
+network round trips; that is where sync routes tie up threadpool threads.
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import statistics
+import time
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.services.feed_hydration import hydrate_posts
+from app.services.feed_query import build_feed_page_query
+from app.settings import DATABASE_URL
+
+
+def build_app(
+    mode: str, pool_size: int, page_size: int, db_latency_ms: float
+) -> FastAPI:
+    def feed_page(db: Session):
+        if db_latency_ms:
+            db.execute(text("SELECT pg_sleep(:s)"), {"s": db_latency_ms / 1000})
+        rows = build_feed_page_query(db, None, "public", page_size)
+        post_ids = [post_id for post_id, _ in rows.limit(page_size).all()]
+        return hydrate_posts(db, post_ids, 0)
+
+    app = FastAPI()
+
+    if mode == "sync":
+        engine = create_engine(DATABASE_URL, pool_size=pool_size, max_overflow=0)
+        SessionLocal = sessionmaker(bind=engine, autoflush=False)
+
+        @app.get("/feed")
+        def sync_feed():
+            with SessionLocal() as db:
+                return feed_page(db)
+
+    else:
+        async_engine = create_async_engine(
+            DATABASE_URL, pool_size=pool_size, max_overflow=0
+        )
+        AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False)
+
+        @app.get("/feed")
+        async def async_feed():
+            async with AsyncSessionLocal() as db:
+                return await db.run_sync(feed_page)
+
+    return app
+
+
+def serve(
+    mode: str, port: int, pool_size: int, page_size: int, db_latency_ms: float
+) -> None:
+    app = build_app(mode, pool_size, page_size, db_latency_ms)
+    uvicorn.run(
+        app,
+        port=port,
+        log_level="warning",
+        access_log=False,
+        timeout_keep_alive=60,
+    )
+
+
+def wait_until_up(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            httpx.get(url)
+            return
+        except httpx.TransportError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+async def hammer(url: str, concurrency: int, total: int) -> dict[str, float]:
+    latencies: list[float] = []
+    errors = 0
+    remaining = iter(range(total))
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                response = await client.get(url)
+            except httpx.TransportError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        # Warm up: open the HTTP and database pool connections before timing.
+        await asyncio.gather(*(client.get(url) for _ in range(concurrency)))
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "rps": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "errors": errors,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--pool-size", type=int, default=80)
+    parser.add_argument("--db-latency-ms", type=float, default=5.0)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    for mode in ("sync", "async"):
+        # One server per mode, so only one connection pool exists at a time.
+        server = multiprocessing.Process(
+            target=serve,
+            args=(mode, args.port, args.pool_size, args.page_size, args.db_latency_ms),
+            daemon=True,
+        )
+        server.start()
+        try:
+            wait_until_up(f"http://127.0.0.1:{args.port}/docs")
+            url = f"http://127.0.0.1:{args.port}/feed"
+            result = asyncio.run(hammer(url, args.concurrency, args.requests))
+        finally:
+            server.terminate()
+            server.join()
+        print(
+            f"{mode:>5}: {result['rps']:8.1f} req/s  "
+            f"p50 {result['p50_ms']:7.1f} ms  p99 {result['p99_ms']:7.1f} ms  "
+            f"errors {result['errors']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
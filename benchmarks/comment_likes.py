@@ -0,0 +1,188 @@
+"""Measure row-lock contention when many users like the same comment.
+
+Creates a post with one comment and ``--users`` likers, then runs like/unlike
+transactions from ``--concurrency`` threads twice: once with every change
+updating ``comments.like_count`` directly, once with the buffered
+``comment_like_deltas`` path. For each mode it reports throughput and how long
+the counter step took, which is almost all lock wait when the row is hot.
+The buffered run ends with one fold. Everything it creates is deleted again.
+
+    DATABASE_URL=postgresql+psycopg://... python -m benchmarks.comment_likes \\
+        --concurrency 32 --transactions 4000 --db-latency-ms 2
+
+``--db-latency-ms`` adds a ``pg_sleep`` between the counter step and the
+commit to stand in for the rest of the request; row locks are held across it.
+"""
+
+import argparse
+import statistics
+import threading
+import time
+import uuid
+
+from sqlalchemy import create_engine, delete, insert, text
+from sqlalchemy.orm import sessionmaker
+
+from app import models, settings
+from app.services.comment_likes import (
+    apply_comment_like_change,
+    fold_comment_like_deltas,
+)
+from app.settings import DATABASE_URL
+
+
+def seed(SessionLocal, users: int, initial_likes: int) -> tuple[int, int, list[int]]:
+    suffix = uuid.uuid4().hex[:8]
+    with SessionLocal() as db:
+        user_ids = list(
+            db.execute(
+                insert(models.User).returning(models.User.id),
+                [
+                    {
+                        "username": f"bench_{i}_{suffix}",
+                        "email": f"bench_{i}_{suffix}@example.com",
+                        "hashed_password": "-",
+                    }
+                    for i in range(users)
+                ],
+            ).scalars()
+        )
+        post = models.Post(content="benchmark", owner_id=user_ids[0])
+        db.add(post)
+        db.flush()
+        comment = models.Comment(
+            post_id=post.id,
+            user_id=user_ids[0],
+            content="viral",
+            like_count=initial_likes,
+        )
+        db.add(comment)
+        db.commit()
+        return post.id, comment.id, user_ids
+
+
+def cleanup(SessionLocal, post_id: int, user_ids: list[int]) -> None:
+    with SessionLocal() as db:
+        db.execute(delete(models.Post).where(models.Post.id == post_id))
+        db.execute(delete(models.User).where(models.User.id.in_(user_ids)))
+        db.commit()
+
+
+def run(
+    SessionLocal,
+    comment_id: int,
+    user_ids: list[int],
+    concurrency: int,
+    transactions: int,
+    db_latency_ms: float,
+) -> dict[str, float]:
+    counter_waits: list[float] = []
+    remaining = iter(range(transactions))
+    lock = threading.Lock()
+
+    def worker(worker_index: int):
+        # Each worker owns a disjoint slice of likers and alternates like/unlike.
+        mine = user_ids[worker_index::concurrency]
+        liked: set[int] = set()
+        step = 0
+        with SessionLocal() as db:
+            comment = db.get(models.Comment, comment_id)
+            db.expunge(comment)
+            for _ in remaining:
+                user_id = mine[step % len(mine)]
+                step += 1
+                if user_id in liked:
+                    db.execute(
+                        delete(models.CommentLike).where(
+                            models.CommentLike.user_id == user_id,
+                            models.CommentLike.comment_id == comment_id,
+                        )
+                    )
+                    delta = -1
+                    liked.discard(user_id)
+                else:
+                    db.execute(
+                        insert(models.CommentLike).values(
+                            user_id=user_id, comment_id=comment_id
+                        )
+                    )
+                    delta = 1
+                    liked.add(user_id)
+                started = time.perf_counter()
+                apply_comment_like_change(db, comment, user_id, delta)
+                waited = time.perf_counter() - started
+                if db_latency_ms:
+                    db.execute(text("SELECT pg_sleep(:s)"), {"s": db_latency_ms / 1000})
+                db.commit()
+                with lock:
+                    counter_waits.append(waited)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    counter_waits.sort()
+    return {
+        "tps": transactions / elapsed,
+        "p50_ms": statistics.median(counter_waits) * 1000,
+        "p99_ms": counter_waits[int(len(counter_waits) * 0.99) - 1] * 1000,
+        "total_s": sum(counter_waits),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--transactions", type=int, default=4000)
+    parser.add_argument("--users", type=int, default=256)
+    parser.add_argument("--db-latency-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    engine = create_engine(DATABASE_URL, pool_size=args.concurrency + 1)
+    SessionLocal = sessionmaker(bind=engine, autoflush=False)
+    initial_likes = 1000
+    post_id, comment_id, user_ids = seed(SessionLocal, args.users, initial_likes)
+    try:
+        for mode, threshold in (("direct", initial_likes + 1), ("buffered", 0)):
+            settings.COMMENT_LIKE_BUFFER_THRESHOLD = threshold
+            result = run(
+                SessionLocal,
+                comment_id,
+                user_ids,
+                args.concurrency,
+                args.transactions,
+                args.db_latency_ms,
+            )
+            print(
+                f"{mode:>8}: {result['tps']:8.1f} tx/s  counter step "
+                f"p50 {result['p50_ms']:7.2f} ms  p99 {result['p99_ms']:7.2f} ms  "
+                f"total {result['total_s']:7.2f} s"
+            )
+            # Reset the likes and the stored count before the next mode.
+            with SessionLocal() as db:
+                if mode == "buffered":
+                    started = time.perf_counter()
+                    fold_comment_like_deltas(db)
+                    db.commit()
+                    print(f"    fold: {(time.perf_counter() - started) * 1000:.1f} ms")
+                db.execute(
+                    delete(models.CommentLike).where(
+                        models.CommentLike.comment_id == comment_id
+                    )
+                )
+                db.execute(
+                    models.Comment.__table__.update()
+                    .where(models.Comment.id == comment_id)
+                    .values(like_count=initial_likes)
+                )
+                db.commit()
+    finally:
+        cleanup(SessionLocal, post_id, user_ids)
+
+
+if __name__ == "__main__":
+    main()
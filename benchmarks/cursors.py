@@ -0,0 +1,60 @@
+"""Microbenchmark the keyset cursor codec.
+
+Compares the binary codec in ``app/cursor.py`` (signed and unsigned) with the
+previous format, base64 of ``"like|isoformat|id"`` text, on comment cursors,
+and reports size and time per encode/decode.
+
+    python -m benchmarks.cursors --number 200000
+"""
+
+import argparse
+import base64
+import timeit
+from datetime import datetime
+
+from app import settings
+from app.comment_cursor import decode_comment_cursor, encode_comment_cursor
+
+
+def encode_text(like_count: int, created_at: datetime, comment_id: int) -> str:
+    payload = f"{like_count}|{created_at.isoformat()}|{comment_id}"
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("utf-8")
+
+
+def decode_text(cursor: str) -> tuple[int, datetime, int]:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    raw = base64.urlsafe_b64decode(padded.encode("utf-8")).decode("utf-8")
+    like_s, created_s, id_s = raw.split("|", 2)
+    return int(like_s), datetime.fromisoformat(created_s), int(id_s)
+
+
+def measure(encode, decode, number: int) -> tuple[int, float, float]:
+    keyset = (1234, datetime(2026, 10, 16, 12, 30, 45, 123456), 987654)
+    cursor = encode(*keyset)
+    assert tuple(decode(cursor)) == keyset
+    encode_s = min(timeit.repeat(lambda: encode(*keyset), number=number, repeat=3))
+    decode_s = min(timeit.repeat(lambda: decode(cursor), number=number, repeat=3))
+    return len(cursor), encode_s / number * 1e6, decode_s / number * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=200_000)
+    args = parser.parse_args()
+
+    runs = (
+        ("text", False, encode_text, decode_text),
+        ("binary", False, encode_comment_cursor, decode_comment_cursor),
+        ("signed", True, encode_comment_cursor, decode_comment_cursor),
+    )
+    for name, signed, encode, decode in runs:
+        settings.CURSOR_SIGNING_ENABLED = signed
+        size, encode_us, decode_us = measure(encode, decode, args.number)
+        print(
+            f"{name:>6}: {size:3d} chars  encode {encode_us:6.2f} us  "
+            f"decode {decode_us:6.2f} us"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""add post top comment pointer
+
+Revision ID: 233b145b3326
+Revises: 28a47d00294e
+Create Date: 2026-10-16 13:41:08.207716
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "233b145b3326"
+down_revision: Union[str, None] = "28a47d00294e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("posts", sa.Column("top_comment_id", sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        "fk_posts_top_comment_id",
+        "posts",
+        "comments",
+        ["top_comment_id"],
+        ["id"],
+        ondelete="SET NULL",
+    )
+
+    # Same ranking as the comment list: like_count DESC, created_at ASC, id ASC.
+    op.execute(
+        """
+        UPDATE posts
+        SET top_comment_id = (
+            SELECT comments.id
+            FROM comments
+            WHERE comments.post_id = posts.id AND comments.parent_id IS NULL
+            ORDER BY comments.like_count DESC, comments.created_at ASC, comments.id ASC
+            LIMIT 1
+        )
+        WHERE EXISTS (
+            SELECT 1
+            FROM comments
+            WHERE comments.post_id = posts.id AND comments.parent_id IS NULL
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("fk_posts_top_comment_id", "posts", type_="foreignkey")
+    op.drop_column("posts", "top_comment_id")
@@ -0,0 +1,83 @@
+"""add feed inbox
+
+Revision ID: 28a47d00294e
+Revises: 2ef908c325d5
+Create Date: 2026-10-16 11:03:27.540931
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "28a47d00294e"
+down_revision: Union[str, None] = "2ef908c325d5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "feed_inbox",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("post_id", sa.Integer(), nullable=False),
+        sa.Column("owner_id", sa.Integer(), nullable=False),
+        sa.Column("post_timestamp", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["owner_id"], ["users.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["post_id"], ["posts.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "post_id"),
+    )
+    op.create_index(
+        "ix_feed_inbox_user_timestamp",
+        "feed_inbox",
+        ["user_id", "post_timestamp", "post_id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_feed_inbox_user_owner",
+        "feed_inbox",
+        ["user_id", "owner_id"],
+        unique=False,
+    )
+
+    # Existing posts are delivered to every current follower (and the author)
+    # once here, so they are all marked as fanned out.
+    op.add_column(
+        "posts",
+        sa.Column(
+            "fanned_out", sa.Boolean(), nullable=False, server_default=sa.text("true")
+        ),
+    )
+    op.alter_column("posts", "fanned_out", server_default=None)
+    op.execute(
+        """
+        INSERT INTO feed_inbox (user_id, post_id, owner_id, post_timestamp)
+        SELECT posts.owner_id, posts.id, posts.owner_id, posts.timestamp
+        FROM posts
+        WHERE posts.owner_id IS NOT NULL AND posts.timestamp IS NOT NULL
+        UNION
+        SELECT follows.follower_id, posts.id, posts.owner_id, posts.timestamp
+        FROM posts
+        JOIN follows ON follows.followee_id = posts.owner_id
+        WHERE posts.timestamp IS NOT NULL
+        """
+    )
+    op.create_index(
+        "ix_posts_owner_not_fanned_out",
+        "posts",
+        ["owner_id", "timestamp", "id"],
+        unique=False,
+        postgresql_where=sa.text("NOT fanned_out"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_posts_owner_not_fanned_out", table_name="posts")
+    op.drop_column("posts", "fanned_out")
+    op.drop_index("ix_feed_inbox_user_owner", table_name="feed_inbox")
+    op.drop_index("ix_feed_inbox_user_timestamp", table_name="feed_inbox")
+    op.drop_table("feed_inbox")
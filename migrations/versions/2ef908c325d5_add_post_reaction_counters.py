@@ -0,0 +1,64 @@
+"""add post reaction counters
+
+Revision ID: 2ef908c325d5
+Revises: b07c0f3131dd
+Create Date: 2026-10-16 09:12:40.118204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "2ef908c325d5"
+down_revision: Union[str, None] = "b07c0f3131dd"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "posts",
+        sa.Column(
+            "likes_count", sa.Integer(), nullable=False, server_default=sa.text("0")
+        ),
+    )
+    op.add_column(
+        "posts",
+        sa.Column(
+            "retweets_count", sa.Integer(), nullable=False, server_default=sa.text("0")
+        ),
+    )
+
+    # Backfill from the reaction tables; posts without reactions keep the default.
+    op.execute(
+        """
+        UPDATE posts
+        SET likes_count = counts.total
+        FROM (
+            SELECT post_id, count(*) AS total FROM likes GROUP BY post_id
+        ) AS counts
+        WHERE posts.id = counts.post_id
+        """
+    )
+    op.execute(
+        """
+        UPDATE posts
+        SET retweets_count = counts.total
+        FROM (
+            SELECT post_id, count(*) AS total FROM retweets GROUP BY post_id
+        ) AS counts
+        WHERE posts.id = counts.post_id
+        """
+    )
+
+    op.alter_column("posts", "likes_count", server_default=None)
+    op.alter_column("posts", "retweets_count", server_default=None)
+
+
+def downgrade() -> None:
+    op.drop_column("posts", "retweets_count")
+    op.drop_column("posts", "likes_count")
@@ -0,0 +1,34 @@
+"""add comment like deltas
+
+Revision ID: 4f8a1c07d2e9
+Revises: 9c4d2e71a5b3
+Create Date: 2026-10-16 20:31:54.208113
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4f8a1c07d2e9"
+down_revision: Union[str, None] = "9c4d2e71a5b3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "comment_like_deltas",
+        sa.Column("comment_id", sa.Integer(), nullable=False),
+        sa.Column("shard", sa.Integer(), nullable=False),
+        sa.Column("delta", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["comment_id"], ["comments.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("comment_id", "shard"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("comment_like_deltas")
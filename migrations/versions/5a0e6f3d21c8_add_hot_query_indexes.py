@@ -0,0 +1,58 @@
+"""add hot query indexes
+
+Revision ID: 5a0e6f3d21c8
+Revises: 9d41c7be0a63
+Create Date: 2026-10-16 16:20:11.804532
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5a0e6f3d21c8"
+down_revision: Union[str, None] = "9d41c7be0a63"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    # Profile timeline (posts branch) and per-user post counts.
+    ("ix_posts_owner_timestamp", "posts", ["owner_id", "timestamp", "id"]),
+    # Public feed, ordered by timestamp DESC, id DESC.
+    ("ix_posts_timestamp_id", "posts", ["timestamp", "id"]),
+    # Profile timeline (reposts branch).
+    ("ix_retweets_user_timestamp", "retweets", ["user_id", "timestamp", "post_id"]),
+    # The primary key leads with user_id; per-post lookups and cascades need this.
+    ("ix_likes_post_id", "likes", ["post_id"]),
+    # Bookmarks list, ordered by created_at DESC, post_id DESC.
+    ("ix_bookmarks_user_created", "bookmarks", ["user_id", "created_at", "post_id"]),
+    # Follower counts and lists; the primary key leads with follower_id.
+    ("ix_follows_followee_follower", "follows", ["followee_id", "follower_id"]),
+]
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block.
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
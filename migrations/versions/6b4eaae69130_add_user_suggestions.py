@@ -0,0 +1,43 @@
+"""add user suggestions
+
+Revision ID: 6b4eaae69130
+Revises: e3b6d1f08a47
+Create Date: 2026-10-16 18:12:07.514302
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "6b4eaae69130"
+down_revision: Union[str, None] = "e3b6d1f08a47"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_suggestions",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("rank", sa.Integer(), nullable=False),
+        sa.Column("candidate_id", sa.Integer(), nullable=False),
+        sa.Column("score", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["candidate_id"], ["users.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "rank"),
+    )
+    op.create_index(
+        "ix_user_suggestions_candidate_id",
+        "user_suggestions",
+        ["candidate_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_user_suggestions_candidate_id", table_name="user_suggestions")
+    op.drop_table("user_suggestions")
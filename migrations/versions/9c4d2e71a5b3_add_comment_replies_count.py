@@ -0,0 +1,49 @@
+"""add comment replies count
+
+Revision ID: 9c4d2e71a5b3
+Revises: 6b4eaae69130
+Create Date: 2026-10-16 19:40:22.731950
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9c4d2e71a5b3"
+down_revision: Union[str, None] = "6b4eaae69130"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "comments",
+        sa.Column(
+            "replies_count", sa.Integer(), nullable=False, server_default=sa.text("0")
+        ),
+    )
+
+    # Backfill top-level comments; replies and empty threads keep the default.
+    op.execute(
+        """
+        UPDATE comments
+        SET replies_count = counts.total
+        FROM (
+            SELECT parent_id, count(*) AS total
+            FROM comments
+            WHERE parent_id IS NOT NULL
+            GROUP BY parent_id
+        ) AS counts
+        WHERE comments.id = counts.parent_id
+        """
+    )
+
+    op.alter_column("comments", "replies_count", server_default=None)
+
+
+def downgrade() -> None:
+    op.drop_column("comments", "replies_count")
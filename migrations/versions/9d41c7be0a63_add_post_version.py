@@ -0,0 +1,31 @@
+"""add post version
+
+Revision ID: 9d41c7be0a63
+Revises: 233b145b3326
+Create Date: 2026-10-16 15:02:47.530921
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9d41c7be0a63"
+down_revision: Union[str, None] = "233b145b3326"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "posts",
+        sa.Column("version", sa.Integer(), nullable=False, server_default=sa.text("0")),
+    )
+    op.alter_column("posts", "version", server_default=None)
+
+
+def downgrade() -> None:
+    op.drop_column("posts", "version")
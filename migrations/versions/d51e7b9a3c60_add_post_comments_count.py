@@ -0,0 +1,46 @@
+"""add post comments count
+
+Revision ID: d51e7b9a3c60
+Revises: 4f8a1c07d2e9
+Create Date: 2026-10-16 21:58:13.640275
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d51e7b9a3c60"
+down_revision: Union[str, None] = "4f8a1c07d2e9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "posts",
+        sa.Column(
+            "comments_count", sa.Integer(), nullable=False, server_default=sa.text("0")
+        ),
+    )
+
+    # Backfill from comments (replies included); posts without any keep the default.
+    op.execute(
+        """
+        UPDATE posts
+        SET comments_count = counts.total
+        FROM (
+            SELECT post_id, count(*) AS total FROM comments GROUP BY post_id
+        ) AS counts
+        WHERE posts.id = counts.post_id
+        """
+    )
+
+    op.alter_column("posts", "comments_count", server_default=None)
+
+
+def downgrade() -> None:
+    op.drop_column("posts", "comments_count")
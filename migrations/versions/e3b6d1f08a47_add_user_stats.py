@@ -0,0 +1,47 @@
+"""add user stats
+
+Revision ID: e3b6d1f08a47
+Revises: 5a0e6f3d21c8
+Create Date: 2026-10-16 17:05:39.261870
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e3b6d1f08a47"
+down_revision: Union[str, None] = "5a0e6f3d21c8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_stats",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("followers_count", sa.Integer(), nullable=False),
+        sa.Column("following_count", sa.Integer(), nullable=False),
+        sa.Column("posts_count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+
+    op.execute(
+        """
+        INSERT INTO user_stats (user_id, followers_count, following_count, posts_count)
+        SELECT
+            users.id,
+            (SELECT count(*) FROM follows WHERE follows.followee_id = users.id),
+            (SELECT count(*) FROM follows WHERE follows.follower_id = users.id),
+            (SELECT count(*) FROM posts WHERE posts.owner_id = users.id)
+        FROM users
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("user_stats")